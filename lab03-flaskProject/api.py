@@ -1,103 +1,355 @@
-from flask import Blueprint, jsonify, request
-from flasgger import swag_from
+from contextlib import closing
+
+from flask import Blueprint, jsonify, request, url_for
 from models import (
     get_db_connection,
-    get_products,
+    search_products,
     get_orders,
+    get_feedback_page,
+    get_customers_page,
     get_order_details,
     add_order,
     update_order_status,
-    delete_order
+    update_orders_status,
+    delete_order,
+    ORDER_FIELDS,
+    ORDER_STATUSES
 )
+from pagination import InvalidCursor
+from pricing import PricingError, quote_cart, quote_to_dict
+from checkout import MAX_BATCH_ORDERS, OutOfStock, place_orders
+from cache import invalidate
+from conditional import conditional
+from idempotency import idempotent
+from export import FORMATS, export_response
+from jsonout import stream_json
+from stats import DEFAULT_DAYS, sales_summary
+from changes import CHANGE_TABLES, ChangesExpired, fetch_changes
+from config import setting
 
 api_bp = Blueprint('api', __name__)
 
+
+def page_response(page):
+    """JSON envelope for a keyset page: data + cursors + next/prev links."""
+    def link(cursor):
+        if not cursor:
+            return None
+        args = request.args.to_dict()
+        args['cursor'] = cursor
+        return url_for(request.endpoint, **args)
+
+    meta = {
+        'page': {
+            'limit': page.limit,
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+        },
+        'links': {'next': link(page.next_cursor), 'prev': link(page.prev_cursor)},
+    }
+    if len(page.items) > setting('JSON_STREAM_THRESHOLD'):
+        # Великі сторінки (?include=...) — потоком, без одного гігантського рядка
+        return stream_json(page.items, tail=meta)
+    return jsonify({'data': page.items, **meta})
+
+
+def export_or_none(name):
+    """Streaming export if ``?format=json|ndjson|csv`` was requested, else None."""
+    fmt = request.args.get('format')
+    if fmt not in FORMATS:
+        return None
+    return export_response(name, fmt,
+                           date_from=request.args.get('date_from'),
+                           date_to=request.args.get('date_to'),
+                           gzip=request.args.get('gzip') == '1',
+                           attachment=False)
+
+
+ORDER_INCLUDES = ('items', 'customer')
+
+
+def parse_list_arg(name, allowed):
+    """Comma-separated query arg as a list; raises ValueError on unknown values."""
+    values = [v.strip() for v in request.args.get(name, '').split(',') if v.strip()]
+    unknown = [v for v in values if v not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {name}: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return values
+
+
+def shape_order(order, include, fields):
+    """Embed ``customer`` and restrict top-level fields of an order dict."""
+    shaped = {key: order[key] for key in (fields or ORDER_FIELDS) if key in order}
+    if 'customer' in include:
+        shaped['customer'] = {
+            'id': order['customer_id'],
+            'name': order['customer_name'],
+            'email': order['customer_email'],
+            'phone': order['customer_phone'],
+        } if order['customer_id'] is not None else None
+    if 'items' in include:
+        shaped['items'] = order['items']
+    return shaped
+
+
 # Products endpoints
 @api_bp.route('/api/products', methods=['GET'])
+@conditional('products')
 def get_all_products():
     """
-    Отримати всі продукти
+    Отримати всі продукти (з опціональним повнотекстовим пошуком)
     ---
     tags:
       - Products
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: false
+        description: Пошуковий запит (назва, опис, категорія; префіксний пошук)
+      - name: min_price
+        in: query
+        type: number
+        required: false
+      - name: max_price
+        in: query
+        type: number
+        required: false
+      - name: format
+        in: query
+        type: string
+        required: false
+        enum: ["json", "ndjson", "csv"]
+        description: Потокове вивантаження всіх рядків замість JSON-сторінки (фільтри q/min_price/max_price ігноруються)
+      - name: gzip
+        in: query
+        type: integer
+        required: false
+        enum: [1]
+        description: Стиснути потокове вивантаження gzip
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Курсор з links.next / links.prev попередньої відповіді
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Розмір сторінки (обмежується MAX_PAGE_SIZE)
     responses:
       200:
-        description: Список всіх продуктів
+        description: Сторінка продуктів
         schema:
-          type: array
-          items:
+          $ref: '#/definitions/ProductPage'
+      400:
+        description: Некоректний курсор
+      500:
+        description: Помилка сервера
+    definitions:
+      PageLinks:
+        type: object
+        properties:
+          next:
+            type: string
+            example: "/api/products?cursor=eyJrIjpbMjBdLCJkIjoibmV4dCJ9"
+          prev:
+            type: string
+      ProductPage:
+        type: object
+        properties:
+          links:
+            $ref: '#/definitions/PageLinks'
+          page:
             type: object
             properties:
-              id:
+              limit:
                 type: integer
-                example: 1
-              name:
+                example: 20
+              next_cursor:
                 type: string
-                example: "Ноутбук"
-              price:
-                type: number
-                format: float
-                example: 25000.50
-              image:
+              prev_cursor:
                 type: string
-                example: "laptop.jpg"
-      500:
-        description: Помилка сервера
+          data:
+            type: array
+            items:
+              type: object
+              properties:
+                id:
+                  type: integer
+                  example: 1
+                name:
+                  type: string
+                  example: "Ноутбук"
+                price:
+                  type: number
+                  format: float
+                  example: 25000.50
+                image:
+                  type: string
+                  example: "laptop.jpg"
     """
+    export = export_or_none('products')
+    if export is not None:
+        return export
     try:
-        products = get_products()
-        return jsonify([dict(product) for product in products]), 200
+        page = search_products(
+            request.args.get('q', '').strip(),
+            request.args.get('min_price', type=float),
+            request.args.get('max_price', type=float),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit'),
+        )
+        return page_response(page), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Orders endpoints
 @api_bp.route('/api/orders', methods=['GET'])
+@conditional('orders', 'order_items', 'customers', 'products')
 def get_all_orders():
     """
     Отримати всі замовлення
     ---
     tags:
       - Orders
+    parameters:
+      - name: status
+        in: query
+        type: string
+        required: false
+        enum: ["new", "processing", "shipped", "completed", "cancelled"]
+      - name: date_from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Замовлення від дати (YYYY-MM-DD, включно)
+      - name: date_to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Замовлення до дати (YYYY-MM-DD, включно)
+      - name: format
+        in: query
+        type: string
+        required: false
+        enum: ["json", "ndjson", "csv"]
+        description: Потокове вивантаження всіх рядків замість JSON-сторінки (по рядку на позицію замовлення; діють date_from/date_to)
+      - name: gzip
+        in: query
+        type: integer
+        required: false
+        enum: [1]
+        description: Стиснути потокове вивантаження gzip
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Курсор з links.next / links.prev попередньої відповіді
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Розмір сторінки (обмежується MAX_PAGE_SIZE, з include — MAX_BULK_PAGE_SIZE)
+      - name: include
+        in: query
+        type: string
+        required: false
+        description: "Вкладені документи через кому: items (позиції замовлення), customer (об'єкт клієнта)"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Лише вказані поля замовлення через кому, напр. id,status,total
     responses:
       200:
-        description: Список всіх замовлень
+        description: Сторінка замовлень (нові першими)
         schema:
-          type: array
-          items:
-            type: object
-            properties:
-              id:
-                type: integer
-                example: 1
-              customer_name:
-                type: string
-                example: "Іван Петренко"
-              customer_email:
-                type: string
-                example: "user@example.com"
-              status:
-                type: string
-                example: "new"
-              created_at:
-                type: string
-                example: "2024-01-15 14:30:00"
-              promo_code:
-                type: string
-                example: "1234"
-              discount_amount:
-                type: number
-                format: float
-                example: 250.50
+          type: object
+          properties:
+            links:
+              $ref: '#/definitions/PageLinks'
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  customer_name:
+                    type: string
+                    example: "Іван Петренко"
+                  customer_email:
+                    type: string
+                    example: "user@example.com"
+                  status:
+                    type: string
+                    example: "new"
+                  created_at:
+                    type: string
+                    example: "2024-01-15 14:30:00"
+                  promo_code:
+                    type: string
+                    example: "1234"
+                  discount_amount:
+                    type: number
+                    format: float
+                    example: 250.50
+                  subtotal:
+                    type: number
+                    format: float
+                    example: 2505.00
+                  total:
+                    type: number
+                    format: float
+                    example: 2254.50
+                  customer:
+                    type: object
+                    description: Лише з include=customer
+                  items:
+                    type: array
+                    description: Лише з include=items
+                    items:
+                      type: object
+      400:
+        description: Некоректний курсор, include або fields
       500:
         description: Помилка сервера
     """
+    export = export_or_none('orders')
+    if export is not None:
+        return export
+    try:
+        include = parse_list_arg('include', ORDER_INCLUDES)
+        fields = parse_list_arg('fields', ORDER_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     try:
-        orders = get_orders()
-        return jsonify([dict(order) for order in orders]), 200
+        page = get_orders(
+            status=request.args.get('status'),
+            date_from=request.args.get('date_from'),
+            date_to=request.args.get('date_to'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit'),
+            include_items='items' in include,
+            # Повні сторінки з позиціями замість запиту на кожне замовлення
+            max_limit=setting('MAX_BULK_PAGE_SIZE') if include else None,
+        )
+        if include or fields:
+            page = page._replace(items=[shape_order(o, include, fields) for o in page.items])
+        return page_response(page), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/api/orders/<int:order_id>', methods=['GET'])
+@conditional('orders', 'order_items', 'customers', 'products')
 def get_order(order_id):
     """
     Отримати деталі замовлення
@@ -157,13 +409,14 @@ def get_order(order_id):
             return jsonify({'error': 'Order not found'}), 404
         
         return jsonify({
-            'order': dict(order),
-            'items': [dict(item) for item in items]
+            'order': order,
+            'items': items
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/api/orders', methods=['POST'])
+@idempotent
 def create_order():
     """
     Створити нове замовлення
@@ -171,6 +424,11 @@ def create_order():
     tags:
       - Orders
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Унікальний ключ запиту; повтор з тим самим ключем поверне збережену відповідь без повторного виконання
       - name: body
         in: body
         required: true
@@ -217,7 +475,9 @@ def create_order():
               type: integer
               example: 42
       400:
-        description: Відсутні обов'язкові поля
+        description: Відсутні обов'язкові поля або невідомий товар у кошику
+      409:
+        description: Недостатньо товару на складі (замовлення не створено)
       500:
         description: Помилка сервера
     """
@@ -235,6 +495,191 @@ def create_order():
             data.get('promo_code')
         )
         return jsonify({'message': 'Order created successfully', 'order_id': order_id}), 201
+    except PricingError as e:
+        return jsonify({'error': str(e)}), 400
+    except OutOfStock as e:
+        return jsonify({'error': str(e), 'out_of_stock': out_of_stock_lines(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def out_of_stock_lines(exc):
+    return [{'product_id': pid, 'requested': requested, 'available': available}
+            for pid, _, requested, available in exc.lines]
+
+
+@api_bp.route('/api/orders/batch', methods=['POST'])
+@idempotent
+def create_orders_batch():
+    """
+    Створити кілька замовлень однією транзакцією
+    ---
+    tags:
+      - Orders
+    parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Унікальний ключ запиту; повтор з тим самим ключем поверне збережену відповідь без повторного виконання
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - orders
+          properties:
+            orders:
+              type: array
+              description: До 500 замовлень у форматі POST /api/orders
+              items:
+                type: object
+                properties:
+                  customer_name:
+                    type: string
+                  customer_email:
+                    type: string
+                  customer_phone:
+                    type: string
+                  promo_code:
+                    type: string
+                  cart:
+                    type: object
+                    example: {"1": {"id": 1, "quantity": 2}}
+    responses:
+      200:
+        description: Результат для кожного замовлення (у порядку запиту)
+        schema:
+          type: object
+          properties:
+            created:
+              type: integer
+              example: 2
+            failed:
+              type: integer
+              example: 1
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  index:
+                    type: integer
+                  status:
+                    type: integer
+                    description: 201, 400 (некоректне замовлення) або 409 (немає на складі)
+                  order_id:
+                    type: integer
+                  error:
+                    type: string
+                  out_of_stock:
+                    type: array
+                    items:
+                      type: object
+      400:
+        description: Відсутній масив orders або він задовгий
+      500:
+        description: Помилка сервера
+    """
+    try:
+        data = request.get_json(silent=True)
+        orders = data.get('orders') if isinstance(data, dict) else None
+        if not isinstance(orders, list) or not orders:
+            return jsonify({'error': 'Missing required field: orders (non-empty list)'}), 400
+        if len(orders) > MAX_BATCH_ORDERS:
+            return jsonify({'error': f'Too many orders in one batch (max {MAX_BATCH_ORDERS})'}), 400
+
+        results = [None] * len(orders)
+        valid, positions = [], []
+        required_fields = ['customer_name', 'customer_email', 'customer_phone', 'cart']
+        for index, order in enumerate(orders):
+            if not isinstance(order, dict) or not all(field in order for field in required_fields):
+                results[index] = {'index': index, 'status': 400,
+                                  'error': 'Missing required fields: ' + ', '.join(required_fields)}
+            else:
+                valid.append(order)
+                positions.append(index)
+
+        if valid:
+            with closing(get_db_connection()) as conn:
+                outcomes = place_orders(conn, valid)
+            for index, outcome in zip(positions, outcomes):
+                if isinstance(outcome, OutOfStock):
+                    results[index] = {'index': index, 'status': 409, 'error': str(outcome),
+                                      'out_of_stock': out_of_stock_lines(outcome)}
+                elif isinstance(outcome, PricingError):
+                    results[index] = {'index': index, 'status': 400, 'error': str(outcome)}
+                else:
+                    results[index] = {'index': index, 'status': 201, 'order_id': outcome}
+
+        created = sum(1 for r in results if r['status'] == 201)
+        return jsonify({'created': created, 'failed': len(results) - created, 'results': results}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@api_bp.route('/api/orders/status', methods=['PATCH'])
+def update_orders_status_bulk():
+    """
+    Змінити статус багатьох замовлень одним UPDATE
+    ---
+    tags:
+      - Orders
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - ids
+            - status
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+            status:
+              type: string
+              example: "shipped"
+              enum: ["new", "processing", "shipped", "completed", "cancelled"]
+    responses:
+      200:
+        description: Оновлені та не знайдені id
+        schema:
+          type: object
+          properties:
+            updated:
+              type: array
+              items:
+                type: integer
+            not_found:
+              type: array
+              items:
+                type: integer
+      400:
+        description: Некоректний статус або список id
+      500:
+        description: Помилка сервера
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        status = str(data.get('status', '')).strip().lower()
+        if status not in ORDER_STATUSES:
+            return jsonify({'error': f"Invalid status. Allowed: {sorted(ORDER_STATUSES)}"}), 400
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'error': 'Missing required field: ids (non-empty list)'}), 400
+        try:
+            ids = sorted({int(order_id) for order_id in ids})
+        except (TypeError, ValueError):
+            return jsonify({'error': 'ids must be integers'}), 400
+
+        updated = update_orders_status(ids, status)
+        found = set(updated)
+        return jsonify({'updated': updated,
+                        'not_found': [order_id for order_id in ids if order_id not in found]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -322,46 +767,405 @@ def remove_order(order_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Customers endpoints
+@api_bp.route('/api/customers', methods=['GET'])
+def get_all_customers():
+    """
+    Отримати клієнтів (сторінками або потоковим вивантаженням)
+    ---
+    tags:
+      - Customers
+    parameters:
+      - name: format
+        in: query
+        type: string
+        required: false
+        enum: ["json", "ndjson", "csv"]
+        description: Потокове вивантаження всіх клієнтів замість JSON-сторінки
+      - name: gzip
+        in: query
+        type: integer
+        required: false
+        enum: [1]
+        description: Стиснути потокове вивантаження gzip
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Курсор з links.next / links.prev попередньої відповіді
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Розмір сторінки (обмежується MAX_PAGE_SIZE)
+    responses:
+      200:
+        description: Сторінка клієнтів
+        schema:
+          type: object
+          properties:
+            links:
+              $ref: '#/definitions/PageLinks'
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  name:
+                    type: string
+                  email:
+                    type: string
+                  phone:
+                    type: string
+      400:
+        description: Некоректний курсор
+      500:
+        description: Помилка сервера
+    """
+    export = export_or_none('customers')
+    if export is not None:
+        return export
+    try:
+        page = get_customers_page(request.args.get('cursor'), request.args.get('limit'))
+        return page_response(page), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Cart endpoints
+@api_bp.route('/api/cart/quote', methods=['POST'])
+def cart_quote():
+    """
+    Розрахувати вартість кошика за серверними цінами
+    ---
+    tags:
+      - Cart
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - cart
+          properties:
+            promo_code:
+              type: string
+              example: "1234"
+            cart:
+              type: object
+              description: "{product_id: quantity} або формат кошика з POST /api/orders"
+              example: {"1": 2, "3": 1}
+    responses:
+      200:
+        description: Розрахунок кошика
+        schema:
+          type: object
+          properties:
+            lines:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  name:
+                    type: string
+                  price:
+                    type: number
+                  quantity:
+                    type: integer
+                  subtotal:
+                    type: number
+            subtotal:
+              type: number
+              example: 2297.5
+            discount:
+              type: number
+              example: 229.75
+            total:
+              type: number
+              example: 2067.75
+            promo_code:
+              type: string
+            discount_percent:
+              type: number
+            missing:
+              type: array
+              description: ID товарів, яких немає в каталозі
+              items:
+                type: integer
+      400:
+        description: Некоректний кошик
+      500:
+        description: Помилка сервера
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('cart'), dict):
+            return jsonify({'error': 'Missing required field: cart'}), 400
+        with closing(get_db_connection()) as conn:
+            quote = quote_cart(conn, data['cart'], data.get('promo_code'))
+        return jsonify(quote_to_dict(quote)), 200
+    except PricingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Stats endpoints
+@api_bp.route('/api/stats', methods=['GET'])
+def get_stats():
+    """
+    Зведена статистика продажів (з попередньо агрегованих таблиць)
+    ---
+    tags:
+      - Stats
+    parameters:
+      - name: days
+        in: query
+        type: integer
+        required: false
+        default: 30
+        description: Кількість останніх днів у вибірці
+    responses:
+      200:
+        description: Виручка по днях, топ товарів, промокоди, замовлення за статусами
+        schema:
+          type: object
+          properties:
+            days:
+              type: integer
+              example: 30
+            since:
+              type: string
+              example: "2024-01-01"
+            totals:
+              type: object
+              properties:
+                orders:
+                  type: integer
+                units:
+                  type: integer
+                revenue:
+                  type: number
+                discount:
+                  type: number
+                net_revenue:
+                  type: number
+                average_order:
+                  type: number
+            daily:
+              type: array
+              items:
+                type: object
+            top_products:
+              type: array
+              items:
+                type: object
+            promo_codes:
+              type: array
+              items:
+                type: object
+            orders_by_status:
+              type: object
+              example: {"new": 12, "completed": 40}
+      500:
+        description: Помилка сервера
+    """
+    try:
+        days = request.args.get('days', DEFAULT_DAYS, type=int)
+        with closing(get_db_connection()) as conn:
+            return jsonify(sales_summary(conn, days)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Change feed endpoints
+@api_bp.route('/api/changes', methods=['GET'])
+@conditional(*CHANGE_TABLES)
+def get_changes():
+    """
+    Зміни після вказаного seq (дельта-синхронізація)
+    ---
+    tags:
+      - Sync
+    parameters:
+      - name: since
+        in: query
+        type: integer
+        required: false
+        default: 0
+        description: Останній застосований клієнтом seq (0 — з початку журналу)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 500
+        description: Максимум записів журналу за запит (до 5000)
+      - name: tables
+        in: query
+        type: string
+        required: false
+        description: Через кому, напр. products,feedback (за замовчуванням усі)
+    responses:
+      200:
+        description: Упорядковані upsert / delete з поточними даними рядків
+        schema:
+          type: object
+          properties:
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  seq:
+                    type: integer
+                    example: 1042
+                  table:
+                    type: string
+                    example: "products"
+                  id:
+                    type: integer
+                    example: 7
+                  op:
+                    type: string
+                    enum: [upsert, delete]
+                  changed_at:
+                    type: string
+                  data:
+                    type: object
+            since:
+              type: integer
+            next_since:
+              type: integer
+              description: Передайте як since у наступному запиті
+            has_more:
+              type: boolean
+            last_seq:
+              type: integer
+      400:
+        description: Некоректний since
+      410:
+        description: Журнал до since стиснуто — потрібна повна синхронізація
+      500:
+        description: Помилка сервера
+    """
+    try:
+        try:
+            since = int(request.args.get('since', 0))
+        except ValueError:
+            return jsonify({'error': 'since must be an integer'}), 400
+        tables = [t for t in request.args.get('tables', '').split(',') if t] or None
+        with closing(get_db_connection()) as conn:
+            page = fetch_changes(conn, since, request.args.get('limit'), tables)
+        args = request.args.to_dict()
+        args['since'] = page.next_since
+        return jsonify({
+            'data': page.changes,
+            'since': page.since,
+            'next_since': page.next_since,
+            'has_more': page.has_more,
+            'last_seq': page.last_seq,
+            'links': {'next': url_for(request.endpoint, **args) if page.has_more else None},
+        }), 200
+    except ChangesExpired as e:
+        return jsonify({'error': str(e), 'pruned_through': e.pruned_through}), 410
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # Feedback endpoints
 @api_bp.route('/api/feedback', methods=['GET'])
+@conditional('feedback')
 def get_all_feedback():
     """
     Отримати всі відгуки
     ---
     tags:
       - Feedback
+    parameters:
+      - name: format
+        in: query
+        type: string
+        required: false
+        enum: ["json", "ndjson", "csv"]
+        description: Потокове вивантаження всіх рядків замість JSON-сторінки (діють date_from/date_to)
+      - name: date_from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Лише для format — відгуки від дати (YYYY-MM-DD, включно)
+      - name: date_to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Лише для format — відгуки до дати (YYYY-MM-DD, включно)
+      - name: gzip
+        in: query
+        type: integer
+        required: false
+        enum: [1]
+        description: Стиснути потокове вивантаження gzip
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Курсор з links.next / links.prev попередньої відповіді
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Розмір сторінки (обмежується MAX_PAGE_SIZE)
     responses:
       200:
-        description: Список всіх відгуків
+        description: Сторінка відгуків (нові першими)
         schema:
-          type: array
-          items:
-            type: object
-            properties:
-              id:
-                type: integer
-                example: 1
-              name:
-                type: string
-                example: "Іван Петренко"
-              email:
-                type: string
-                example: "ivan@example.com"
-              message:
-                type: string
-                example: "Дуже задоволений покупкою!"
+          type: object
+          properties:
+            links:
+              $ref: '#/definitions/PageLinks'
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  name:
+                    type: string
+                    example: "Іван Петренко"
+                  email:
+                    type: string
+                    example: "ivan@example.com"
+                  message:
+                    type: string
+                    example: "Дуже задоволений покупкою!"
+      400:
+        description: Некоректний курсор
       500:
         description: Помилка сервера
     """
+    export = export_or_none('feedback')
+    if export is not None:
+        return export
     try:
-        conn = get_db_connection()
-        feedback = conn.execute('SELECT * FROM feedback').fetchall()
-        conn.close()
-        return jsonify([dict(f) for f in feedback]), 200
+        page = get_feedback_page(request.args.get('cursor'), request.args.get('limit'))
+        return page_response(page), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/api/feedback', methods=['POST'])
+@idempotent
 def create_feedback():
     """
     Створити новий відгук
@@ -369,6 +1173,11 @@ def create_feedback():
     tags:
       - Feedback
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Унікальний ключ запиту; повтор з тим самим ключем поверне збережену відповідь без повторного виконання
       - name: body
         in: body
         required: true
@@ -407,13 +1216,13 @@ def create_feedback():
         if not data or not all(k in data for k in ['name', 'email', 'message']):
             return jsonify({'error': 'All fields are required'}), 400
         
-        conn = get_db_connection()
-        conn.execute(
-            'INSERT INTO feedback (name, email, message) VALUES (?, ?, ?)',
-            (data['name'], data['email'], data['message'])
-        )
-        conn.commit()
-        conn.close()
+        with closing(get_db_connection()) as conn:
+            conn.execute(
+                'INSERT INTO feedback (name, email, message) VALUES (?, ?, ?)',
+                (data['name'], data['email'], data['message'])
+            )
+            conn.commit()
+        invalidate('feedback')
         return jsonify({'message': 'Feedback submitted successfully'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -449,17 +1258,17 @@ def delete_feedback(feedback_id):
         description: Помилка сервера
     """
     try:
-        conn = get_db_connection()
-        # Перевіряємо чи існує відгук
-        feedback = conn.execute('SELECT * FROM feedback WHERE id = ?', (feedback_id,)).fetchone()
-        
-        if not feedback:
-            return jsonify({'error': 'Feedback not found'}), 404
-            
-        conn.execute('DELETE FROM feedback WHERE id = ?', (feedback_id,))
-        conn.commit()
-        conn.close()
-        
+        with closing(get_db_connection()) as conn:
+            # Перевіряємо чи існує відгук
+            feedback = conn.execute('SELECT * FROM feedback WHERE id = ?', (feedback_id,)).fetchone()
+
+            if not feedback:
+                return jsonify({'error': 'Feedback not found'}), 404
+
+            conn.execute('DELETE FROM feedback WHERE id = ?', (feedback_id,))
+            conn.commit()
+        invalidate('feedback')
+
         return jsonify({
             'message': 'Feedback deleted successfully',
             'deleted_id': feedback_id
@@ -0,0 +1,189 @@
+"""OpenAPI spec and Swagger UI without loading flasgger on every worker.
+
+The spec is built from the YAML docstrings in ``api.py`` at most once per
+process — or never, when ``python apidocs.py build`` has written it to
+``APISPEC_PATH`` at image build time — and ``/apispec.json`` serves the
+cached bytes with an ``ETag``, so repeated hits by monitoring or the docs
+page cost a 304. flasgger (and its YAML/jsonschema imports) is only
+imported when the spec actually has to be generated.
+
+A prebuilt file is stamped with a hash of the app's routes and view
+docstrings (``x-routes-hash``); if the running app no longer matches it,
+the file is ignored and the spec is regenerated.
+
+The Swagger UI page is a plain template that loads the JS/CSS bundled with
+flasgger straight from its package directory, found without importing it.
+
+``API_DOCS=off`` registers nothing at all.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+
+from flask import Blueprint, current_app, render_template, request
+
+from config import API_DOCS, APISPEC_PATH, is_on
+
+SPEC_ENDPOINT = 'apispec'
+ROUTES_HASH_KEY = 'x-routes-hash'
+
+SWAGGER_CONFIG = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": SPEC_ENDPOINT,
+            "route": '/apispec.json',
+            "rule_filter": lambda rule: True,
+            "model_filter": lambda tag: True,
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/apidocs/"
+}
+
+SWAGGER_TEMPLATE = {
+    "info": {
+        "title": "Flask Market API",
+        "description": "REST API для інтернет-магазину",
+        "version": "1.0.0"
+    }
+}
+
+
+def routes_hash(app):
+    """Fingerprint of everything the spec is built from: rules, methods, docstrings."""
+    digest = hashlib.sha1()
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: (r.rule, r.endpoint)):
+        # Маршрути самої документації та статика на спеку не впливають
+        if rule.endpoint == 'static' or rule.endpoint.startswith('flasgger.'):
+            continue
+        view = app.view_functions.get(rule.endpoint)
+        digest.update(repr((rule.rule, rule.endpoint, sorted(rule.methods or ()),
+                            getattr(view, '__doc__', None))).encode('utf-8'))
+    return digest.hexdigest()[:20]
+
+
+def generate_spec(app):
+    """Build the spec dict from the app's view docstrings (imports flasgger)."""
+    from flasgger import Swagger
+
+    # Swagger без init_app: лише генератор специфікації, без маршрутів і хуків
+    swagger = Swagger(config=SWAGGER_CONFIG, template=SWAGGER_TEMPLATE)
+    swagger.app = app
+    with app.app_context():
+        spec = swagger.get_apispecs(SPEC_ENDPOINT)
+    spec[ROUTES_HASH_KEY] = routes_hash(app)
+    return spec
+
+
+def _ui_static_folder():
+    spec = importlib.util.find_spec('flasgger')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    folder = os.path.join(list(spec.submodule_search_locations)[0], 'ui3', 'static')
+    return folder if os.path.isdir(folder) else None
+
+
+class SpecCache:
+    """The encoded spec and its ETag, built once per process."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._body = None
+        self.etag = None
+        self.source = None
+
+    def body(self, app):
+        if self._body is None:
+            with self._lock:
+                if self._body is None:
+                    self._load(app)
+        return self._body
+
+    def _read_file(self, app):
+        """The prebuilt spec, or None if it is missing or built for other routes."""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as fh:
+            body = fh.read()
+        try:
+            stamp = json.loads(body).get(ROUTES_HASH_KEY)
+        except ValueError:
+            stamp = None
+        if stamp != routes_hash(app):
+            app.logger.warning('%s не відповідає маршрутам застосунку — специфікацію '
+                               'буде згенеровано заново (python apidocs.py build)', self.path)
+            return None
+        return body
+
+    def _load(self, app):
+        body, source = self._read_file(app), 'file'
+        if body is None:
+            body, source = json.dumps(generate_spec(app), ensure_ascii=False,
+                                      sort_keys=True).encode('utf-8'), 'generated'
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.source = source
+        self._body = body
+
+    def clear(self):
+        with self._lock:
+            self._body = self.etag = self.source = None
+
+
+spec_cache = SpecCache(APISPEC_PATH)
+
+
+def apispec():
+    body = spec_cache.body(current_app._get_current_object())
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(spec_cache.etag)
+    # Спека змінюється лише з деплоєм, але перевіряти її дешево — 304 за ETag
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
+
+
+def apidocs():
+    return render_template('apidocs.html', spec_url=SWAGGER_CONFIG['specs'][0]['route'],
+                           title=SWAGGER_TEMPLATE['info']['title'])
+
+
+def init_docs(app, mode=None):
+    """Register ``/apispec.json`` and the Swagger UI unless docs are off."""
+    if not is_on(API_DOCS if mode is None else mode):
+        return None
+    spec_cache.path = app.config.get('APISPEC_PATH', APISPEC_PATH)
+    # Ім'я «flasgger» лишаємо, щоб url_for('flasgger.apidocs') у шаблонах працював
+    static_folder = _ui_static_folder()
+    blueprint = Blueprint('flasgger', __name__, static_folder=static_folder,
+                          static_url_path=SWAGGER_CONFIG['static_url_path'] if static_folder else None)
+    blueprint.add_url_rule(SWAGGER_CONFIG['specs'][0]['route'], SPEC_ENDPOINT, apispec)
+    if static_folder:
+        blueprint.add_url_rule(SWAGGER_CONFIG['specs_route'], 'apidocs', apidocs)
+        app.config['API_DOCS_URL'] = SWAGGER_CONFIG['specs_route']
+    app.register_blueprint(blueprint)
+    return blueprint
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] != 'build':
+        print('Використання: python apidocs.py build')
+        return 1
+    from app import create_app
+
+    spec = generate_spec(create_app({'API_DOCS': 'off'}))
+    tmp_path = APISPEC_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(spec, fh, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, APISPEC_PATH)
+    print(f"✓ Специфікацію ({len(spec.get('paths', {}))} шляхів) записано в {APISPEC_PATH}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
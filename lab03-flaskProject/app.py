@@ -1,75 +1,142 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, g, session
 from flask_cors import CORS
-import sqlite3
 from types import SimpleNamespace
+from contextlib import closing
+import io
 from datetime import datetime
 import os
-from models import initialize_db
-from flasgger import Swagger
+import click
+import db
+from db import get_pool
+from models import (initialize_db, get_db_connection, search_products, load_orders, get_reviews,
+                    ORDER_STATUSES, update_orders_status)
+from migrations import apply_migrations
+from pagination import InvalidCursor
+from pricing import PricingError, promo_percent, quote_cart
+from checkout import OutOfStock, place_order
+from export import EXPORTS, FORMATS, export_response
+from stats import DEFAULT_DAYS, sales_summary
+from cache import invalidate, query_cache
+from pagecache import cache_page
+from conditional import conditional
+from jsonout import FastJSONProvider
 from api import api_bp
+from config import is_on
 
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.environ.get('DATABASE_PATH', os.path.join(BASE_DIR, 'site.db'))
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret')
-
-CORS(app)
-
-# Налаштування Swagger
-swagger_config = {
-    "headers": [],
-    "specs": [
-        {
-            "endpoint": 'apispec',
-            "route": '/apispec.json',
-            "rule_filter": lambda rule: True,
-            "model_filter": lambda tag: True,
-        }
-    ],
-    "static_url_path": "/flasgger_static",
-    "swagger_ui": True,
-    "specs_route": "/apidocs/"
-}
-
-swagger_template = {
-    "info": {
-        "title": "Flask Market API",
-        "description": "REST API для інтернет-магазину",
-        "version": "1.0.0"
-    }
-}
+class RouteTable:
+    """Routes declared at import time and bound to an app by ``create_app``.
+
+    Unlike a Blueprint it keeps the plain endpoint names, so the existing
+    ``url_for('market')`` calls in views and templates stay valid.
+    """
+
+    def __init__(self):
+        self.rules = []
+
+    def route(self, rule, **options):
+        def decorator(view):
+            self.rules.append((rule, options, view))
+            return view
+        return decorator
+
+    def init_app(self, app):
+        for rule, options, view in self.rules:
+            app.add_url_rule(rule, view_func=view, **options)
+
+
+site = RouteTable()
+
+
+def create_app(config=None):
+    """Build the Flask app from ``config.py`` plus optional overrides.
+
+    ``config`` may be a dict or anything ``config.from_object`` accepts.
+    Nothing here touches the database: the schema is created by
+    ``init_db()`` / ``flask init-db`` (``serve.py`` runs it before forking).
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config.from_object('config')
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+    db.configure(app.config['DATABASE_PATH'], app.config)
+    query_cache.init_app(app)
+
+    CORS(app)
+
+    # Стиснення відповідей і статика з хешованими іменами (python static_assets.py build)
+    if is_on(app.config.get('GZIP_ENABLED', True)):
+        from compression import GzipMiddleware
+        app.wsgi_app = GzipMiddleware(app.wsgi_app, min_size=app.config.get('GZIP_MIN_SIZE'),
+                                      level=app.config.get('GZIP_LEVEL'),
+                                      stream_level=app.config.get('GZIP_STREAM_LEVEL'))
+    from static_assets import init_static
+    init_static(app)
+
+    # Swagger: специфікація кешується, flasgger імпортується лише для її генерації
+    from apidocs import init_docs
+    init_docs(app, app.config.get('API_DOCS'))
+
+    # Метрики Prometheus на /metrics (METRICS=off вимикає)
+    if is_on(app.config.get('METRICS', 'on')):
+        from metrics import init_metrics
+        init_metrics(app)
 
-swagger = Swagger(app, config=swagger_config, template=swagger_template)
+    # Профілювання SQL на кожен запит (SQL_PROFILE=true), див. sqlprofile.py
+    if is_on(app.config.get('SQL_PROFILE', False)):
+        from sqlprofile import init_profiler
+        init_profiler(app)
 
-# Реєстрація API Blueprint
-app.register_blueprint(api_bp)
+    site.init_app(app)
+    app.register_blueprint(api_bp)
+    app.teardown_appcontext(close_db)
 
-# Глобальний прапорець для ініціалізації БД (одноразово)
-_db_initialized = False
+    from import_report import import_report_command
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(import_report_command)
+    return app
+
+
+def init_db():
+    """Create missing tables and apply pending migrations; return those applied."""
+    db_dir = os.path.dirname(db.DB_PATH)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    with closing(get_db_connection()) as conn:
+        initialize_db(conn)
+        return apply_migrations(conn)
+
+
+@click.command('init-db')
+def init_db_command():
+    """Створити схему БД і застосувати міграції."""
+    applied = init_db()
+    click.echo(f'✓ Схема БД готова ({db.DB_PATH}), нових міграцій: {len(applied)}')
+
+
+def __getattr__(name):
+    # `from app import app`, `flask --app app` і `gunicorn app:app` працюють як раніше,
+    # але сам імпорт модуля застосунок не створює
+    if name == 'app':
+        globals()['app'] = instance = create_app()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_db():
     if 'db' not in g:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        g.db = conn
-        # Автоматична ініціалізація таблиць при першому підключенні
-        global _db_initialized
-        if not _db_initialized:
-            initialize_db(conn)
-            _db_initialized = True
+        # З'єднання береться з пулу і повертається туди в close_db
+        g.db = get_db_connection()
     return g.db
 
 
 def close_db(e=None):
-    db = g.pop('db', None)
-    if db is not None:
-        db.close()
-
-
-app.teardown_appcontext(close_db)
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
 
 
 def row_to_obj(row):
@@ -90,38 +157,40 @@ def admin_required(f):
     return decorated_function
 
 
-@app.route('/')
+@site.route('/')
+@cache_page()
 def home():
     return render_template('home.html')
 
 
-@app.route('/about')
+@site.route('/about')
+@cache_page()
 def about():
     return render_template('about.html')
 
 
-@app.route('/api-demo')
+@site.route('/api-demo')
 def api_demo():
     """Landing page that showcases calling the REST API from frontend."""
     return render_template('api-demo.html')
 
 
-@app.route('/HELP', methods=['GET'])
+@site.route('/HELP', methods=['GET'])
 def helppage():
     """Redirect old /HELP to /reviews for backward compatibility."""
     return redirect(url_for('reviews_page'))
 
 
-@app.route('/reviews', methods=['GET'])
+@site.route('/reviews', methods=['GET'])
+@cache_page('feedback')
 def reviews_page():
     """Display reviews page with form and all user feedback."""
-    db = get_db()
-    cur = db.execute('SELECT id, name, email, message, created_at FROM feedback ORDER BY created_at DESC')
-    reviews = [row_to_obj(r) for r in cur.fetchall()]
+    get_db()
+    reviews = [row_to_obj(r) for r in get_reviews()]
     return render_template('reviews.html', reviews=reviews)
 
 
-@app.route('/feedback', methods=['POST'])
+@site.route('/feedback', methods=['POST'])
 def create_feedback():
     name = request.form.get('name')
     email = request.form.get('email')
@@ -133,43 +202,42 @@ def create_feedback():
     db.execute('INSERT INTO feedback (name,email,message,created_at) VALUES (?,?,?,?)',
                (name, email, message, datetime.utcnow().isoformat()))
     db.commit()
+    invalidate('feedback')
     flash('Дякуємо за відгук!', 'success')
     return redirect(url_for('reviews_page'))
 
 
-@app.route('/market')
+@site.route('/market')
+@conditional('products', personal_pages=True)
+@cache_page('products')
 def market():
     q = request.args.get('q', '')
     min_price = request.args.get('min_price')
     max_price = request.args.get('max_price')
-    db = get_db()
-    sql = 'SELECT * FROM products WHERE 1=1'
-    params = []
-    if q:
-        sql += ' AND name LIKE ?'
-        params.append(f'%{q}%')
-    if min_price:
-        try:
-            float(min_price)
-            sql += ' AND price >= ?'
-            params.append(min_price)
-        except ValueError:
-            pass
-    if max_price:
-        try:
-            float(max_price)
-            sql += ' AND price <= ?'
-            params.append(max_price)
-        except ValueError:
-            pass
-    cur = db.execute(sql, params)
-    rows = cur.fetchall()
-    products = [row_to_obj(r) for r in rows]
-    return render_template('market.html', products=products, q=q, min_price=min_price or '', max_price=max_price or '')
+    get_db()  # гарантує ініціалізацію схеми; пошук іде через те саме з'єднання
+    filters = (q, _parse_price(min_price), _parse_price(max_price))
+    try:
+        page = search_products(*filters, cursor=request.args.get('cursor'),
+                               limit=request.args.get('limit'))
+    except InvalidCursor:
+        page = search_products(*filters, limit=request.args.get('limit'))
+    products = [row_to_obj(r) for r in page.items]
+    return render_template('market.html', products=products, page=page, q=q,
+                           min_price=min_price or '', max_price=max_price or '')
+
+
+def _parse_price(value):
+    """Ціна з query string або None, якщо поле порожнє чи некоректне."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
 
 
 # === CART ROUTES ===
-@app.route('/cart/add/<int:product_id>', methods=['POST'])
+@site.route('/cart/add/<int:product_id>', methods=['POST'])
 def cart_add(product_id):
     """Додати товар до кошика"""
     quantity = int(request.form.get('quantity', 1))
@@ -187,43 +255,22 @@ def cart_add(product_id):
     return redirect(url_for('market'))
 
 
-@app.route('/cart')
+@site.route('/cart')
 def cart_view():
     """Перегляд кошика"""
     cart = session.get('cart', {})
-    items = []
-    total = 0.0
-    discount = 0.0
     promo_code = session.get('promo_code')
-    promo_discount_percent = 0.0
-
-    if cart:
-        db = get_db()
-        for pid, qty in cart.items():
-            cur = db.execute('SELECT * FROM products WHERE id = ?', (int(pid),))
-            p = cur.fetchone()
-            if p:
-                prod = dict(p)
-                prod['cart_quantity'] = qty
-                prod['subtotal'] = prod['price'] * qty
-                total += prod['subtotal']
-                items.append(prod)
-        
-        # Якщо є промокод — рахуємо знижку
-        if promo_code:
-            cur = db.execute('SELECT discount_percent FROM promo_codes WHERE code = ? AND active = 1', (promo_code,))
-            promo_row = cur.fetchone()
-            if promo_row:
-                promo_discount_percent = promo_row['discount_percent']
-                discount = total * (promo_discount_percent / 100.0)
-    
-    final_total = total - discount
-    return render_template('cart.html', items=items, total=total, discount=discount, 
-                           final_total=final_total, promo_code=promo_code, 
-                           promo_discount_percent=promo_discount_percent)
+    quote = quote_cart(get_db(), cart, promo_code) if cart else None
+
+    if quote is None:
+        return render_template('cart.html', items=[], total=0.0, discount=0.0, final_total=0.0,
+                               promo_code=promo_code, promo_discount_percent=0.0)
+    return render_template('cart.html', items=quote.lines, total=quote.subtotal, discount=quote.discount,
+                           final_total=quote.total, promo_code=promo_code,
+                           promo_discount_percent=quote.discount_percent)
 
 
-@app.route('/cart/update/<int:product_id>', methods=['POST'])
+@site.route('/cart/update/<int:product_id>', methods=['POST'])
 def cart_update(product_id):
     """Оновити кількість товару в кошику"""
     quantity = int(request.form.get('quantity', 1))
@@ -238,7 +285,7 @@ def cart_update(product_id):
     return redirect(url_for('cart_view'))
 
 
-@app.route('/cart/remove/<int:product_id>', methods=['POST'])
+@site.route('/cart/remove/<int:product_id>', methods=['POST'])
 def cart_remove(product_id):
     """Видалити товар з кошика"""
     if 'cart' in session:
@@ -248,7 +295,7 @@ def cart_remove(product_id):
     return redirect(url_for('cart_view'))
 
 
-@app.route('/cart/apply_promo', methods=['POST'])
+@site.route('/cart/apply_promo', methods=['POST'])
 def cart_apply_promo():
     """Застосувати промокод"""
     code = request.form.get('promo_code', '').strip()
@@ -256,21 +303,19 @@ def cart_apply_promo():
         flash('Введіть промокод', 'error')
         return redirect(url_for('cart_view'))
     
-    db = get_db()
-    cur = db.execute('SELECT * FROM promo_codes WHERE code = ? AND active = 1', (code,))
-    promo = cur.fetchone()
+    percent = promo_percent(get_db(), code)
     
-    if promo:
+    if percent:
         session['promo_code'] = code
         session.modified = True
-        flash(f'Промокод "{code}" застосовано! Знижка {promo["discount_percent"]}%', 'success')
+        flash(f'Промокод "{code}" застосовано! Знижка {percent}%', 'success')
     else:
         flash('Промокод недійсний або неактивний', 'error')
     
     return redirect(url_for('cart_view'))
 
 
-@app.route('/cart/remove_promo', methods=['POST'])
+@site.route('/cart/remove_promo', methods=['POST'])
 def cart_remove_promo():
     """Видалити промокод"""
     session.pop('promo_code', None)
@@ -279,7 +324,7 @@ def cart_remove_promo():
     return redirect(url_for('cart_view'))
 
 
-@app.route('/cart/checkout', methods=['POST'])
+@site.route('/cart/checkout', methods=['POST'])
 def cart_checkout():
     """Оформлення замовлення з кошика"""
     cart = session.get('cart', {})
@@ -294,59 +339,15 @@ def cart_checkout():
         flash("Введіть ім'я та email", 'error')
         return redirect(url_for('cart_view'))
     
-    db = get_db()
-    
-    # Find or create customer
-    customer = None
-    if email:
-        cur = db.execute('SELECT * FROM customers WHERE email = ?', (email,))
-        customer = cur.fetchone()
-    if not customer:
-        cur = db.execute('INSERT INTO customers (name,email,phone) VALUES (?,?,?)', (name, email, phone))
-        db.commit()
-        customer_id = cur.lastrowid
-    else:
-        customer_id = customer['id']
-    
-    # Підрахунок суми і знижки
-    total = 0.0
-    discount = 0.0
-    promo_code = session.get('promo_code')
-    
-    # Рахуємо загальну суму товарів
-    for pid, qty in cart.items():
-        cur = db.execute('SELECT * FROM products WHERE id = ?', (int(pid),))
-        prod = cur.fetchone()
-        if prod:
-            total += prod['price'] * qty
-    
-    # Якщо є промокод — рахуємо знижку
-    if promo_code:
-        cur = db.execute('SELECT discount_percent FROM promo_codes WHERE code = ? AND active = 1', (promo_code,))
-        promo_row = cur.fetchone()
-        if promo_row:
-            discount = total * (promo_row['discount_percent'] / 100.0)
-    
-    # Create order з промокодом і знижкою
-    cur = db.execute('INSERT INTO orders (customer_id,status,created_at,promo_code,discount_amount) VALUES (?,?,?,?,?)',
-                     (customer_id, 'new', datetime.utcnow().isoformat(), promo_code, discount))
-    db.commit()
-    order_id = cur.lastrowid
-    
-    # Add order items
-    for pid, qty in cart.items():
-        cur = db.execute('SELECT * FROM products WHERE id = ?', (int(pid),))
-        prod = cur.fetchone()
-        if prod:
-            db.execute('INSERT INTO order_items (order_id,product_id,quantity,price) VALUES (?,?,?,?)',
-                       (order_id, int(pid), qty, prod['price']))
-            # Reduce stock
-            new_stock = prod['stock'] - qty
-            if new_stock < 0:
-                new_stock = 0
-            db.execute('UPDATE products SET stock = ? WHERE id = ?', (new_stock, int(pid)))
-    
-    db.commit()
+    try:
+        place_order(get_db(), name, email, phone, cart, session.get('promo_code'))
+    except OutOfStock as exc:
+        for _, pname, requested, available in exc.lines:
+            flash(f'Недостатньо товару "{pname}": замовлено {requested}, в наявності {available}', 'error')
+        return redirect(url_for('cart_view'))
+    except PricingError:
+        flash('Деякі товари з кошика більше не доступні', 'error')
+        return redirect(url_for('cart_view'))
     
     # Clear cart and promo code
     session.pop('cart', None)
@@ -355,7 +356,7 @@ def cart_checkout():
     return redirect(url_for('home'))
 
 
-@app.route('/order/create', methods=['POST'])
+@site.route('/order/create', methods=['POST'])
 def create_order():
     """Створити замовлення окремого товару"""
     try:
@@ -369,41 +370,22 @@ def create_order():
     email = request.form.get('email')
     phone = request.form.get('phone')
 
-    db = get_db()
-    cur = db.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-    prod = cur.fetchone()
-    if not prod:
-        flash('Товар не знайдено', 'error')
+    if quantity <= 0:
+        flash('Невірні дані замовлення', 'error')
         return redirect(url_for('market'))
 
-    customer = None
-    if email:
-        cur = db.execute('SELECT * FROM customers WHERE email = ?', (email,))
-        customer = cur.fetchone()
-    if not customer:
-        cur = db.execute('INSERT INTO customers (name,email,phone) VALUES (?,?,?)', (name, email, phone))
-        db.commit()
-        customer_id = cur.lastrowid
-    else:
-        customer_id = customer['id']
-
-    cur = db.execute('INSERT INTO orders (customer_id,status,created_at) VALUES (?,?,?)',
-                     (customer_id, 'new', datetime.utcnow().isoformat()))
-    db.commit()
-    order_id = cur.lastrowid
-
-    db.execute('INSERT INTO order_items (order_id,product_id,quantity,price) VALUES (?,?,?,?)',
-               (order_id, product_id, quantity, prod['price']))
-    
-    new_stock = prod['stock'] - quantity
-    if new_stock < 0:
-        new_stock = 0
-    db.execute('UPDATE products SET stock = ? WHERE id = ?', (new_stock, product_id))
-    db.commit()
+    try:
+        place_order(get_db(), name, email, phone, {product_id: quantity})
+    except OutOfStock:
+        flash('Недостатньо товару в наявності', 'error')
+        return redirect(url_for('market'))
+    except PricingError:
+        flash('Товар не знайдено', 'error')
+        return redirect(url_for('market'))
 
     flash('Замовлення створено. Дякуємо!', 'success')
     return redirect(url_for('market'))
-@app.route('/admin/login', methods=['GET', 'POST'])
+@site.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     if request.method == 'POST':
         password = request.form.get('password')
@@ -417,20 +399,21 @@ def admin_login():
     return render_template('admin/login.html')
 
 
-@app.route('/admin/logout')
+@site.route('/admin/logout')
 def admin_logout():
     session.pop('admin_logged_in', None)
     flash('Вихід з адмін-панелі', 'success')
     return redirect(url_for('home'))
 
 
-@app.route('/admin')
+@site.route('/admin')
 @admin_required
 def admin_index():
-    return render_template('admin/index.html')
+    days = request.args.get('days', DEFAULT_DAYS, type=int)
+    return render_template('admin/index.html', stats=sales_summary(get_db(), days))
 
 
-@app.route('/admin/feedback')
+@site.route('/admin/feedback')
 @admin_required
 def admin_feedback():
     db = get_db()
@@ -439,17 +422,18 @@ def admin_feedback():
     return render_template('admin/feedback.html', feedbacks=feedbacks)
 
 
-@app.route('/admin/feedback/delete/<int:fb_id>', methods=['POST'])
+@site.route('/admin/feedback/delete/<int:fb_id>', methods=['POST'])
 @admin_required
 def admin_feedback_delete(fb_id):
     db = get_db()
     db.execute('DELETE FROM feedback WHERE id = ?', (fb_id,))
     db.commit()
+    invalidate('feedback')
     flash('Відгук видалено', 'success')
     return redirect(url_for('admin_feedback'))
 
 
-@app.route('/admin/products')
+@site.route('/admin/products')
 @admin_required
 def admin_products():
     db = get_db()
@@ -458,7 +442,7 @@ def admin_products():
     return render_template('admin/products.html', products=products)
 
 
-@app.route('/admin/products/new', methods=['POST'])
+@site.route('/admin/products/new', methods=['POST'])
 @admin_required
 def admin_products_new():
     """Створити новий товар з форми в адмінці."""
@@ -483,21 +467,94 @@ def admin_products_new():
     db.execute('INSERT INTO products (name, description, price, stock, category) VALUES (?,?,?,?,?)',
                (name, description, price_val, stock_val, category))
     db.commit()
+    invalidate('products')
     flash('Товар додано', 'success')
     return redirect(url_for('admin_products'))
 
 
-@app.route('/admin/products/delete/<int:product_id>', methods=['POST'])
+@site.route('/admin/products/delete/<int:product_id>', methods=['POST'])
 @admin_required
 def admin_products_delete(product_id):
     db = get_db()
     db.execute('DELETE FROM products WHERE id = ?', (product_id,))
     db.commit()
+    invalidate('products')
     flash('Товар видалено', 'success')
     return redirect(url_for('admin_products'))
 
 
-@app.route('/admin/promo')
+def _uploaded_csv():
+    """Завантажений CSV як текстовий потік (без читання всього файлу в пам'ять)"""
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return None
+    return io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+
+
+def _flash_import_result(result, action):
+    from bulk import rate
+    flash(f'{action}: рядків {result.rows}, записано {result.written}, '
+          f'помилок {len(result.errors)} ({rate(result):.0f} рядків/с)',
+          'success' if not result.errors else 'info')
+    for line, message in result.errors[:10]:
+        flash(f'Рядок {line}: {message}', 'error')
+
+
+@site.route('/admin/products/import', methods=['POST'])
+@admin_required
+def admin_products_import():
+    """Масовий імпорт товарів з CSV (upsert за sku / id)"""
+    from bulk import BulkError, import_products
+    textfile = _uploaded_csv()
+    if textfile is None:
+        flash('Оберіть CSV-файл', 'error')
+        return redirect(url_for('admin_products'))
+    try:
+        result = import_products(get_db(), textfile)
+    except (BulkError, UnicodeDecodeError) as exc:
+        flash(f'Не вдалося імпортувати файл: {exc}', 'error')
+        return redirect(url_for('admin_products'))
+    _flash_import_result(result, 'Імпорт завершено')
+    return redirect(url_for('admin_products'))
+
+
+@site.route('/admin/products/bulk_update', methods=['POST'])
+@admin_required
+def admin_products_bulk_update():
+    """Оновити залишки / ціни з CSV одним set-based UPDATE"""
+    from bulk import BulkError, update_from_csv
+    textfile = _uploaded_csv()
+    if textfile is None:
+        flash('Оберіть CSV-файл', 'error')
+        return redirect(url_for('admin_products'))
+    try:
+        result = update_from_csv(get_db(), textfile)
+    except (BulkError, UnicodeDecodeError) as exc:
+        flash(f'Не вдалося оновити товари: {exc}', 'error')
+        return redirect(url_for('admin_products'))
+    _flash_import_result(result, 'Оновлення завершено')
+    return redirect(url_for('admin_products'))
+
+
+@site.route('/admin/products/reprice', methods=['POST'])
+@admin_required
+def admin_products_reprice():
+    """Масова зміна цін на відсоток (для категорії або всіх товарів)"""
+    from bulk import reprice
+    category = request.form.get('category', '').strip() or None
+    try:
+        percent = float(request.form.get('percent', '').replace(',', '.'))
+        if percent <= -100:
+            raise ValueError
+    except ValueError:
+        flash('Відсоток має бути числом більшим за -100', 'error')
+        return redirect(url_for('admin_products'))
+    changed = reprice(get_db(), percent, category)
+    flash(f'Ціни змінено на {percent:+g}% для {changed} товарів', 'success')
+    return redirect(url_for('admin_products'))
+
+
+@site.route('/admin/promo')
 @admin_required
 def admin_promo():
     """Адмін: список промокодів"""
@@ -507,7 +564,7 @@ def admin_promo():
     return render_template('admin/promo.html', promos=promos)
 
 
-@app.route('/admin/promo/new', methods=['POST'])
+@site.route('/admin/promo/new', methods=['POST'])
 @admin_required
 def admin_promo_new():
     """Створити новий промокод"""
@@ -536,11 +593,12 @@ def admin_promo_new():
     db.execute('INSERT INTO promo_codes (code, discount_percent, active, created_at) VALUES (?,?,?,?)',
                (code, discount_val, 1, datetime.utcnow().isoformat()))
     db.commit()
+    invalidate('promo_codes')
     flash(f'Промокод "{code}" створено', 'success')
     return redirect(url_for('admin_promo'))
 
 
-@app.route('/admin/promo/toggle/<int:promo_id>', methods=['POST'])
+@site.route('/admin/promo/toggle/<int:promo_id>', methods=['POST'])
 @admin_required
 def admin_promo_toggle(promo_id):
     """Змінити статус активності промокоду"""
@@ -550,57 +608,56 @@ def admin_promo_toggle(promo_id):
         new_active = 0 if promo['active'] else 1
         db.execute('UPDATE promo_codes SET active = ? WHERE id = ?', (new_active, promo_id))
         db.commit()
+        invalidate('promo_codes')
         status = 'активовано' if new_active else 'деактивовано'
         flash(f'Промокод {status}', 'success')
     return redirect(url_for('admin_promo'))
 
 
-@app.route('/admin/promo/delete/<int:promo_id>', methods=['POST'])
+@site.route('/admin/promo/delete/<int:promo_id>', methods=['POST'])
 @admin_required
 def admin_promo_delete(promo_id):
     """Видалити промокод"""
     db = get_db()
     db.execute('DELETE FROM promo_codes WHERE id = ?', (promo_id,))
     db.commit()
+    invalidate('promo_codes')
     flash('Промокод видалено', 'success')
     return redirect(url_for('admin_promo'))
 
 
-@app.route('/admin/orders')
+@site.route('/admin/orders')
 @admin_required
 def admin_orders():
-    db = get_db()
-    cur = db.execute('SELECT * FROM orders ORDER BY created_at DESC')
-    orders = []
-    for o in cur.fetchall():
-        order = dict(o)
-        # get customer
-        customer_obj = {'name': 'Невідомий', 'email': '', 'phone': ''}
-        if order.get('customer_id'):
-            c = db.execute('SELECT * FROM customers WHERE id = ?', (order['customer_id'],)).fetchone()
-            if c:
-                customer_obj = dict(c)
-        order['customer'] = customer_obj
-        items_cur = db.execute('SELECT oi.*, p.name FROM order_items oi LEFT JOIN products p ON oi.product_id=p.id WHERE oi.order_id = ?', (order['id'],))
-        order['items'] = [dict(i) for i in items_cur.fetchall()]
-        orders.append(SimpleNamespace(**order))
-    return render_template('admin/orders.html', orders=orders)
-
-
-@app.route('/admin/orders/update_status/<int:order_id>', methods=['POST'])
+    filters = {
+        'status': request.args.get('status') or None,
+        'date_from': request.args.get('date_from') or None,
+        'date_to': request.args.get('date_to') or None,
+    }
+    try:
+        page = load_orders(get_db(), cursor=request.args.get('cursor'),
+                           limit=request.args.get('limit'), **filters)
+    except InvalidCursor:
+        page = load_orders(get_db(), limit=request.args.get('limit'), **filters)
+    orders = [SimpleNamespace(**o) for o in page.items]
+    return render_template('admin/orders.html', orders=orders, page=page,
+                           filters=filters, statuses=ORDER_STATUSES)
+
+
+@site.route('/admin/orders/update_status/<int:order_id>', methods=['POST'])
 @admin_required
 def admin_orders_update_status(order_id):
     new_status = request.form.get('status')
     # normalize and validate
     status = (new_status or '').strip().lower()
-    allowed = {'new','processing','shipped','completed','cancelled'}
-    if status not in allowed:
+    if status not in ORDER_STATUSES:
         flash('Некоректний статус замовлення', 'error')
         return redirect(url_for('admin_orders'))
 
     db = get_db()
     cur = db.execute('UPDATE orders SET status = ? WHERE id = ?', (status, order_id))
     db.commit()
+    invalidate('orders')
     if cur.rowcount == 0:
         flash('Замовлення не знайдено', 'error')
     else:
@@ -608,7 +665,23 @@ def admin_orders_update_status(order_id):
     return redirect(url_for('admin_orders'))
 
 
-@app.route('/admin/customers')
+@site.route('/admin/orders/bulk_status', methods=['POST'])
+@admin_required
+def admin_orders_bulk_status():
+    """Змінити статус одразу для кількох вибраних замовлень"""
+    status = (request.form.get('status') or '').strip().lower()
+    ids = request.form.getlist('order_ids', type=int)
+    if status not in ORDER_STATUSES:
+        flash('Некоректний статус замовлення', 'error')
+    elif not ids:
+        flash('Оберіть хоча б одне замовлення', 'error')
+    else:
+        updated = update_orders_status(ids, status)
+        flash(f'Статус "{status}" встановлено для {len(updated)} замовлень', 'success')
+    return redirect(url_for('admin_orders'))
+
+
+@site.route('/admin/customers')
 @admin_required
 def admin_customers():
     db = get_db()
@@ -617,23 +690,37 @@ def admin_customers():
     return render_template('admin/customers.html', customers=customers)
 
 
-@app.route('/admin/customers/delete/<int:customer_id>', methods=['POST'])
+@site.route('/admin/customers/delete/<int:customer_id>', methods=['POST'])
 @admin_required
 def admin_customers_delete(customer_id):
     db = get_db()
     db.execute('DELETE FROM customers WHERE id = ?', (customer_id,))
     db.commit()
+    invalidate('customers')
     flash('Клієнт видалений', 'success')
     return redirect(url_for('admin_customers'))
 
 
-@app.route('/health')
+@site.route('/admin/export/<name>.<fmt>')
+@admin_required
+def admin_export(name, fmt):
+    """Потокове вивантаження orders/customers/products/feedback у CSV або NDJSON"""
+    if name not in EXPORTS or fmt not in FORMATS:
+        return {'error': 'Unknown export'}, 404
+    return export_response(name, fmt,
+                           date_from=request.args.get('date_from') or None,
+                           date_to=request.args.get('date_to') or None,
+                           gzip=request.args.get('gzip') == '1')
+
+
+@site.route('/health')
 def health():
     """Простий healthcheck: перевірка підключення до БД."""
     try:
         conn = get_db()
         conn.execute('SELECT 1')
-        return {'status': 'healthy', 'database': 'connected'}, 200
+        return {'status': 'healthy', 'database': 'connected', 'pool': get_pool().stats(),
+                'cache': query_cache.info()}, 200
     except Exception as exc:  # pragma: no cover - простий health
         return {'status': 'unhealthy', 'error': str(exc)}, 500
 
@@ -645,8 +732,7 @@ if __name__ == '__main__':
         port = int(os.environ.get('FLASK_RUN_PORT', '5000'))
     except ValueError:
         port = 5000
-    # Ensure DB directory exists
-    db_dir = os.path.dirname(DB_PATH)
-    if db_dir:
-        os.makedirs(db_dir, exist_ok=True)
-    app.run(debug=True, host=host, port=port)
+    app = create_app()
+    init_db()
+    # Лише для розробки; у production — python serve.py (gunicorn)
+    app.run(debug=os.environ.get('FLASK_ENV') != 'production', host=host, port=port)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк конкурентного оформлення замовлень на "гарячий" товар.
+
+Запускає паралельні checkout-и в окремих потоках (кожен зі своїм з'єднанням
+з пулу) і перевіряє, що залишок не пішов у мінус і не загубилися оновлення.
+
+    python benchmarks/checkout_concurrency.py --threads 16 --orders 2000 --stock 500
+    python benchmarks/checkout_concurrency.py --legacy   # старий read-then-write
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkout import OutOfStock, place_order  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from models import initialize_db  # noqa: E402
+
+
+def legacy_checkout(conn, product_id, qty):
+    """Стара логіка: окремі коміти і UPDATE stock = <прочитане значення>."""
+    prod = conn.execute('SELECT * FROM products WHERE id = ?', (product_id,)).fetchone()
+    cur = conn.execute('INSERT INTO orders (customer_id,status,created_at) VALUES (?,?,?)',
+                       (None, 'new', time.time()))
+    conn.commit()
+    conn.execute('INSERT INTO order_items (order_id,product_id,quantity,price) VALUES (?,?,?,?)',
+                 (cur.lastrowid, product_id, qty, prod['price']))
+    conn.execute('UPDATE products SET stock = ? WHERE id = ?', (max(prod['stock'] - qty, 0), product_id))
+    conn.commit()
+
+
+def run(args):
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    pool = ConnectionPool(path)
+    conn = pool.acquire()
+    initialize_db(conn)
+    apply_migrations(conn)
+    cur = conn.execute("INSERT INTO products (name, price, stock) VALUES ('Гарячий товар', 100.0, ?)",
+                       (args.stock,))
+    conn.commit()
+    product_id = cur.lastrowid
+    conn.close()
+
+    counters = {'ok': 0, 'out_of_stock': 0, 'lock_errors': 0}
+    lock = threading.Lock()
+    per_thread = args.orders // args.threads
+    start_gate = threading.Barrier(args.threads)
+
+    def worker(n):
+        start_gate.wait()
+        for i in range(per_thread):
+            c = pool.acquire()
+            try:
+                if args.legacy:
+                    legacy_checkout(c, product_id, args.qty)
+                else:
+                    place_order(c, f'Buyer {n}', f'buyer{n}@example.com', None, {product_id: args.qty})
+                key = 'ok'
+            except OutOfStock:
+                key = 'out_of_stock'
+            except sqlite3.OperationalError:
+                key = 'lock_errors'
+            finally:
+                c.close()
+            with lock:
+                counters[key] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    conn = pool.acquire()
+    final_stock = conn.execute('SELECT stock FROM products WHERE id = ?', (product_id,)).fetchone()[0]
+    sold = conn.execute('SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE product_id = ?',
+                        (product_id,)).fetchone()[0]
+    conn.close()
+
+    attempts = per_thread * args.threads
+    print(f"Режим: {'legacy read-then-write' if args.legacy else 'atomic BEGIN IMMEDIATE'}")
+    print(f"Потоків: {args.threads}, спроб: {attempts}, початковий залишок: {args.stock}")
+    print(f"Час: {elapsed:.2f} с, {attempts / elapsed:.0f} спроб/с, {counters['ok'] / elapsed:.0f} замовлень/с")
+    print(f"Успішно: {counters['ok']}, немає в наявності: {counters['out_of_stock']}, "
+          f"помилок блокування: {counters['lock_errors']}")
+    print(f"Продано одиниць: {sold}, залишок: {final_stock}")
+    oversold = max(sold - args.stock, 0)
+    lost_updates = final_stock - (args.stock - sold) if sold <= args.stock else None
+    print(f"Перепродано: {oversold}")
+    if lost_updates is not None:
+        print(f"Розбіжність залишку (втрачені оновлення): {lost_updates}")
+    ok = oversold == 0 and final_stock == args.stock - sold
+    print("✓ Залишок коректний" if ok else "✗ Залишок некоректний")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=1000, help='загальна кількість спроб')
+    parser.add_argument('--stock', type=int, default=300)
+    parser.add_argument('--qty', type=int, default=1)
+    parser.add_argument('--db', help='шлях до БД (за замовчуванням тимчасовий файл)')
+    parser.add_argument('--legacy', action='store_true', help='стара неатомарна логіка для порівняння')
+    return run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Мікробенчмарк серіалізації списків товарів у JSON.
+
+Порівнює три шляхи на тимчасовій БД з N товарів:
+
+  jsonify  — як раніше: fetchall() sqlite3.Row -> dict(row) -> список -> jsonify
+  fast     — шлях API: кортежі з кешованими іменами колонок (jsonout.row_dicts,
+             як у pagination.fetch_page) + jsonout.dumps (orjson, якщо є) з
+             сортуванням ключів, як у jsonify
+  stream   — те саме, але потоковий масив [...] шматками по 64 КБ
+
+і виводить МБ/с, тис. рядків/с та піковий обсяг пам'яті (tracemalloc) для
+кожного. jsonify екранує кирилицю в escape-послідовності, тому його вивід удвічі більший —
+порівнюйте також рядки/с.
+
+    python benchmarks/json_serialization.py
+    python benchmarks/json_serialization.py --rows 10000,100000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify  # noqa: E402
+
+from jsonout import FastJSONProvider, dumps, iter_json_array, orjson, row_dicts  # noqa: E402
+
+SQL = 'SELECT id, name, description, price, stock, category FROM products'
+CATEGORIES = ['Ноутбуки', 'Смартфони', 'Аудіо', 'Периферія', 'Кабелі']
+
+
+def build_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('''CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, description TEXT,
+                    price REAL, stock INTEGER, category TEXT)''')
+    rnd = random.Random(42)
+    conn.executemany('INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)', (
+        (i, f'Товар {i}', f'Опис товару номер {i} для перевірки серіалізації',
+         round(rnd.uniform(10, 50000), 2), rnd.randint(0, 500), rnd.choice(CATEGORIES))
+        for i in range(1, rows + 1)))
+    conn.commit()
+    return conn
+
+
+def run_jsonify(conn, app):
+    conn.row_factory = sqlite3.Row
+    with app.app_context():
+        rows = conn.execute(SQL).fetchall()
+        return len(jsonify([dict(row) for row in rows]).get_data())
+
+
+def run_fast(conn, app):
+    conn.row_factory = None
+    return len(dumps(list(row_dicts(conn.execute(SQL))), sort_keys=True))
+
+
+def run_stream(conn, app):
+    conn.row_factory = None
+    return sum(len(chunk) for chunk in iter_json_array(row_dicts(conn.execute(SQL)), sort_keys=True))
+
+
+METHODS = [('jsonify', run_jsonify), ('fast', run_fast), ('stream', run_stream)]
+
+
+def measure(func, conn, app, repeat):
+    best = None
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = func(conn, app)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    # Пам'ять міряємо окремим прогоном: tracemalloc сильно сповільнює код
+    tracemalloc.start()
+    func(conn, app)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10000,100000,1000000',
+                        help='кількості рядків через кому')
+    parser.add_argument('--repeat', type=int, default=3, help='повторів (береться найкращий час)')
+    args = parser.parse_args()
+
+    plain_app = Flask('jsonify')
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+    print(f"orjson: {'так' if orjson is not None else 'ні (stdlib json)'}")
+    print(f"{'рядків':>9} {'метод':<8} {'МБ':>8} {'с':>8} {'МБ/с':>8} {'тис.р/с':>8} {'пік пам., МБ':>13}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(r) for r in args.rows.split(',')):
+            conn = build_db(os.path.join(tmp, f'bench_{rows}.db'), rows)
+            for name, func in METHODS:
+                app = plain_app if name == 'jsonify' else fast_app
+                size, elapsed, peak = measure(func, conn, app, args.repeat)
+                mb = size / 1e6
+                print(f"{rows:>9} {name:<8} {mb:>8.1f} {elapsed:>8.3f} {mb / elapsed:>8.1f} "
+                      f"{rows / elapsed / 1e3:>8.0f} {peak / 1e6:>13.1f}")
+            conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
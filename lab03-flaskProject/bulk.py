@@ -0,0 +1,244 @@
+"""Bulk product import and set-based bulk updates.
+
+CSV files are parsed as a stream and written in chunks: each chunk is
+validated, then upserted with one ``executemany`` inside one transaction.
+Rows that clash with existing products (e.g. an ``id`` of one product with
+the ``sku`` of another) are rejected one by one and reported like invalid
+rows, the rest of the chunk is still written.
+Bulk repricing and stock updates are single set-based UPDATE statements
+instead of one form post (and one commit) per product.
+"""
+
+import csv
+import sqlite3
+import time
+from collections import namedtuple
+
+from cache import invalidate
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+ImportResult = namedtuple('ImportResult', ['rows', 'written', 'errors', 'elapsed'])
+
+PRODUCT_COLUMNS = ('id', 'sku', 'name', 'description', 'price', 'stock', 'category')
+
+
+def upsert_sql(fieldnames):
+    """Upsert statement for a CSV header, with named parameters.
+
+    Only columns present in the header are written, so a partial file
+    (e.g. ``sku,name,price``) leaves the other columns of existing products
+    alone. An empty cell keeps the stored value as well.
+    """
+    # name і price обов'язкові, решта — лише ті, що є в заголовку
+    columns = [c for c in PRODUCT_COLUMNS if c in fieldnames or c in ('name', 'price')]
+    values = [f'COALESCE(:{c}, 0)' if c == 'stock' else f':{c}' for c in columns]
+    updates = [
+        f'{c} = :{c}' if c in ('name', 'price') else f'{c} = COALESCE(:{c}, products.{c})'
+        for c in columns if c not in ('id', 'sku')
+    ]
+    sku_update = ['sku = COALESCE(:sku, products.sku)'] if 'sku' in columns else []
+    return f'''
+    INSERT INTO products ({', '.join(columns)})
+    VALUES ({', '.join(values)})
+    ON CONFLICT(id) DO UPDATE SET {', '.join(sku_update + updates)}
+    ON CONFLICT(sku) DO UPDATE SET {', '.join(updates)}
+'''
+
+
+class BulkError(ValueError):
+    """The uploaded file can't be processed at all (e.g. missing columns)."""
+
+
+def rate(result):
+    """Rows per second for an ImportResult."""
+    return result.rows / result.elapsed if result.elapsed else float(result.rows)
+
+
+def _optional_int(value, field):
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{field}: очікується ціле число') from None
+
+
+def _optional_float(value, field):
+    value = (value or '').strip().replace(',', '.')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{field}: очікується число') from None
+
+
+def parse_product_row(row):
+    """Validate one CSV row; return the named parameters for upsert_sql()."""
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise ValueError("name: обов'язкове поле")
+    price = _optional_float(row.get('price'), 'price')
+    if price is None or price < 0:
+        raise ValueError('price: має бути невід\'ємним числом')
+    stock = _optional_int(row.get('stock'), 'stock')
+    if stock is not None and stock < 0:
+        raise ValueError('stock: не може бути від\'ємним')
+    return {
+        'id': _optional_int(row.get('id'), 'id'),
+        'sku': (row.get('sku') or '').strip() or None,
+        'name': name,
+        'description': (row.get('description') or '').strip() or None,
+        'price': price,
+        'stock': stock,
+        'category': (row.get('category') or '').strip() or None,
+    }
+
+
+def _chunks(reader, size):
+    chunk = []
+    for row in reader:
+        # reader.line_num — номер рядка у файлі (з урахуванням заголовка)
+        chunk.append((reader.line_num, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _report(errors, line, message):
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append((line, message))
+
+
+def _write_chunk(conn, sql, chunk, errors):
+    """Upsert ``[(line, params), ...]`` in one transaction; return rows written.
+
+    If a row violates a constraint, the chunk is replayed row by row so only
+    the offending rows are skipped (a failed statement undoes just itself).
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        try:
+            written = conn.executemany(sql, [params for _, params in chunk]).rowcount
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            conn.execute('BEGIN IMMEDIATE')
+            written = 0
+            for line, params in chunk:
+                try:
+                    written += conn.execute(sql, params).rowcount
+                except sqlite3.IntegrityError as exc:
+                    _report(errors, line, f'конфлікт з наявним товаром ({exc})')
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    invalidate('products')
+    return written
+
+
+def import_products(conn, textfile, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Stream-parse a product CSV and upsert it in batched transactions.
+
+    Columns: ``name`` and ``price`` are required; ``sku``, ``id``,
+    ``description``, ``stock``, ``category`` are optional. Rows with a known
+    ``sku`` or ``id`` update that product (only the columns in the file),
+    others are inserted. Invalid rows and rows whose ``id`` and ``sku``
+    point at different products are skipped and reported as
+    ``(line, message)`` in ``errors``.
+    """
+    reader = csv.DictReader(textfile)
+    if not reader.fieldnames or not {'name', 'price'} <= set(reader.fieldnames):
+        raise BulkError("CSV має містити колонки name і price")
+    sql = upsert_sql(reader.fieldnames)
+    started = time.perf_counter()
+    rows = written = 0
+    errors = []
+    for chunk in _chunks(reader, chunk_size):
+        params = []
+        for line, row in chunk:
+            try:
+                params.append((line, parse_product_row(row)))
+            except ValueError as exc:
+                _report(errors, line, str(exc))
+        rows += len(chunk)
+        if params:
+            written += _write_chunk(conn, sql, params, errors)
+        if progress:
+            progress(rows, written, time.perf_counter() - started)
+    return ImportResult(rows, written, errors, time.perf_counter() - started)
+
+
+def reprice(conn, percent, category=None):
+    """Change prices by ``percent`` (e.g. -15) in one UPDATE; returns rows changed."""
+    sql = 'UPDATE products SET price = ROUND(price * (1 + ? / 100.0), 2)'
+    params = [percent]
+    if category:
+        sql += ' WHERE category = ?'
+        params.append(category)
+    cur = conn.execute(sql, params)
+    conn.commit()
+    invalidate('products')
+    return cur.rowcount
+
+
+def update_from_csv(conn, textfile, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Set stock and/or price from a CSV keyed by ``sku`` or ``id``.
+
+    Rows are staged into a temp table with ``executemany`` and applied with
+    two set-based ``UPDATE ... FROM`` statements (by id and by sku) in one
+    transaction.
+    """
+    reader = csv.DictReader(textfile)
+    fields = set(reader.fieldnames or ())
+    if not fields & {'id', 'sku'} or not fields & {'stock', 'price'}:
+        raise BulkError('CSV має містити id або sku та stock і/або price')
+    started = time.perf_counter()
+    rows = 0
+    errors = []
+    conn.execute('''CREATE TEMP TABLE IF NOT EXISTS bulk_updates (
+        id INTEGER, sku TEXT, stock INTEGER, price REAL)''')
+    conn.execute('DELETE FROM temp.bulk_updates')
+    conn.commit()
+    for chunk in _chunks(reader, chunk_size):
+        params = []
+        for line, row in chunk:
+            try:
+                pid = _optional_int(row.get('id'), 'id')
+                sku = (row.get('sku') or '').strip() or None
+                stock = _optional_int(row.get('stock'), 'stock')
+                price = _optional_float(row.get('price'), 'price')
+                if pid is None and sku is None:
+                    raise ValueError('потрібен id або sku')
+                if (stock is not None and stock < 0) or (price is not None and price < 0):
+                    raise ValueError('stock / price не можуть бути від\'ємними')
+                params.append((pid, sku, stock, price))
+            except ValueError as exc:
+                _report(errors, line, str(exc))
+        rows += len(chunk)
+        conn.executemany('INSERT INTO temp.bulk_updates VALUES (?, ?, ?, ?)', params)
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        written = 0
+        for join in ('products.id = u.id', 'u.id IS NULL AND products.sku = u.sku'):
+            cur = conn.execute(f'''
+                UPDATE products
+                SET stock = COALESCE(u.stock, products.stock),
+                    price = COALESCE(u.price, products.price)
+                FROM temp.bulk_updates u
+                WHERE {join}
+            ''')
+            written += cur.rowcount
+        conn.execute('DELETE FROM temp.bulk_updates')
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    invalidate('products')
+    return ImportResult(rows, written, errors, time.perf_counter() - started)
@@ -0,0 +1,383 @@
+"""Query-result cache for the read helpers in models.py and app.py.
+
+Entries are keyed by query name + parameters, bounded by entry count and
+total bytes, and evicted LRU-first or when their TTL runs out. Every entry
+is tagged with the tables it was read from; a write calls
+``invalidate('products')`` which bumps that tag's generation, so every key
+built on the old generation simply stops matching. Keys also carry the
+shared ``table_versions`` of those tables (bumped by the triggers of
+migration 0005), so writes made by another worker or outside the app
+invalidate entries too, and cached bodies always match the ETags that
+``conditional()`` derives from the same versions. Those versions are read
+once per request and kept on ``flask.g``; ``invalidate()`` drops the
+remembered ones, so a request sees its own writes.
+
+Two backends:
+
+* ``memory`` — per-process OrderedDict (default, fastest);
+* ``sqlite`` — a local SQLite file shared by all worker processes on the
+  host, so an invalidation in one worker is seen by the others.
+
+``create_app`` calls ``query_cache.init_app(app)``, which picks the backend
+from ``app.config``: ``CACHE_TYPE`` (``simple``/``memory``,
+``sqlite``/``filesystem`` or ``null`` to disable), ``CACHE_DEFAULT_TIMEOUT``,
+``CACHE_MAX_ENTRIES``, ``CACHE_MAX_BYTES`` and ``CACHE_PATH``. Until then
+(CLI tools that never build the app) caching is off.
+"""
+
+import functools
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+from flask import g, has_request_context
+
+import db
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Hit/miss/eviction counters (approximate under heavy concurrency)."""
+
+    FIELDS = ('hits', 'misses', 'sets', 'evictions', 'expirations', 'invalidations')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        lookups = self.hits + self.misses
+        data['hit_ratio'] = round(self.hits / lookups, 4) if lookups else 0.0
+        return data
+
+
+class MemoryBackend:
+    """In-process LRU + TTL store of pickled values."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (blob, expires_at)
+        self._bytes = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, stats):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            blob, expires_at = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                stats.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return blob
+
+    def set(self, key, blob, ttl, stats):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (blob, time.monotonic() + ttl)
+            self._bytes += len(blob)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._drop(oldest)
+                stats.evictions += 1
+
+    def _drop(self, key):
+        blob, _ = self._data.pop(key)
+        self._bytes -= len(blob)
+
+    def generations(self, tags):
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def size(self):
+        return {'entries': len(self._data), 'bytes': self._bytes}
+
+
+class SQLiteBackend:
+    """LRU + TTL store in a local SQLite file shared between processes.
+
+    Recency is tracked coarsely: a hit rewrites ``accessed_at`` only when the
+    stored value is older than ``touch_interval`` seconds, so most hits are
+    pure reads and don't queue up on the WAL write lock.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=10000, max_bytes=128 * 1024 * 1024, touch_interval=30):
+        self.path = path
+        self.touch_interval = touch_interval
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries(accessed_at);
+            CREATE TABLE IF NOT EXISTS cache_generations (
+                tag TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            );
+        ''')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Кеш можна втратити — fsync не потрібен
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, stats):
+        conn = self._conn()
+        row = conn.execute('SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?',
+                           (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] < now:
+            conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+            stats.expirations += 1
+            return None
+        if now - row[2] > self.touch_interval:
+            # Для LRU достатньо точності в touch_interval секунд
+            conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key, blob, ttl, stats):
+        if len(blob) > self.max_bytes:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)',
+                         (key, blob, len(blob), now + ttl, now))
+            count, total = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries').fetchone()
+            while count > self.max_entries or total > self.max_bytes:
+                victim = conn.execute(
+                    'SELECT key, size FROM cache_entries ORDER BY accessed_at LIMIT 1').fetchone()
+                conn.execute('DELETE FROM cache_entries WHERE key = ?', (victim[0],))
+                count, total = count - 1, total - victim[1]
+                stats.evictions += 1
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def generations(self, tags):
+        if not tags:
+            return ()
+        rows = dict(self._conn().execute(
+            'SELECT tag, generation FROM cache_generations WHERE tag IN (%s)'
+            % ','.join('?' * len(tags)), tags).fetchall())
+        return tuple(rows.get(tag, 0) for tag in tags)
+
+    def bump(self, tags):
+        conn = self._conn()
+        for tag in tags:
+            conn.execute('INSERT INTO cache_generations (tag, generation) VALUES (?, 1) '
+                         'ON CONFLICT(tag) DO UPDATE SET generation = generation + 1', (tag,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache_entries')
+
+    def size(self):
+        count, total = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries').fetchone()
+        return {'entries': count, 'bytes': total}
+
+
+def _remembered_versions():
+    """Per-request ``{table: version}`` on ``flask.g`` (None outside a request)."""
+    if not has_request_context():
+        return None
+    if '_table_versions' not in g:
+        g._table_versions = {}
+    return g._table_versions
+
+
+def remember_versions(versions):
+    """Store ``{table: version}`` read elsewhere (e.g. by ``conditional()``)."""
+    remembered = _remembered_versions()
+    if remembered is not None:
+        remembered.update(versions)
+
+
+def forget_versions(tags):
+    remembered = _remembered_versions()
+    if remembered is not None:
+        for tag in tags:
+            remembered.pop(tag, None)
+
+
+def shared_versions(tags):
+    """Versions of the tables in ``tags`` from the database's ``table_versions``.
+
+    Inside a request each table is looked up at most once (until it is
+    invalidated), so cache hits don't pay a query each.
+    """
+    if not tags:
+        return ()
+    remembered = _remembered_versions()
+    missing = [tag for tag in tags if remembered is None or tag not in remembered]
+    if missing:
+        try:
+            with closing(db.get_connection()) as conn:
+                found = dict(conn.execute(
+                    'SELECT name, version FROM table_versions WHERE name IN (%s)'
+                    % ','.join('?' * len(missing)), missing).fetchall())
+        except sqlite3.OperationalError:
+            # Схема ще не мігрована
+            return ()
+        fetched = {tag: found.get(tag, 0) for tag in missing}
+        if remembered is None:
+            return tuple(fetched[tag] for tag in tags)
+        remembered.update(fetched)
+    return tuple(remembered[tag] for tag in tags)
+
+
+class QueryCache:
+    """Tag-invalidated read-through cache in front of a backend."""
+
+    def __init__(self, backend=None, default_ttl=300):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    def init_app(self, app):
+        """Configure the backend and default TTL from ``app.config``."""
+        self.backend = backend_from_config(app.config)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        self.stats.reset()
+        app.extensions['query_cache'] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def key(self, namespace, params, tags):
+        """Cache key for ``(namespace, params)`` under the current tag generations."""
+        tags = tuple(tags)
+        return '%s:%r:%r:%r' % (namespace, params, self.backend.generations(tags),
+                                shared_versions(tags))
+
+    def get(self, key, default=None):
+        blob = self.backend.get(key, self.stats)
+        if blob is None:
+            self.stats.misses += 1
+            return default
+        self.stats.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                         ttl or self.default_ttl, self.stats)
+        self.stats.sets += 1
+
+    def get_or_load(self, namespace, params, tags, loader, ttl=None):
+        """Return the cached result of ``loader()`` for ``(namespace, params)``."""
+        if self.backend is None:
+            return loader()
+        # Ключ будується до завантаження: якщо запис стався під час load,
+        # результат ляже під старе покоління і вже не буде прочитаний
+        key = self.key(namespace, params, tags)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *tags):
+        """Make every entry read from any of ``tags`` unreachable."""
+        forget_versions(tags)
+        if self.backend is not None and tags:
+            self.backend.bump(tags)
+            self.stats.invalidations += 1
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def info(self):
+        data = self.stats.as_dict()
+        data['backend'] = self.backend.name if self.backend else 'null'
+        if self.backend is not None:
+            data.update(self.backend.size())
+        return data
+
+
+def backend_from_config(config):
+    # Без явного CACHE_TYPE кілька воркерів ділять один кеш у файлі SQLite
+    kind = (config.get('CACHE_TYPE')
+            or ('sqlite' if config.get('WEB_WORKERS', 1) > 1 else 'simple')).lower()
+    max_entries = config.get('CACHE_MAX_ENTRIES', 1024)
+    max_bytes = config.get('CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    if kind in ('null', 'none', 'off'):
+        return None
+    if kind in ('sqlite', 'filesystem', 'shared'):
+        path = config.get('CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'flask_market_cache.db')
+        return SQLiteBackend(path, max_entries, max_bytes)
+    return MemoryBackend(max_entries, max_bytes)
+
+
+# Налаштовується в create_app() через query_cache.init_app(app)
+query_cache = QueryCache()
+
+
+def cached(namespace, tags, ttl=None):
+    """Decorator: cache a read helper's result, keyed by its arguments.
+
+    The result must be picklable (dicts / lists / namedtuples, not
+    sqlite3.Row).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            params = (args, tuple(sorted(kwargs.items())))
+            return query_cache.get_or_load(namespace, params, tags,
+                                           lambda: func(*args, **kwargs), ttl)
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def invalidate(*tags):
+    query_cache.invalidate(*tags)
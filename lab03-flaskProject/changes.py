@@ -0,0 +1,118 @@
+"""Incremental change feed over the trigger-maintained ``change_log``.
+
+A client remembers the last ``seq`` it has applied and asks for everything
+after it, so a sync costs O(changes) instead of re-downloading whole tables.
+Within one page only the latest change of each row is returned, with the
+row's current data for upserts.
+"""
+
+from collections import namedtuple
+
+from pagination import clamp_limit
+
+CHANGE_TABLES = ('products', 'orders', 'order_items', 'feedback', 'promo_codes')
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+DEFAULT_RETENTION_DAYS = 30
+# Ліміт параметрів SQLite для IN (...)
+_IN_CHUNK = 500
+
+ChangesPage = namedtuple('ChangesPage', ['changes', 'since', 'next_since', 'has_more', 'last_seq'])
+Compaction = namedtuple('Compaction', ['superseded', 'pruned', 'pruned_through', 'remaining'])
+
+
+class ChangesExpired(Exception):
+    """``since`` is older than the compacted part of the log; resync needed."""
+
+    def __init__(self, pruned_through):
+        self.pruned_through = pruned_through
+        super().__init__(f'Changes up to seq {pruned_through} were compacted; full resync required')
+
+
+def pruned_through(conn):
+    row = conn.execute("SELECT value FROM change_log_state WHERE key = 'pruned_through'").fetchone()
+    return row[0] if row else 0
+
+
+def _current_rows(conn, table, ids):
+    rows = {}
+    ids = list(ids)
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        cur = conn.execute(f'SELECT * FROM {table} WHERE id IN ({",".join("?" * len(chunk))})', chunk)
+        for row in cur:
+            rows[row['id']] = dict(row)
+    return rows
+
+
+def fetch_changes(conn, since=0, limit=None, tables=None):
+    """Return a :class:`ChangesPage` of changes with ``seq > since``.
+
+    Raises :class:`ChangesExpired` when entries after ``since`` may already
+    have been pruned by compaction.
+    """
+    limit = clamp_limit(limit, DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT)
+    horizon = pruned_through(conn)
+    if since < horizon:
+        raise ChangesExpired(horizon)
+    tables = [t for t in (tables or CHANGE_TABLES) if t in CHANGE_TABLES]
+    sql = ('SELECT seq, table_name, row_id, op, changed_at FROM change_log WHERE seq > ? '
+           'AND table_name IN (%s) ORDER BY seq LIMIT ?' % ','.join('?' * len(tables)))
+    entries = conn.execute(sql, [since, *tables, limit + 1]).fetchall()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Лише остання зміна кожного рядка в межах сторінки
+    latest = {}
+    for entry in entries:
+        latest[(entry['table_name'], entry['row_id'])] = entry
+    wanted = {}
+    for (table, row_id), entry in latest.items():
+        if entry['op'] == 'upsert':
+            wanted.setdefault(table, []).append(row_id)
+    current = {table: _current_rows(conn, table, ids) for table, ids in wanted.items()}
+
+    changes = []
+    for entry in sorted(latest.values(), key=lambda e: e['seq']):
+        row = current.get(entry['table_name'], {}).get(entry['row_id'])
+        # Рядок уже видалено пізнішою зміною — одразу віддаємо delete
+        op = 'upsert' if row is not None else 'delete'
+        changes.append({'seq': entry['seq'], 'table': entry['table_name'], 'id': entry['row_id'],
+                        'op': op, 'changed_at': entry['changed_at'], 'data': row})
+    next_since = entries[-1]['seq'] if entries else since
+    # sqlite_sequence пам'ятає останній seq навіть після компакції
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return ChangesPage(changes, since, next_since, has_more, row[0] if row else 0)
+
+
+def compact_changes(conn, retention_days=DEFAULT_RETENTION_DAYS):
+    """Bound the change log.
+
+    Entries superseded by a later change of the same row are dropped (no
+    client loses anything), then entries older than ``retention_days`` are
+    pruned and the horizon is raised so lagging clients get a resync error.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        superseded = conn.execute('''
+            DELETE FROM change_log
+            WHERE seq < (SELECT MAX(l.seq) FROM change_log l
+                         WHERE l.table_name = change_log.table_name AND l.row_id = change_log.row_id)
+        ''').rowcount
+        pruned = 0
+        horizon = pruned_through(conn)
+        if retention_days is not None:
+            cutoff = conn.execute(
+                "SELECT MAX(seq) FROM change_log WHERE changed_at < datetime('now', ?)",
+                (f'-{int(retention_days)} days',)).fetchone()[0]
+            if cutoff:
+                pruned = conn.execute('DELETE FROM change_log WHERE seq <= ?', (cutoff,)).rowcount
+                horizon = max(horizon, cutoff)
+                conn.execute("UPDATE change_log_state SET value = ? WHERE key = 'pruned_through'",
+                             (horizon,))
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    remaining = conn.execute('SELECT COUNT(*) FROM change_log').fetchone()[0]
+    return Compaction(superseded, pruned, horizon, remaining)
@@ -0,0 +1,151 @@
+"""Atomic checkout: customer, order, items and stock in one transaction.
+
+The whole order is written inside a single ``BEGIN IMMEDIATE`` transaction.
+Stock is reserved with a conditional ``UPDATE ... WHERE stock >= ?`` so two
+buyers racing for the last item can't both get it, and lock conflicts are
+retried with exponential backoff instead of surfacing "database is locked".
+"""
+
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+from cache import invalidate
+from pricing import PricingError, quote_cart
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.02  # секунди
+MAX_BATCH_ORDERS = 500
+
+
+class OutOfStock(Exception):
+    """One or more cart lines ask for more than is in stock."""
+
+    def __init__(self, lines):
+        self.lines = lines  # [(product_id, name, requested, available), ...]
+        names = ', '.join(name for _, name, _, _ in lines)
+        super().__init__(f'Not enough stock for: {names}')
+
+
+def _is_lock_error(exc):
+    msg = str(exc).lower()
+    return 'locked' in msg or 'busy' in msg
+
+
+def _find_or_create_customer(conn, name, email, phone):
+    customer = None
+    if email:
+        customer = conn.execute('SELECT id FROM customers WHERE email = ?', (email,)).fetchone()
+    if customer:
+        return customer['id']
+    cur = conn.execute('INSERT INTO customers (name, email, phone) VALUES (?, ?, ?)',
+                       (name, email, phone))
+    return cur.lastrowid
+
+
+def _write_order(conn, name, email, phone, cart, promo_code):
+    """Reserve stock and insert one order inside the caller's transaction."""
+    # Ціни читаються вже під блокуванням запису — узгоджені з резервом
+    quote = quote_cart(conn, cart, promo_code)
+    if quote.missing:
+        raise PricingError(f'Unknown product ids: {list(quote.missing)}')
+    if not quote.lines:
+        raise PricingError('Cart is empty')
+
+    short = []
+    for line in quote.lines:
+        cur = conn.execute('UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?',
+                           (line.quantity, line.id, line.quantity))
+        if cur.rowcount == 0:
+            short.append(line)
+    if short:
+        # l.stock прочитано в цій самій транзакції — це актуальний залишок
+        raise OutOfStock([(l.id, l.name, l.quantity, l.stock) for l in short])
+
+    customer_id = _find_or_create_customer(conn, name, email, phone)
+    cur = conn.execute(
+        'INSERT INTO orders (customer_id, status, created_at, promo_code, discount_amount) '
+        'VALUES (?, ?, ?, ?, ?)',
+        (customer_id, 'new', datetime.utcnow().isoformat(), quote.promo_code, quote.discount))
+    order_id = cur.lastrowid
+    conn.executemany(
+        'INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)',
+        [(order_id, line.id, line.quantity, line.price) for line in quote.lines])
+    return order_id
+
+
+def _place_order_once(conn, name, email, phone, cart, promo_code):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        order_id = _write_order(conn, name, email, phone, cart, promo_code)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    # Залишки, замовлення і, можливо, новий клієнт змінилися
+    invalidate('products', 'orders', 'customers')
+    return order_id
+
+
+def _with_retries(func, retries, backoff):
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except sqlite3.OperationalError as exc:
+            if not _is_lock_error(exc) or attempt >= retries:
+                raise
+            # Експоненційна затримка з джитером, щоб конкуренти розійшлися
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+
+def place_order(conn, name, email, phone, cart, promo_code=None,
+                retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """Create an order atomically and return its id.
+
+    Raises ``PricingError`` for an empty cart or unknown products,
+    ``OutOfStock`` if any line can't be reserved (nothing is written), and
+    re-raises ``sqlite3.OperationalError`` once lock retries are exhausted.
+    """
+    return _with_retries(
+        lambda: _place_order_once(conn, name, email, phone, cart, promo_code), retries, backoff)
+
+
+def _place_orders_once(conn, orders):
+    results = []
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for order in orders:
+            # Savepoint на кожне замовлення: невдале відкочується саме, решта лишається
+            conn.execute('SAVEPOINT batch_order')
+            try:
+                order_id = _write_order(conn, order['customer_name'], order.get('customer_email'),
+                                        order.get('customer_phone'), order['cart'],
+                                        order.get('promo_code'))
+            except (PricingError, OutOfStock) as exc:
+                conn.execute('ROLLBACK TO batch_order')
+                results.append(exc)
+            else:
+                results.append(order_id)
+            conn.execute('RELEASE batch_order')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if any(isinstance(r, int) for r in results):
+        invalidate('products', 'orders', 'customers')
+    return results
+
+
+def place_orders(conn, orders, retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """Create many orders in one transaction (one commit, one fsync).
+
+    ``orders`` is a list of dicts with ``customer_name``, ``customer_email``,
+    ``customer_phone``, ``cart`` and optional ``promo_code``. Orders are
+    placed in list order, so later ones see stock reserved by earlier ones.
+    Returns one result per order: the new order id, or the ``PricingError``
+    / ``OutOfStock`` that rejected it (nothing of that order is written).
+    """
+    return _with_retries(lambda: _place_orders_once(conn, orders), retries, backoff)
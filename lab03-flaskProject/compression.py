@@ -0,0 +1,177 @@
+"""gzip compression of responses as WSGI middleware.
+
+``GzipMiddleware`` wraps ``app.wsgi_app`` and compresses text, JSON, CSV and
+other compressible bodies when the client sends ``Accept-Encoding: gzip``:
+
+* responses with a known length below ``min_size`` are left alone — the
+  gzip header and CPU are not worth it for a few hundred bytes;
+* buffered responses are compressed in one go at ``level``;
+* streamed responses (no ``Content-Length``, e.g. exports and large API
+  pages) are compressed chunk by chunk at ``stream_level`` with a sync flush
+  after each chunk, so they stay streamed and memory stays flat.
+
+Responses that already carry a ``Content-Encoding`` (precompressed static
+files), ranges, 204/304 and HEAD requests are passed through unchanged.
+"""
+
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+import config
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def accepts_gzip(environ):
+    accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+    return accept['gzip'] > 0 or (accept['*'] > 0 and 'gzip' not in accept)
+
+
+def is_compressible(content_type):
+    content_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compressor(level):
+    # wbits=31 — формат gzip (заголовок і CRC), а не «сирий» zlib
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _weaken_etag(headers):
+    # Стиснене тіло вже не побайтно те саме, тому сильний ETag стає слабким
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = 'W/' + etag
+
+
+class GzipMiddleware:
+    """Compress eligible responses of the wrapped WSGI app with gzip."""
+
+    def __init__(self, app, min_size=None, level=None, stream_level=None):
+        self.app = app
+        self.min_size = config.GZIP_MIN_SIZE if min_size is None else min_size
+        self.level = config.GZIP_LEVEL if level is None else level
+        self.stream_level = config.GZIP_STREAM_LEVEL if stream_level is None else stream_level
+
+    def __call__(self, environ, start_response):
+        if (environ.get('REQUEST_METHOD') == 'HEAD' or 'HTTP_RANGE' in environ
+                or not accepts_gzip(environ)):
+            return self._passthrough(environ, start_response)
+
+        state = {}
+
+        def capture(status, headers, exc_info=None):
+            state['status'], state['headers'] = status, Headers(headers)
+            # Тіло пишемо самі, тож write() від застосунку не підтримується
+            return self._no_write
+
+        body = self.app(environ, capture)
+        if 'status' not in state:
+            # Застосунок-генератор викликає start_response лише на першому шматку
+            body = _prefetch(body)
+        headers = state['headers']
+        status_code = int(state['status'].split(' ', 1)[0])
+        compressible = is_compressible(headers.get('Content-Type'))
+        if compressible:
+            self._add_vary(headers)
+        if (not compressible or status_code in (204, 206, 304) or status_code < 200
+                or 'Content-Encoding' in headers
+                or 'no-transform' in headers.get('Cache-Control', '')):
+            start_response(state['status'], headers.to_wsgi_list())
+            return body
+
+        length = headers.get('Content-Length', type=int)
+        if length is not None:
+            if length < self.min_size:
+                start_response(state['status'], headers.to_wsgi_list())
+                return body
+            return self._compress_buffered(body, state, start_response)
+        return self._compress_stream(body, state, start_response)
+
+    def _passthrough(self, environ, start_response):
+        def vary(status, headers, exc_info=None):
+            headers = Headers(headers)
+            if is_compressible(headers.get('Content-Type')) and 'Content-Encoding' not in headers:
+                self._add_vary(headers)
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+        return self.app(environ, vary)
+
+    @staticmethod
+    def _add_vary(headers):
+        values = [v.strip() for v in headers.get('Vary', '').split(',') if v.strip()]
+        if '*' not in values and 'accept-encoding' not in (v.lower() for v in values):
+            headers['Vary'] = ', '.join(values + ['Accept-Encoding'])
+
+    @staticmethod
+    def _no_write(data):
+        raise RuntimeError('GzipMiddleware does not support the WSGI write() callable')
+
+    @staticmethod
+    def _finish_headers(headers):
+        headers['Content-Encoding'] = 'gzip'
+        _weaken_etag(headers)
+
+    def _compress_buffered(self, body, state, start_response):
+        try:
+            data = b''.join(body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        compressor = _compressor(self.level)
+        compressed = compressor.compress(data) + compressor.flush()
+        headers = state['headers']
+        self._finish_headers(headers)
+        headers['Content-Length'] = str(len(compressed))
+        start_response(state['status'], headers.to_wsgi_list())
+        return [compressed]
+
+    def _compress_stream(self, body, state, start_response):
+        headers = state['headers']
+        self._finish_headers(headers)
+        start_response(state['status'], headers.to_wsgi_list())
+        return _GzipStream(body, _compressor(self.stream_level))
+
+
+def _prefetch(body):
+    iterator = iter(body)
+    first = next(iterator, b'')
+
+    def chain():
+        try:
+            yield first
+            yield from iterator
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+    return chain()
+
+
+class _GzipStream:
+    """Iterable that gzips another WSGI body chunk by chunk."""
+
+    def __init__(self, body, compressor):
+        self.body = body
+        self.compressor = compressor
+
+    def __iter__(self):
+        for chunk in self.body:
+            if not chunk:
+                continue
+            # Z_SYNC_FLUSH віддає кожен шматок клієнту одразу, не чекаючи кінця
+            data = self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield self.compressor.flush()
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
@@ -0,0 +1,89 @@
+"""Conditional GET (ETag / Last-Modified) driven by per-table versions.
+
+Triggers from migration 0005 bump ``table_versions`` on every write, so the
+versions of the tables a response is built from identify its content. The
+ETag is a hash of those versions plus the request path and query; when the
+client already holds it, ``304 Not Modified`` is returned after a single
+primary-key lookup, before the view runs any query or serializes anything.
+"""
+
+import functools
+import hashlib
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+from flask import make_response, request
+
+from cache import remember_versions
+from models import get_db_connection
+from pagecache import is_anonymous, normalized_query
+
+
+def table_versions(conn, tables):
+    """Return ``(versions, last_modified)`` for ``tables``."""
+    rows = conn.execute(
+        'SELECT name, version, updated_at FROM table_versions WHERE name IN (%s)'
+        % ','.join('?' * len(tables)), tables).fetchall()
+    found = {row[0]: (row[1], row[2]) for row in rows}
+    versions = tuple(found.get(name, (0, 0))[0] for name in tables)
+    updated = max((found.get(name, (0, 0))[1] for name in tables), default=0)
+    return versions, datetime.fromtimestamp(updated, timezone.utc)
+
+
+def make_etag(tables, versions):
+    raw = '%s?%s|%s|%s' % (request.path, normalized_query(), ','.join(tables),
+                           ','.join(map(str, versions)))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # If-None-Match має пріоритет над If-Modified-Since (RFC 9110); порівняння
+        # слабке, бо GzipMiddleware робить ETag стисненої відповіді слабким
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified.replace(microsecond=0) <= since
+
+
+def conditional(*tables, personal_pages=False):
+    """Add ETag/Last-Modified to a GET view built from ``tables``.
+
+    With ``personal_pages`` the check is skipped for visitors with a cart,
+    flashes or an admin login, whose HTML differs from the shared page.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or (personal_pages and not is_anonymous()):
+                return view(*args, **kwargs)
+            try:
+                with closing(get_db_connection()) as conn:
+                    versions, last_modified = table_versions(conn, tables)
+            except sqlite3.OperationalError:
+                # Схема ще не мігрована — віддаємо відповідь без валідаторів
+                return view(*args, **kwargs)
+            # Кеш запитів у view побудує ключі на тих самих версіях, без повторного читання
+            remember_versions(dict(zip(tables, versions)))
+            etag = make_etag(tables, versions)
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                with closing(get_db_connection()) as conn:
+                    if table_versions(conn, tables)[0] != versions:
+                        # Запис під час рендеру: тіло могло зібратися з кешу,
+                        # ще не інвалідованого, — валідатори не ставимо
+                        return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            if 'Cache-Control' not in response.headers:
+                # Кешувати можна, але перед використанням — перевірити
+                response.headers['Cache-Control'] = 'no-cache'
+            if personal_pages:
+                response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
@@ -3,6 +3,32 @@
 import os
 from datetime import timedelta
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def is_on(value):
+    """Config switch: bool, or a string like 'on' / 'off' / 'true' / 'false' / '0'."""
+    if isinstance(value, str):
+        return value.strip().lower() not in ('off', 'false', '0', 'no', '')
+    return bool(value)
+
+
+def env_int(name, default):
+    """Integer from the environment; a malformed value falls back to ``default``."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def setting(name):
+    """``name`` from the current app's config, or from this module outside an app."""
+    from flask import current_app, has_app_context
+    if has_app_context() and name in current_app.config:
+        return current_app.config[name]
+    return globals()[name]
+
+
 # === BASIC SETTINGS ===
 SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-CHANGE-THIS')
 DEBUG = False
@@ -10,13 +36,35 @@ TESTING = False
 
 # === SESSION SETTINGS ===
 PERMANENT_SESSION_LIFETIME = timedelta(days=7)
-SESSION_COOKIE_SECURE = True
+# Лише для HTTPS: з True браузер не надсилає cookie сесії по звичайному HTTP
+SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'false').lower() == 'true'
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_REFRESH_EACH_REQUEST = True
 
 # === DATABASE SETTINGS ===
-DATABASE_PATH = os.environ.get('DATABASE_PATH', 'site.db')
+DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(BASE_DIR, 'site.db'))
+# Пул з'єднань (db.py)
+DB_BUSY_TIMEOUT_MS = env_int('DB_BUSY_TIMEOUT_MS', 5000)
+DB_MMAP_SIZE = env_int('DB_MMAP_SIZE', 64 * 1024 * 1024)
+DB_CACHE_SIZE_KIB = env_int('DB_CACHE_SIZE_KIB', 16 * 1024)
+DB_POOL_MAX_AGE = env_int('DB_POOL_MAX_AGE', 3600)
+DB_POOL_MAX_USES = env_int('DB_POOL_MAX_USES', 100000)
+DB_POOL_HEALTH_CHECK_INTERVAL = env_int('DB_POOL_HEALTH_CHECK_INTERVAL', 30)
+
+# === API SETTINGS ===
+PAGE_SIZE = env_int('PAGE_SIZE', 20)
+MAX_PAGE_SIZE = env_int('MAX_PAGE_SIZE', 100)
+# Для масової синхронізації (?include=...) — велика сторінка замість тисяч запитів
+MAX_BULK_PAGE_SIZE = env_int('MAX_BULK_PAGE_SIZE', 5000)
+# Більші списки віддаються потоком, а не одним буфером
+JSON_STREAM_THRESHOLD = env_int('JSON_STREAM_THRESHOLD', 1000)
+IDEMPOTENCY_TTL = env_int('IDEMPOTENCY_TTL', 24 * 3600)
+IDEMPOTENCY_MAX_KEYS = env_int('IDEMPOTENCY_MAX_KEYS', 100000)
+# Скільки дублікат чекає на запит, що ще виконується
+IDEMPOTENCY_WAIT = env_int('IDEMPOTENCY_WAIT', 10)
+# Після цього вважаємо, що власник ключа впав, і ключ можна перехопити
+IDEMPOTENCY_LOCK_TIMEOUT = env_int('IDEMPOTENCY_LOCK_TIMEOUT', 60)
 
 # === LOGGING SETTINGS ===
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -30,7 +78,8 @@ WTF_CSRF_TIME_LIMIT = None
 WTF_CSRF_SSL_STRICT = True
 
 # === CORS SETTINGS ===
-CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'https://yourdomain.com').split(',')
+# Flask-Cors читає CORS_ORIGINS з конфігурації; у production вкажіть свої домени через кому
+CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
 
 # === RATE LIMITING ===
 RATELIMIT_ENABLED = True
@@ -38,13 +87,50 @@ RATELIMIT_DEFAULT = "200 per day, 50 per hour"
 RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
 
 # === CACHE SETTINGS ===
-CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')
-CACHE_DEFAULT_TIMEOUT = 300
+# simple — кеш у пам'яті процесу, sqlite — спільний файл для всіх воркерів, null — вимкнено;
+# порожньо — simple для одного процесу, sqlite, якщо WEB_WORKERS > 1
+CACHE_TYPE = os.environ.get('CACHE_TYPE', '')
+WEB_WORKERS = env_int('WEB_WORKERS', 1)  # serve.py передає фактичну кількість
+CACHE_DEFAULT_TIMEOUT = env_int('CACHE_DEFAULT_TIMEOUT', 300)
+CACHE_MAX_ENTRIES = env_int('CACHE_MAX_ENTRIES', 1024)
+CACHE_MAX_BYTES = env_int('CACHE_MAX_BYTES', 32 * 1024 * 1024)
+CACHE_PATH = os.environ.get('CACHE_PATH', '/tmp/flask_market_cache.db')
 CACHE_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+PAGE_CACHE_TIMEOUT = env_int('PAGE_CACHE_TIMEOUT', 300)
+# Скільки секунд спільний проксі може віддавати сторінку без перевірки
+PAGE_CACHE_SHARED_MAX_AGE = env_int('PAGE_CACHE_SHARED_MAX_AGE', 30)
+
+# === COMPRESSION ===
+GZIP_ENABLED = os.environ.get('GZIP_ENABLED', 'true').lower() != 'false'
+GZIP_MIN_SIZE = env_int('GZIP_MIN_SIZE', 500)
+GZIP_LEVEL = env_int('GZIP_LEVEL', 6)
+# Потоки великі й довгі — нижчий рівень економить CPU майже без втрат у розмірі
+GZIP_STREAM_LEVEL = env_int('GZIP_STREAM_LEVEL', 1)
+
+# === API DOCS ===
+# on — /apispec.json і Swagger UI (flasgger імпортується лише для генерації спеки), off — вимкнено
+API_DOCS = os.environ.get('API_DOCS', 'on')
+# Готова специфікація з `python apidocs.py build`; якщо файлу немає — генерується при першому запиті
+APISPEC_PATH = os.environ.get('APISPEC_PATH', os.path.join(BASE_DIR, 'apispec.json'))
+
+# === METRICS ===
+# on — /metrics у форматі Prometheus, off — без збору метрик
+METRICS = os.environ.get('METRICS', 'on')
+# Каталог для зведення метрик кількох процесів (serve.py задає його сам)
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', '')
+# Як часто воркер скидає свої лічильники в METRICS_MULTIPROC_DIR, секунд
+METRICS_FLUSH_INTERVAL = env_int('METRICS_FLUSH_INTERVAL', 5)
+
+# === SQL PROFILER (лише для діагностики) ===
+# Server-Timing, попередження про N+1 та журнал повільних запитів з EXPLAIN QUERY PLAN
+SQL_PROFILE = os.environ.get('SQL_PROFILE', 'false').lower() == 'true'
+SQL_SLOW_MS = float(os.environ.get('SQL_SLOW_MS', 100))
+SQL_N_PLUS_ONE = env_int('SQL_N_PLUS_ONE', 5)
+SQL_SLOW_LOG = os.environ.get('SQL_SLOW_LOG', os.path.join(BASE_DIR, 'slow_queries.log'))
 
 # === EMAIL SETTINGS (для сповіщень) ===
 MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
-MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+MAIL_PORT = env_int('MAIL_PORT', 587)
 MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
 MAIL_USERNAME = os.environ.get('MAIL_USERNAME', '')
 MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', '')
@@ -0,0 +1,258 @@
+"""SQLite connection pool shared by the HTML routes and the REST API.
+
+Every thread gets one long-lived connection which is reused across requests.
+``close()`` on a pooled connection only releases it back to the pool, so the
+existing ``conn = get_db_connection() ... conn.close()`` call sites keep
+working while paying the connect/PRAGMA cost once per thread instead of once
+per helper call.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+import config
+
+DB_PATH = config.DATABASE_PATH
+
+# Параметр пулу -> ключ конфігурації (config.py, змінні оточення DB_*)
+OPTION_SETTINGS = {
+    'busy_timeout_ms': 'DB_BUSY_TIMEOUT_MS',
+    'mmap_size': 'DB_MMAP_SIZE',
+    'cache_size_kib': 'DB_CACHE_SIZE_KIB',
+    'max_age': 'DB_POOL_MAX_AGE',
+    'max_uses': 'DB_POOL_MAX_USES',
+    'health_check_interval': 'DB_POOL_HEALTH_CHECK_INTERVAL',
+}
+DEFAULT_OPTIONS = {option: getattr(config, name) for option, name in OPTION_SETTINGS.items()}
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose ``close()`` hands it back to the pool.
+
+    Acquisitions are reference counted, so a model helper that closes its
+    connection in the middle of a request does not roll back the work of
+    the route that is still holding the same connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.refs = 0
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def discard(self):
+        """Really close the underlying sqlite3 handle."""
+        self.pool = None
+        try:
+            super().close()
+        except sqlite3.Error:
+            pass
+
+
+class InstrumentedConnection(PooledConnection):
+    """Pooled connection whose statements all run through ``cursor_class``.
+
+    ``Connection.execute`` in C bypasses the cursor's Python ``execute``,
+    so it is routed through ``cursor()`` explicitly.
+    """
+
+    cursor_class = sqlite3.Cursor
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or self.cursor_class)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def instrument(cursor_mixin):
+    """Layer ``cursor_mixin`` over the cursors of connections opened from now on.
+
+    Used by the SQL profiler and the metrics registry; several mixins stack.
+    """
+    base = ConnectionPool.connection_class
+    if not issubclass(base, InstrumentedConnection):
+        base = InstrumentedConnection
+    if issubclass(base.cursor_class, cursor_mixin):
+        return
+    cursor_class = type(cursor_mixin.__name__, (cursor_mixin, base.cursor_class), {})
+    ConnectionPool.connection_class = type(base.__name__, (base,), {'cursor_class': cursor_class})
+
+
+class ConnectionPool:
+    """Per-thread reusable connections with PRAGMAs, health checks and stats."""
+
+    # Підміняється через instrument() (профайлер SQL, метрики)
+    connection_class = PooledConnection
+
+    def __init__(self, path, **options):
+        self.path = path
+        self.options = dict(DEFAULT_OPTIONS, **options)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._connections = weakref.WeakSet()
+        self._stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats():
+        return {
+            'created': 0,
+            'reused': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'released': 0,
+            'rollbacks_on_release': 0,
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _connect(self):
+        opts = self.options
+        conn = sqlite3.connect(
+            self.path,
+            timeout=opts['busy_timeout_ms'] / 1000.0,
+            factory=self.connection_class,
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+        except sqlite3.DatabaseError:
+            # Наприклад, :memory: або read-only файлова система
+            pass
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f"PRAGMA busy_timeout={int(opts['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA mmap_size={int(opts['mmap_size'])}")
+        conn.execute(f"PRAGMA cache_size=-{int(opts['cache_size_kib'])}")
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.pool = self
+        with self._lock:
+            self._connections.add(conn)
+            self._stats['created'] += 1
+        return conn
+
+    def _is_stale(self, conn, now):
+        opts = self.options
+        if opts['max_age'] and now - conn.created_at > opts['max_age']:
+            return True
+        if opts['max_uses'] and conn.uses >= opts['max_uses']:
+            return True
+        return False
+
+    def _is_healthy(self, conn, now):
+        if now - conn.last_used < self.options['health_check_interval']:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            self._count('health_check_failures')
+            return False
+
+    def _check_fork(self):
+        # Після fork() з'єднання батьківського процесу використовувати не можна,
+        # а його лічильники не повинні потрапити в статистику кожного воркера
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._local = threading.local()
+            with self._lock:
+                self._connections = weakref.WeakSet()
+                self._stats = self._new_stats()
+
+    def acquire(self):
+        """Return this thread's connection, opening or recycling it if needed."""
+        self._check_fork()
+        conn = getattr(self._local, 'conn', None)
+        now = time.monotonic()
+        if conn is not None and conn.refs == 0:
+            if self._is_stale(conn, now) or not self._is_healthy(conn, now):
+                conn.discard()
+                self._count('recycled')
+                conn = None
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        else:
+            self._count('reused')
+        conn.refs += 1
+        conn.uses += 1
+        conn.last_used = now
+        return conn
+
+    def release(self, conn):
+        """Give a connection back; roll back anything left uncommitted."""
+        if conn.refs > 0:
+            conn.refs -= 1
+        if conn.refs == 0:
+            conn.last_used = time.monotonic()
+            if conn.in_transaction:
+                conn.rollback()
+                self._count('rollbacks_on_release')
+        self._count('released')
+
+    def close_all(self):
+        """Close this thread's connection (used on shutdown and in tools)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.discard()
+            self._local.conn = None
+
+    def stats(self):
+        self._check_fork()
+        with self._lock:
+            stats = dict(self._stats)
+            conns = list(self._connections)
+        stats['open'] = sum(1 for c in conns if c.pool is self)
+        stats['in_use'] = sum(1 for c in conns if c.pool is self and c.refs > 0)
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def configure(path, settings=None):
+    """Make ``path`` the default database and take pool options from ``settings``.
+
+    ``create_app`` passes DATABASE_PATH and ``app.config``; pools created
+    before this call keep their options.
+    """
+    global DB_PATH
+    DB_PATH = path
+    if settings:
+        DEFAULT_OPTIONS.update({option: settings[name] for option, name in OPTION_SETTINGS.items()
+                                if name in settings})
+
+
+def get_pool(path=None):
+    """Return the process-wide pool for ``path`` (defaults to DB_PATH)."""
+    path = path or DB_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = _pools[path] = ConnectionPool(path)
+    return pool
+
+
+def get_connection(path=None):
+    """Acquire a pooled connection; call ``close()`` to release it."""
+    return get_pool(path).acquire()
@@ -0,0 +1,128 @@
+"""Streaming CSV / NDJSON / JSON-array exports straight from a SQLite cursor.
+
+Rows are pulled from the cursor one at a time, encoded into a small buffer
+and yielded in ~64 KB chunks, so an export of millions of rows runs in
+constant memory. Optional gzip compression is applied on the fly.
+"""
+
+import csv
+import io
+import zlib
+from contextlib import closing
+
+from flask import Response, stream_with_context
+
+from jsonout import dumps, iter_json_array
+from models import get_db_connection
+
+CHUNK_SIZE = 64 * 1024
+
+# name -> (SELECT ... WHERE 1=1, date column or None, ORDER BY)
+EXPORTS = {
+    # Один рядок на позицію замовлення — формат для бухгалтерії
+    'orders': ('''
+        SELECT o.id AS order_id, o.created_at, o.status,
+               c.name AS customer_name, c.email AS customer_email,
+               o.promo_code, o.discount_amount,
+               oi.product_id, p.name AS product_name, oi.quantity, oi.price,
+               oi.price * oi.quantity AS line_total
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN customers c ON c.id = o.customer_id
+        LEFT JOIN products p ON p.id = oi.product_id
+        WHERE 1=1
+    ''', 'o.created_at', 'o.created_at, o.id, oi.id'),
+    'customers': ('SELECT id, name, email, phone FROM customers WHERE 1=1', None, 'id'),
+    'products': ('SELECT id, name, description, price, stock, category FROM products WHERE 1=1',
+                 None, 'id'),
+    'feedback': ('SELECT id, name, email, message, created_at FROM feedback WHERE 1=1',
+                 'created_at', 'id'),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def export_query(name, date_from=None, date_to=None):
+    """Return ``(sql, params)`` for an export; dates are inclusive ISO days."""
+    sql, date_column, order_by = EXPORTS[name]
+    params = []
+    if date_column and date_from:
+        sql += f' AND {date_column} >= ?'
+        params.append(date_from)
+    if date_column and date_to:
+        sql += f" AND {date_column} < date(?, '+1 day')"
+        params.append(date_to)
+    return sql + f' ORDER BY {order_by}', params
+
+
+def _csv_chunks(columns, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= CHUNK_SIZE:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(columns, rows):
+    parts, size = [], 0
+    for row in rows:
+        line = dumps(dict(zip(columns, row))) + b'\n'
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b''.join(parts)
+
+
+def _json_chunks(columns, rows):
+    yield from iter_json_array(dict(zip(columns, row)) for row in rows)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte-chunk stream into a gzip stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(name, fmt='csv', date_from=None, date_to=None, gzip=False):
+    """Generator of encoded export chunks; owns its pooled connection."""
+    sql, params = export_query(name, date_from, date_to)
+    encode = {'csv': _csv_chunks, 'ndjson': _ndjson_chunks, 'json': _json_chunks}[fmt]
+
+    def generate():
+        with closing(get_db_connection()) as conn:
+            cur = conn.cursor()
+            cur.row_factory = None  # кортежі — без sqlite3.Row на кожен рядок
+            cur.execute(sql, params)
+            columns = [d[0] for d in cur.description]
+            yield from encode(columns, cur)
+
+    return gzip_chunks(generate()) if gzip else generate()
+
+
+def export_response(name, fmt='csv', date_from=None, date_to=None, gzip=False, attachment=True):
+    """Flask streaming response for an export (chunked, constant memory)."""
+    chunks = stream_export(name, fmt, date_from, date_to, gzip)
+    mimetype = 'application/gzip' if gzip else FORMATS[fmt]
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if attachment or gzip:
+        filename = f'{name}.{fmt}' + ('.gz' if gzip else '')
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,133 @@
+"""``Idempotency-Key`` support for POST endpoints.
+
+The first request with a key claims it in ``idempotency_keys`` (a plain
+INSERT that only one process can win), runs the view and stores the response
+status and body. Repeats within the TTL are answered from that row without
+running the view again; a duplicate that arrives while the first is still
+running waits for it instead of racing it. Reusing a key with a different
+payload is rejected with 422.
+
+Failed requests (5xx or an exception) release the key so the client can
+retry. The table is bounded by TTL expiry plus a cap on the number of rows.
+"""
+
+import functools
+import hashlib
+import random
+import time
+from contextlib import closing
+
+from flask import current_app, jsonify, make_response, request
+
+from config import setting
+from models import get_db_connection
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+# Частка запитів, що заодно чистять прострочені ключі
+PURGE_PROBABILITY = 0.01
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode() + b' ' + request.path.encode() + b'\n')
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def purge_expired(conn, now=None, max_keys=None):
+    """Delete expired keys, then the oldest ones above ``max_keys``."""
+    now = now or time.time()
+    max_keys = max_keys or setting('IDEMPOTENCY_MAX_KEYS')
+    deleted = conn.execute('DELETE FROM idempotency_keys WHERE expires_at < ?', (now,)).rowcount
+    deleted += conn.execute('''
+        DELETE FROM idempotency_keys WHERE rowid IN (
+            SELECT rowid FROM idempotency_keys ORDER BY created_at DESC LIMIT -1 OFFSET ?
+        )''', (max_keys,)).rowcount
+    conn.commit()
+    return deleted
+
+
+def _claim(conn, endpoint, key, fingerprint):
+    """Try to take the key; True if this request now owns it."""
+    now = time.time()
+    if random.random() < PURGE_PROBABILITY:
+        purge_expired(conn, now)
+    # Прострочений ключ або покинутий власником — можна використати заново
+    conn.execute('DELETE FROM idempotency_keys WHERE endpoint = ? AND key = ? '
+                 'AND (expires_at < ? OR (status IS NULL AND locked_until < ?))',
+                 (endpoint, key, now, now))
+    cur = conn.execute('''
+        INSERT INTO idempotency_keys
+            (endpoint, key, request_hash, created_at, locked_until, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(endpoint, key) DO NOTHING
+    ''', (endpoint, key, fingerprint, now,
+          now + setting('IDEMPOTENCY_LOCK_TIMEOUT'), now + setting('IDEMPOTENCY_TTL')))
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def _lookup(conn, endpoint, key):
+    return conn.execute('SELECT request_hash, status, content_type, body FROM idempotency_keys '
+                        'WHERE endpoint = ? AND key = ?', (endpoint, key)).fetchone()
+
+
+def _store(conn, endpoint, key, response):
+    conn.execute('UPDATE idempotency_keys SET status = ?, content_type = ?, body = ? '
+                 'WHERE endpoint = ? AND key = ?',
+                 (response.status_code, response.content_type, response.get_data(), endpoint, key))
+    conn.commit()
+
+
+def _release(conn, endpoint, key):
+    conn.execute('DELETE FROM idempotency_keys WHERE endpoint = ? AND key = ? AND status IS NULL',
+                 (endpoint, key))
+    conn.commit()
+
+
+def _replay(row):
+    response = current_app.response_class(row['body'], status=row['status'],
+                                          content_type=row['content_type'])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Make a POST view safe to retry with an ``Idempotency-Key`` header."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} is too long (max {MAX_KEY_LENGTH})'}), 400
+        endpoint = request.endpoint
+        fingerprint = request_fingerprint()
+
+        with closing(get_db_connection()) as conn:
+            deadline = time.monotonic() + setting('IDEMPOTENCY_WAIT')
+            while not _claim(conn, endpoint, key, fingerprint):
+                row = _lookup(conn, endpoint, key)
+                if row is None:
+                    continue  # власник щойно звільнив ключ — пробуємо ще раз
+                if row['request_hash'] != fingerprint:
+                    return jsonify({'error': f'{HEADER} was already used with a different request'}), 422
+                if row['status'] is not None:
+                    return _replay(row)
+                if time.monotonic() >= deadline:
+                    return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+                time.sleep(POLL_INTERVAL)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                _release(conn, endpoint, key)
+                raise
+            if response.status_code >= 500:
+                _release(conn, endpoint, key)
+            else:
+                _store(conn, endpoint, key, response)
+            return response
+    return wrapper
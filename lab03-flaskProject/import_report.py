@@ -0,0 +1,123 @@
+"""Cold-start report: what importing and building the app costs.
+
+Runs ``python -X importtime`` in a fresh interpreter that imports ``app``
+and calls ``create_app()``, then groups the per-module timings into project
+modules, third-party packages and the standard library.
+
+    flask --app app import-report            # таблиця
+    flask --app app import-report --json     # для збереження / порівняння
+    flask --app app import-report --budget-ms 400   # код 1, якщо повільніше
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+import click
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ImportEntry = namedtuple('ImportEntry', ['module', 'self_us', 'cumulative_us', 'depth'])
+
+_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+built = time.perf_counter()
+print(json.dumps({"import_s": imported - started, "create_app_s": built - imported}))
+'''
+
+
+def project_modules():
+    return {name[:-3] for name in os.listdir(BASE_DIR) if name.endswith('.py')} | {'migrations'}
+
+
+def parse_importtime(text):
+    """Parse ``-X importtime`` stderr into :class:`ImportEntry` rows."""
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip()
+        entries.append(ImportEntry(stripped, int(self_us), int(cumulative_us),
+                                   (len(name) - len(stripped) - 1) // 2))
+    return entries
+
+
+def measure(env=None):
+    """Run the probe in a fresh interpreter; return (timings, entries)."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE],
+                          cwd=BASE_DIR, env={**os.environ, **(env or {})},
+                          capture_output=True, text=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else 'probe failed')
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(proc.stderr)
+
+
+def summarize(entries, top=15):
+    """Group timings: project modules by own time, packages by subtree time."""
+    ours = project_modules()
+    stdlib = set(sys.stdlib_module_names)
+    project, third_party, std = {}, {}, {}
+    for entry in entries:
+        root = entry.module.split('.', 1)[0]
+        if root in ours:
+            project[entry.module] = project.get(entry.module, 0) + entry.self_us
+        elif entry.module == root:
+            # Пакет верхнього рівня: сумарний час разом з усім, що він підтягнув
+            target = std if root in stdlib or root.startswith('_') else third_party
+            target[root] = target.get(root, 0) + entry.cumulative_us
+    total = sum(e.cumulative_us for e in entries if e.depth == 0)
+
+    def ranked(groups):
+        return [(name, round(us / 1000, 1)) for name, us in
+                sorted(groups.items(), key=lambda item: item[1], reverse=True)[:top]]
+
+    return {
+        'total_import_ms': round(total / 1000, 1),
+        'project_self_ms': round(sum(project.values()) / 1000, 1),
+        'project': ranked(project),
+        'third_party': ranked(third_party),
+        'stdlib': ranked(std),
+    }
+
+
+@click.command('import-report')
+@click.option('--top', default=15, show_default=True, help='Скільки модулів показати в кожній групі.')
+@click.option('--json', 'as_json', is_flag=True, help='Вивести звіт як JSON.')
+@click.option('--budget-ms', type=float, default=None,
+              help='Завершитись з кодом 1, якщо імпорт + create_app() довші за це.')
+def import_report_command(top, as_json, budget_ms):
+    """Звіт про час холодного старту (python -X importtime)."""
+    timings, entries = measure()
+    report = summarize(entries, top)
+    report['import_s'] = round(timings['import_s'], 3)
+    report['create_app_s'] = round(timings['create_app_s'], 3)
+    startup_ms = (timings['import_s'] + timings['create_app_s']) * 1000
+
+    if as_json:
+        click.echo(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        click.echo(f"Імпорт app: {report['import_s']:.3f} с, create_app(): {report['create_app_s']:.3f} с "
+                   f"(усі модулі -X importtime: {report['total_import_ms']} мс, "
+                   f"власний код: {report['project_self_ms']} мс)")
+        for title, key in (('Модулі проєкту (власний час, мс)', 'project'),
+                           ('Сторонні пакети (з залежностями, мс)', 'third_party'),
+                           ('Стандартна бібліотека (з залежностями, мс)', 'stdlib')):
+            click.echo(f'\n{title}:')
+            for name, ms in report[key]:
+                click.echo(f'  {ms:>8.1f}  {name}')
+
+    if budget_ms is not None and startup_ms > budget_ms:
+        click.echo(f'❌ Старт {startup_ms:.0f} мс перевищує бюджет {budget_ms:.0f} мс', err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    import_report_command()
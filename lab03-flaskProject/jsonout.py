@@ -0,0 +1,109 @@
+"""Fast JSON encoding for API responses.
+
+* ``dumps`` returns UTF-8 bytes, using ``orjson`` when it is installed
+  (several times faster than the stdlib encoder) and ``json`` otherwise.
+* ``FastJSONProvider`` plugs that into Flask, so every ``jsonify`` call in
+  ``api_bp`` goes through it without touching the handlers. It honours
+  ``sort_keys`` (on by default, as in Flask), so key order in responses
+  stays the same as with the stock provider.
+* ``row_dicts`` reads tuple rows and zips them with column names looked up
+  once per cursor, instead of building a ``sqlite3.Row`` and then a dict;
+  ``pagination.fetch_page`` builds every API list page this way.
+* ``iter_json_array`` / ``stream_json`` encode a ``[...]`` array item by
+  item into ~64 KB chunks, so large results go out with chunked transfer
+  and never exist as one big string.
+"""
+
+import json
+
+from flask import Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # необов'язкова залежність: pip install orjson
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+
+_provider_default = DefaultJSONProvider.default
+
+if orjson is not None:
+    # Дати — як у Flask (HTTP-date), а не ISO, щоб формат не залежав від orjson
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(obj, sort_keys=False):
+    """Encode ``obj`` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        option = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        try:
+            return orjson.dumps(obj, default=_provider_default, option=option)
+        except TypeError:
+            pass  # напр. нерядкові ключі словника — stdlib їх перетворює
+    return json.dumps(obj, default=_provider_default, ensure_ascii=False,
+                      separators=(',', ':'), sort_keys=sort_keys).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by :func:`dumps`."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - {'separators', 'sort_keys'}:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, self.sort_keys) + b'\n', mimetype=self.mimetype)
+
+
+def row_dicts(cursor):
+    """Yield dicts from a cursor of plain tuples, column names cached once."""
+    columns = tuple(d[0] for d in cursor.description)
+    for row in cursor:
+        yield dict(zip(columns, row))
+
+
+def iter_json_array(items, chunk_size=CHUNK_SIZE, sort_keys=False):
+    """Encode an iterable as a JSON array, yielding byte chunks."""
+    parts, size = [b'['], 1
+    first = True
+    for item in items:
+        encoded = dumps(item, sort_keys)
+        if not first:
+            parts.append(b',')
+        first = False
+        parts.append(encoded)
+        size += len(encoded) + 1
+        if size >= chunk_size:
+            yield b''.join(parts)
+            parts, size = [], 0
+    parts.append(b']')
+    yield b''.join(parts)
+
+
+def stream_json(items, head=None, tail=None, status=200):
+    """Chunked ``application/json`` response for a large array.
+
+    With ``head`` / ``tail`` (dicts) the array is wrapped in an envelope:
+    ``{**head, "data": [...], **tail}``. Items and envelope parts follow the
+    app's ``json.sort_keys`` like ``jsonify`` does.
+    """
+    sort_keys = current_app.json.sort_keys
+
+    def generate():
+        if head is None and tail is None:
+            yield from iter_json_array(items, sort_keys=sort_keys)
+            return
+        prefix = dumps(head or {}, sort_keys)[:-1]
+        yield prefix + (b',' if len(prefix) > 1 else b'') + b'"data":'
+        yield from iter_json_array(items, sort_keys=sort_keys)
+        suffix = dumps(tail or {}, sort_keys)[1:]
+        yield (b',' + suffix) if len(suffix) > 1 else b'}'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
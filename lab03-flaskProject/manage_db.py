@@ -3,12 +3,13 @@
 Скрипт для міграції та управління базою даних
 """
 
+import os
 import sqlite3
 import sys
 from pathlib import Path
 from datetime import datetime
 
-DB_PATH = Path(__file__).parent / 'site.db'
+DB_PATH = Path(os.environ.get('DATABASE_PATH', Path(__file__).parent / 'site.db'))
 
 def backup_database():
     """Створити резервну копію БД"""
@@ -29,10 +30,12 @@ def backup_database():
 def init_database():
     """Ініціалізувати БД"""
     from models import initialize_db
+    from migrations import apply_migrations
     
     try:
         conn = sqlite3.connect(str(DB_PATH))
         initialize_db(conn)
+        apply_migrations(conn)
         conn.close()
         print("✓ База даних ініціалізована")
         return True
@@ -58,7 +61,9 @@ def check_database():
         """)
         tables = cursor.fetchall()
         
+        from migrations import current_version, pending
         print("✓ База даних цілісна")
+        print(f"Версія схеми: {current_version(conn)} (очікують: {len(pending(conn))})")
         print(f"\nТаблиці ({len(tables)}):")
         
         for (table,) in tables:
@@ -72,6 +77,194 @@ def check_database():
         print(f"❌ Помилка: {e}")
         return False
 
+def _print_plans(title, plans):
+    print(f"\n{title}")
+    for label, lines in plans:
+        print(f"  {label}:")
+        for line in lines:
+            print(f"      {line}")
+
+
+def migrate_database(plan=False):
+    """Застосувати міграції з каталогу migrations/ (або показати план)"""
+    from models import initialize_db
+    from migrations import apply_migrations, plan_migrations, current_version
+    
+    try:
+        conn = sqlite3.connect(str(DB_PATH))
+        initialize_db(conn)
+        if plan:
+            todo, before, after = plan_migrations(conn)
+            print(f"Поточна версія схеми: {current_version(conn)}")
+            print(f"Міграцій до застосування: {len(todo)}")
+            for version, name, _ in todo:
+                print(f"  - {version:04d} {name}")
+            _print_plans("EXPLAIN QUERY PLAN до міграцій:", before)
+            _print_plans("EXPLAIN QUERY PLAN після міграцій:", after)
+            conn.close()
+            return True
+        applied = apply_migrations(
+            conn, log=lambda version, name: print(f"✓ {version:04d} {name}")
+        )
+        if not applied:
+            print("✓ Схема вже актуальна")
+        print(f"Версія схеми: {current_version(conn)}")
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"❌ Помилка міграції: {e}")
+        return False
+
+def rebuild_search_index():
+    """Перебудувати повнотекстовий індекс товарів"""
+    from models import rebuild_search_index as rebuild
+    
+    if not DB_PATH.exists():
+        print("❌ База даних не існує")
+        return False
+    
+    try:
+        conn = sqlite3.connect(str(DB_PATH))
+        rebuild(conn)
+        count = conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+        conn.close()
+        print(f"✓ Пошуковий індекс перебудовано ({count} товарів)")
+        return True
+    except Exception as e:
+        print(f"❌ Помилка: {e}")
+        return False
+
+def rebuild_aggregates():
+    """Перерахувати зведені таблиці продажів з orders / order_items"""
+    from stats import rebuild_aggregates as rebuild
+    
+    if not DB_PATH.exists():
+        print("❌ База даних не існує")
+        return False
+    
+    try:
+        conn = sqlite3.connect(str(DB_PATH))
+        counts = rebuild(conn)
+        conn.close()
+        print("✓ Агрегати перераховано")
+        for table, count in counts.items():
+            print(f"  - {table}: {count} рядків")
+        return True
+    except Exception as e:
+        print(f"❌ Помилка: {e}")
+        return False
+
+def compact_change_log(retention_days):
+    """Стиснути журнал змін (/api/changes): прибрати застарілі й старі записи"""
+    from changes import compact_changes
+    
+    if not DB_PATH.exists():
+        print("❌ База даних не існує")
+        return False
+    
+    try:
+        conn = sqlite3.connect(str(DB_PATH))
+        result = compact_changes(conn, retention_days)
+        conn.close()
+        print("✓ Журнал змін стиснуто")
+        print(f"  - перекрито новішими змінами: {result.superseded}")
+        print(f"  - старші за {retention_days} днів: {result.pruned}")
+        print(f"  - залишилось записів: {result.remaining} (межа seq: {result.pruned_through})")
+        return True
+    except Exception as e:
+        print(f"❌ Помилка: {e}")
+        return False
+
+def _print_import_result(result):
+    from bulk import rate
+    print(f"  Рядків прочитано: {result.rows}, записано: {result.written}, помилок: {len(result.errors)}")
+    print(f"  Час: {result.elapsed:.2f} с ({rate(result):.0f} рядків/с)")
+    for line, message in result.errors[:20]:
+        print(f"  ✗ рядок {line}: {message}")
+    if len(result.errors) > 20:
+        print(f"  ... ще {len(result.errors) - 20} помилок")
+
+
+def _bulk_connection():
+    from models import initialize_db
+    from migrations import apply_migrations
+    
+    conn = sqlite3.connect(str(DB_PATH))
+    conn.row_factory = sqlite3.Row
+    initialize_db(conn)
+    apply_migrations(conn)
+    # Масове завантаження: менше fsync, більше кешу
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA cache_size=-65536')
+    return conn
+
+
+def import_products_file(path, chunk_size):
+    """Імпорт товарів з CSV (upsert за sku / id)"""
+    from bulk import import_products
+    
+    last = [0.0]
+    
+    def progress(rows, written, elapsed):
+        if elapsed - last[0] >= 1.0:
+            last[0] = elapsed
+            print(f"  ... {rows} рядків, {rows / elapsed:.0f} рядків/с", flush=True)
+    
+    try:
+        conn = _bulk_connection()
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            result = import_products(conn, fh, chunk_size=chunk_size, progress=progress)
+        conn.close()
+        print("✓ Імпорт завершено")
+        _print_import_result(result)
+        return True
+    except Exception as e:
+        print(f"❌ Помилка імпорту: {e}")
+        return False
+
+
+def update_products_file(path):
+    """Оновити залишки / ціни з CSV (id або sku + stock / price)"""
+    from bulk import update_from_csv
+    
+    try:
+        conn = _bulk_connection()
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            result = update_from_csv(conn, fh)
+        conn.close()
+        print("✓ Оновлення завершено")
+        _print_import_result(result)
+        return True
+    except Exception as e:
+        print(f"❌ Помилка оновлення: {e}")
+        return False
+
+
+def reprice_products(percent, category=None):
+    """Змінити ціни на percent % (для категорії або всіх товарів)"""
+    from bulk import reprice
+    
+    try:
+        conn = _bulk_connection()
+        changed = reprice(conn, percent, category)
+        conn.close()
+        target = f"категорії '{category}'" if category else "усіх товарів"
+        print(f"✓ Ціни {target} змінено на {percent:+g}% ({changed} товарів)")
+        return True
+    except Exception as e:
+        print(f"❌ Помилка: {e}")
+        return False
+
+
+def _option(args, name, default=None):
+    if name in args:
+        i = args.index(name)
+        if i + 1 < len(args):
+            return args[i + 1]
+    return default
+
+
 def migrate_to_postgresql():
     """Вказівка на міграцію на PostgreSQL"""
     print("""
@@ -127,6 +320,13 @@ def main():
       backup      - Створити резервну копію
       check       - Перевірити цілісність БД
       vacuum      - Оптимізувати БД
+      migrate     - Застосувати міграції схеми (--plan: показати EXPLAIN QUERY PLAN)
+      rebuild-search - Перебудувати повнотекстовий індекс товарів
+      rebuild-aggregates - Перерахувати зведені таблиці продажів
+      import-products <file.csv> [--chunk N] - Імпорт товарів з CSV
+      update-products <file.csv> - Оновити stock / price з CSV за id або sku
+      reprice <percent> [--category X] - Змінити ціни, напр. reprice -15 --category Аудіо
+      compact-changes [--days N] - Стиснути журнал змін /api/changes (типово 30 днів)
       migrate-pg  - Вказівка на міграцію на PostgreSQL
     """)
         return 1
@@ -141,6 +341,40 @@ def main():
         return 0 if check_database() else 1
     elif command == 'vacuum':
         return 0 if vacuum_database() else 1
+    elif command == 'migrate':
+        return 0 if migrate_database(plan='--plan' in sys.argv[2:]) else 1
+    elif command == 'rebuild-search':
+        return 0 if rebuild_search_index() else 1
+    elif command == 'rebuild-aggregates':
+        return 0 if rebuild_aggregates() else 1
+    elif command == 'compact-changes':
+        from changes import DEFAULT_RETENTION_DAYS
+        try:
+            days = int(_option(sys.argv[2:], '--days', DEFAULT_RETENTION_DAYS))
+        except ValueError:
+            print("❌ --days має бути числом")
+            return 1
+        return 0 if compact_change_log(days) else 1
+    elif command in ('import-products', 'update-products', 'reprice'):
+        args = sys.argv[2:]
+        if not args:
+            print(f"❌ Використання: python manage_db.py {command} <аргумент>")
+            return 1
+        if command == 'import-products':
+            try:
+                chunk = int(_option(args, '--chunk', 1000))
+            except ValueError:
+                print("❌ --chunk має бути числом")
+                return 1
+            return 0 if import_products_file(args[0], chunk) else 1
+        if command == 'update-products':
+            return 0 if update_products_file(args[0]) else 1
+        try:
+            percent = float(args[0])
+        except ValueError:
+            print("❌ Відсоток має бути числом, напр. -15")
+            return 1
+        return 0 if reprice_products(percent, _option(args, '--category')) else 1
     elif command == 'migrate-pg':
         migrate_to_postgresql()
         return 0
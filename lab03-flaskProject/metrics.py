@@ -0,0 +1,460 @@
+"""Prometheus-compatible metrics at ``/metrics``, no client library needed.
+
+Recording is lock-free: every thread writes only to its own shard (plain
+dicts), so the hot path is a thread-local lookup and a dict update under the
+GIL. A scrape sums the shards. Recorded per Flask endpoint, method and
+status: request count, latency histogram, requests in flight, and SQL
+statements per request; plus query durations by operation, pool and cache
+counters (cache hit ratio is derived from the summed hits and misses).
+
+Several processes (gunicorn workers): set ``METRICS_MULTIPROC_DIR`` —
+``serve.py`` does it automatically. Each worker then writes a snapshot of
+its totals to ``<dir>/metrics-<pid>.json`` every ``METRICS_FLUSH_INTERVAL``
+seconds, and whichever worker answers the scrape merges all files. Counters
+and histograms of exited workers are folded into ``archive.json`` so totals
+never go backwards; gauges are only taken from live processes.
+"""
+
+import bisect
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import current_app, g, request
+
+import config
+import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: без блокування, архів не ведеться
+    fcntl = None
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+QUERIES_PER_REQUEST_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Ендпоінт для запитів, що не збіглися з жодним маршрутом (обмежує кардинальність)
+UNMATCHED = '<unmatched>'
+
+ARCHIVE_NAME = 'archive.json'
+
+
+class Metric:
+    """A metric family; values live in the registry's shards."""
+
+    def __init__(self, registry, kind, name, documentation, labelnames=(), buckets=None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+
+    def inc(self, *labels, amount=1):
+        values = self.registry.shard().values
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def observe(self, value, *labels):
+        values = self.registry.shard().values
+        key = (self.name, labels)
+        counts = values.get(key)
+        if counts is None:
+            # Лічильники по кошиках (не кумулятивні), останні два — сума і кількість
+            counts = values[key] = [0] * (len(self.buckets) + 3)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+
+class _Shard:
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values = {}
+
+
+class Registry:
+    """Metric families, per-thread shards and (optionally) per-process files."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.multiproc_dir = None
+        self.flush_interval = config.METRICS_FLUSH_INTERVAL
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Після fork воркер починає з нуля: дані майстра не його
+        self._local = threading.local()
+        self._shards = []
+        self._flusher = None
+        self._dead = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Metric(self, 'counter', name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Metric(self, 'gauge', name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Metric(self, 'histogram', name, documentation, labelnames, buckets))
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collector(self, func):
+        """Register ``func() -> [(name, labels, value), ...]`` read at snapshot time."""
+        self.collectors.append(func)
+        return func
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def snapshot(self):
+        """This process's totals: ``{(name, labels): value}``."""
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            # dict.copy() атомарний під GIL, тож потік-власник може писати далі
+            for key, value in shard.values.copy().items():
+                _merge_value(totals, key, value)
+        for func in self.collectors:
+            for name, labels, value in func():
+                totals[(name, labels)] = value
+        return totals
+
+    # --- кілька процесів ---------------------------------------------------
+
+    def _process_path(self, pid=None):
+        return os.path.join(self.multiproc_dir, f'metrics-{pid or os.getpid()}.json')
+
+    def flush(self, gauges=True):
+        if not self.multiproc_dir:
+            return
+        with self._flush_lock:
+            # Після mark_process_dead файл процесу вже в архіві — не відтворюємо його
+            if not self._dead:
+                _write_json(self._process_path(), _encode(self._filtered(self.snapshot(), gauges)))
+
+    def _filtered(self, totals, gauges):
+        if gauges:
+            return totals
+        return {key: value for key, value in totals.items()
+                if getattr(self.metrics.get(key[0]), 'kind', None) != 'gauge'}
+
+    def start_flusher(self):
+        """Start this process's periodic snapshot writer (once per process)."""
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def mark_process_dead(self):
+        """Fold this process's counters into the archive and drop its file."""
+        if not self.multiproc_dir:
+            return
+        if fcntl is None:
+            self.flush(gauges=False)
+            return
+        with self._flush_lock:
+            self._dead = True
+        final = self._filtered(self.snapshot(), gauges=False)
+        with self._dir_lock(fcntl.LOCK_EX if fcntl else None):
+            archive_path = os.path.join(self.multiproc_dir, ARCHIVE_NAME)
+            archive = _decode(_read_json(archive_path))
+            for key, value in final.items():
+                _merge_value(archive, key, value)
+            _write_json(archive_path, _encode(archive))
+            try:
+                os.remove(self._process_path())
+            except OSError:
+                pass
+
+    def collect(self):
+        """Totals across every process sharing ``multiproc_dir`` (or just this one)."""
+        if not self.multiproc_dir:
+            return self.snapshot()
+        self.flush()
+        totals = {}
+        # Під спільним блокуванням: воркер, що завершується, не перенесе свій
+        # файл в архів посеред читання (інакше його лічильники порахуються двічі)
+        with self._dir_lock(fcntl.LOCK_SH if fcntl else None):
+            files = [(path, _read_json(path))
+                     for path in glob.glob(os.path.join(self.multiproc_dir, '*.json'))]
+        for path, entries in files:
+            name = os.path.basename(path)
+            pid = name[len('metrics-'):-len('.json')] if name.startswith('metrics-') else None
+            alive = pid is not None and _pid_alive(int(pid))
+            for key, value in _decode(entries).items():
+                metric = self.metrics.get(key[0])
+                if metric is not None and metric.kind == 'gauge' and not alive:
+                    continue
+                _merge_value(totals, key, value)
+        return totals
+
+    @contextlib.contextmanager
+    def _dir_lock(self, mode):
+        if mode is None:
+            yield
+            return
+        with open(os.path.join(self.multiproc_dir, '.lock'), 'a') as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def clear_multiproc_dir(self):
+        """Remove files of a previous run (call in the master before forking)."""
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(self.multiproc_dir, '*.json')):
+            os.remove(path)
+
+    # --- текстовий формат ----------------------------------------------------
+
+    def exposition(self, totals):
+        by_name = {}
+        for (name, labels), value in totals.items():
+            by_name.setdefault(name, []).append((labels, value))
+        lines = []
+        for metric in self.metrics.values():
+            samples = sorted(by_name.get(metric.name, ()), key=lambda item: item[0])
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for labels, value in samples:
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind != 'histogram':
+                    lines.append(f'{metric.name}{_labels(pairs)} {value}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else str(bound)
+                    lines.append(f'{metric.name}_bucket{_labels(pairs + [("le", le)])} {cumulative}')
+                lines.append(f'{metric.name}_sum{_labels(pairs)} {value[-2]}')
+                lines.append(f'{metric.name}_count{_labels(pairs)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_value(totals, key, value):
+    current = totals.get(key)
+    if current is None:
+        totals[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        totals[key] = [a + b for a, b in zip(current, value)]
+    else:
+        totals[key] = current + value
+
+
+def _encode(totals):
+    return [[name, list(labels), value] for (name, labels), value in totals.items()]
+
+
+def _decode(entries):
+    return {(name, tuple(labels)): value for name, labels, value in entries}
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return []
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'flask_http_requests_total', 'HTTP requests by endpoint, method and status.',
+    ('endpoint', 'method', 'status'))
+http_latency = registry.histogram(
+    'flask_http_request_duration_seconds', 'Time to build the response, by endpoint and method.',
+    ('endpoint', 'method'))
+http_in_flight = registry.gauge(
+    'flask_http_requests_in_flight', 'Requests currently being handled.')
+db_queries_per_request = registry.histogram(
+    'flask_db_queries_per_request', 'SQL statements executed per request, by endpoint.',
+    ('endpoint',), QUERIES_PER_REQUEST_BUCKETS)
+db_query_latency = registry.histogram(
+    'flask_db_query_duration_seconds', 'SQL statement execution time, by operation.',
+    ('operation',), QUERY_BUCKETS)
+
+registry.counter('flask_db_pool_events_total', 'Connection pool events.', ('event',))
+registry.gauge('flask_db_pool_connections', 'Pooled connections by state.', ('state',))
+registry.counter('flask_cache_events_total', 'Query/page cache events.', ('event',))
+registry.gauge('flask_cache_entries', 'Entries in the query/page cache.')
+
+_request_local = threading.local()
+
+
+class QueryMetricsCursor:
+    """Cursor mixin that times statements into the registry."""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - started)
+
+
+def _record_query(sql, elapsed):
+    words = sql.split(None, 1)
+    operation = words[0].lower() if words else 'other'
+    if operation not in ('select', 'insert', 'update', 'delete', 'with'):
+        operation = 'other'
+    db_query_latency.observe(elapsed, operation)
+    _request_local.queries = getattr(_request_local, 'queries', 0) + 1
+
+
+@registry.collector
+def _pool_samples():
+    stats = db.get_pool().stats()
+    samples = [('flask_db_pool_events_total', (event,), stats[event])
+               for event in ('created', 'reused', 'recycled', 'health_check_failures',
+                             'released', 'rollbacks_on_release')]
+    samples += [('flask_db_pool_connections', ('open',), stats['open']),
+                ('flask_db_pool_connections', ('in_use',), stats['in_use'])]
+    return samples
+
+
+@registry.collector
+def _cache_samples():
+    from cache import query_cache
+
+    info = query_cache.info()
+    samples = [('flask_cache_events_total', (event,), info[event])
+               for event in ('hits', 'misses', 'sets', 'evictions', 'expirations', 'invalidations')]
+    if query_cache.backend is not None and query_cache.backend.name == 'memory':
+        # Спільний sqlite-кеш рахувати в кожному процесі не можна — вийде N разів
+        samples.append(('flask_cache_entries', (), info['entries']))
+    return samples
+
+
+def _derived_lines(totals):
+    hits = totals.get(('flask_cache_events_total', ('hits',)), 0)
+    misses = totals.get(('flask_cache_events_total', ('misses',)), 0)
+    ratio = hits / (hits + misses) if hits + misses else 0.0
+    return [
+        '# HELP flask_cache_hit_ratio Cache hits / lookups across all processes.',
+        '# TYPE flask_cache_hit_ratio gauge',
+        f'flask_cache_hit_ratio {ratio:.4f}',
+    ]
+
+
+def _endpoint():
+    return request.endpoint if request.url_rule is not None else UNMATCHED
+
+
+def _before_request():
+    registry.start_flusher()
+    http_in_flight.inc()
+    _request_local.queries = 0
+    g._metrics_started = time.perf_counter()
+
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(error=None):
+    started = g.pop('_metrics_started', None)
+    if started is None:
+        return
+    http_in_flight.dec()
+    endpoint = _endpoint()
+    status = g.pop('_metrics_status', 500 if error is not None else 200)
+    http_requests.inc(endpoint, request.method, str(status))
+    http_latency.observe(time.perf_counter() - started, endpoint, request.method)
+    db_queries_per_request.observe(getattr(_request_local, 'queries', 0), endpoint)
+
+
+def metrics_view():
+    totals = registry.collect()
+    body = registry.exposition(totals) + '\n'.join(_derived_lines(totals)) + '\n'
+    response = current_app.response_class(body, content_type=CONTENT_TYPE)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def init_metrics(app):
+    """Record request/DB metrics for ``app`` and serve them at ``/metrics``."""
+    registry.multiproc_dir = app.config.get('METRICS_MULTIPROC_DIR') or None
+    registry.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', registry.flush_interval)
+    if registry.multiproc_dir:
+        os.makedirs(registry.multiproc_dir, exist_ok=True)
+    db.instrument(QueryMetricsCursor)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return app
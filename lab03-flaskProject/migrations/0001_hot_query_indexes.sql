@@ -0,0 +1,20 @@
+-- Індекси для гарячих запитів: кошик, оформлення замовлення, адмінка.
+
+-- Позиції замовлення (admin_orders, get_order_details); покриває SUM(price*quantity)
+CREATE INDEX IF NOT EXISTS idx_order_items_order
+    ON order_items(order_id, product_id, quantity, price);
+
+-- Пошук клієнта при оформленні замовлення
+CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email);
+
+-- Списки замовлень, відсортовані за часом, та фільтр за статусом
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created_at ON orders(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id);
+
+-- Фільтр min_price / max_price у /market
+CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
+
+-- Перевірка промокоду без звернення до таблиці
+CREATE INDEX IF NOT EXISTS idx_promo_codes_code_active
+    ON promo_codes(code, active, discount_percent);
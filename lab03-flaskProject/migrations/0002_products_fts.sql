@@ -0,0 +1,34 @@
+-- Повнотекстовий пошук по товарах (FTS5, external content = products).
+-- unicode61 коректно приводить кирилицю до нижнього регістру; діакритику
+-- не прибираємо, щоб "й" / "ї" не зливалися з "и" / "і".
+
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    description,
+    category,
+    content='products',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 0',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name, description, category)
+    VALUES (new.id, new.name, new.description, new.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, description, category)
+    VALUES ('delete', old.id, old.name, old.description, old.category);
+END;
+
+-- Лише коли змінюються проіндексовані колонки (не на кожне списання stock)
+CREATE TRIGGER IF NOT EXISTS products_fts_au
+AFTER UPDATE OF name, description, category ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, description, category)
+    VALUES ('delete', old.id, old.name, old.description, old.category);
+    INSERT INTO products_fts(rowid, name, description, category)
+    VALUES (new.id, new.name, new.description, new.category);
+END;
+
+INSERT INTO products_fts(products_fts) VALUES ('rebuild');
@@ -0,0 +1,114 @@
+-- Зведені таблиці продажів, які тригери підтримують інкрементально.
+-- Дашборд і /api/stats читають лише їх, а не orders / order_items.
+-- Розбіжності (наприклад, після ручних правок) виправляє
+-- `python manage_db.py rebuild-aggregates`.
+
+CREATE TABLE IF NOT EXISTS daily_sales (
+    day TEXT PRIMARY KEY,            -- YYYY-MM-DD з orders.created_at
+    orders INTEGER NOT NULL DEFAULT 0,
+    units INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0, -- сума price * quantity до знижки
+    discount REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS product_daily_sales (
+    product_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_product_daily_sales_day ON product_daily_sales(day);
+
+CREATE TABLE IF NOT EXISTS promo_usage (
+    code TEXT PRIMARY KEY,
+    redemptions INTEGER NOT NULL DEFAULT 0,
+    discount_total REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS order_status_counts (
+    status TEXT PRIMARY KEY,
+    orders INTEGER NOT NULL DEFAULT 0
+);
+
+-- orders --------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS agg_orders_ai AFTER INSERT ON orders BEGIN
+    INSERT INTO daily_sales (day, orders, discount)
+    SELECT substr(new.created_at, 1, 10), 1, COALESCE(new.discount_amount, 0)
+    WHERE new.created_at IS NOT NULL
+    ON CONFLICT(day) DO UPDATE SET orders = orders + 1, discount = discount + excluded.discount;
+
+    INSERT INTO order_status_counts (status, orders) VALUES (COALESCE(new.status, 'new'), 1)
+    ON CONFLICT(status) DO UPDATE SET orders = orders + 1;
+
+    INSERT INTO promo_usage (code, redemptions, discount_total)
+    SELECT new.promo_code, 1, COALESCE(new.discount_amount, 0)
+    WHERE new.promo_code IS NOT NULL
+    ON CONFLICT(code) DO UPDATE SET redemptions = redemptions + 1,
+                                    discount_total = discount_total + excluded.discount_total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS agg_orders_ad AFTER DELETE ON orders BEGIN
+    UPDATE daily_sales SET orders = orders - 1, discount = discount - COALESCE(old.discount_amount, 0)
+    WHERE day = substr(old.created_at, 1, 10);
+    UPDATE order_status_counts SET orders = orders - 1 WHERE status = COALESCE(old.status, 'new');
+    UPDATE promo_usage SET redemptions = redemptions - 1,
+                           discount_total = discount_total - COALESCE(old.discount_amount, 0)
+    WHERE code = old.promo_code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS agg_orders_au_status AFTER UPDATE OF status ON orders
+WHEN COALESCE(old.status, 'new') != COALESCE(new.status, 'new') BEGIN
+    UPDATE order_status_counts SET orders = orders - 1 WHERE status = COALESCE(old.status, 'new');
+    INSERT INTO order_status_counts (status, orders) VALUES (COALESCE(new.status, 'new'), 1)
+    ON CONFLICT(status) DO UPDATE SET orders = orders + 1;
+END;
+
+-- order_items ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS agg_order_items_ai AFTER INSERT ON order_items BEGIN
+    INSERT INTO daily_sales (day, units, revenue)
+    SELECT substr(o.created_at, 1, 10), new.quantity, new.price * new.quantity
+    FROM orders o WHERE o.id = new.order_id AND o.created_at IS NOT NULL
+    ON CONFLICT(day) DO UPDATE SET units = units + excluded.units, revenue = revenue + excluded.revenue;
+
+    INSERT INTO product_daily_sales (product_id, day, units, revenue)
+    SELECT new.product_id, substr(o.created_at, 1, 10), new.quantity, new.price * new.quantity
+    FROM orders o WHERE o.id = new.order_id AND o.created_at IS NOT NULL
+    ON CONFLICT(product_id, day) DO UPDATE SET units = units + excluded.units,
+                                               revenue = revenue + excluded.revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS agg_order_items_ad AFTER DELETE ON order_items BEGIN
+    UPDATE daily_sales SET units = units - old.quantity, revenue = revenue - old.price * old.quantity
+    WHERE day = (SELECT substr(created_at, 1, 10) FROM orders WHERE id = old.order_id);
+    UPDATE product_daily_sales SET units = units - old.quantity, revenue = revenue - old.price * old.quantity
+    WHERE product_id = old.product_id
+      AND day = (SELECT substr(created_at, 1, 10) FROM orders WHERE id = old.order_id);
+END;
+
+-- Початкове заповнення з наявних даних --------------------------------
+
+INSERT INTO daily_sales (day, orders, units, revenue, discount)
+SELECT substr(o.created_at, 1, 10), COUNT(*), COALESCE(SUM(i.units), 0),
+       COALESCE(SUM(i.revenue), 0), SUM(COALESCE(o.discount_amount, 0))
+FROM orders o
+LEFT JOIN (SELECT order_id, SUM(quantity) AS units, SUM(price * quantity) AS revenue
+           FROM order_items GROUP BY order_id) i ON i.order_id = o.id
+WHERE o.created_at IS NOT NULL
+GROUP BY 1;
+
+INSERT INTO product_daily_sales (product_id, day, units, revenue)
+SELECT oi.product_id, substr(o.created_at, 1, 10), SUM(oi.quantity), SUM(oi.price * oi.quantity)
+FROM order_items oi JOIN orders o ON o.id = oi.order_id
+WHERE o.created_at IS NOT NULL
+GROUP BY 1, 2;
+
+INSERT INTO promo_usage (code, redemptions, discount_total)
+SELECT promo_code, COUNT(*), SUM(COALESCE(discount_amount, 0))
+FROM orders WHERE promo_code IS NOT NULL
+GROUP BY 1;
+
+INSERT INTO order_status_counts (status, orders)
+SELECT COALESCE(status, 'new'), COUNT(*) FROM orders GROUP BY 1;
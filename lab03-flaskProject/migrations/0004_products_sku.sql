@@ -0,0 +1,9 @@
+-- Артикул постачальника: ключ для повторного імпорту фіду (upsert за sku).
+-- NULL-значення в UNIQUE-індексі SQLite не конфліктують між собою.
+
+ALTER TABLE products ADD COLUMN sku TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+
+-- Масова переоцінка категорії
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
@@ -0,0 +1,120 @@
+-- Лічильники версій таблиць для ETag / Last-Modified (conditional.py).
+-- Кожен запис у таблицю збільшує її version, тож відповідь, зібрана з тих
+-- самих версій, гарантовано не змінилась — 304 віддається без запитів до даних.
+-- Лічильники живуть у БД, тому однакові для всіх воркерів.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at INTEGER NOT NULL       -- unix-час останньої зміни
+);
+
+INSERT OR IGNORE INTO table_versions (name, version, updated_at)
+VALUES ('products', 0, CAST(strftime('%s', 'now') AS INTEGER)),
+       ('orders', 0, CAST(strftime('%s', 'now') AS INTEGER)),
+       ('order_items', 0, CAST(strftime('%s', 'now') AS INTEGER)),
+       ('customers', 0, CAST(strftime('%s', 'now') AS INTEGER)),
+       ('feedback', 0, CAST(strftime('%s', 'now') AS INTEGER)),
+       ('promo_codes', 0, CAST(strftime('%s', 'now') AS INTEGER));
+
+-- products ------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS ver_products_ai AFTER INSERT ON products BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'products';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_products_au AFTER UPDATE ON products BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'products';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_products_ad AFTER DELETE ON products BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'products';
+END;
+
+-- orders --------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS ver_orders_ai AFTER INSERT ON orders BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'orders';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_orders_au AFTER UPDATE ON orders BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'orders';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_orders_ad AFTER DELETE ON orders BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'orders';
+END;
+
+-- order_items ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS ver_order_items_ai AFTER INSERT ON order_items BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'order_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_order_items_au AFTER UPDATE ON order_items BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'order_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_order_items_ad AFTER DELETE ON order_items BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'order_items';
+END;
+
+-- customers -----------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS ver_customers_ai AFTER INSERT ON customers BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'customers';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_customers_au AFTER UPDATE ON customers BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'customers';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_customers_ad AFTER DELETE ON customers BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'customers';
+END;
+
+-- feedback ------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS ver_feedback_ai AFTER INSERT ON feedback BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'feedback';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_feedback_au AFTER UPDATE ON feedback BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'feedback';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_feedback_ad AFTER DELETE ON feedback BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'feedback';
+END;
+
+-- promo_codes ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS ver_promo_codes_ai AFTER INSERT ON promo_codes BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'promo_codes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_promo_codes_au AFTER UPDATE ON promo_codes BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'promo_codes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS ver_promo_codes_ad AFTER DELETE ON promo_codes BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE name = 'promo_codes';
+END;
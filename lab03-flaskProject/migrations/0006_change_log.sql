@@ -0,0 +1,91 @@
+-- Журнал змін для дельта-синхронізації (/api/changes?since=<seq>).
+-- Тригери дописують рядок на кожну вставку / зміну / видалення; seq
+-- монотонно зростає і не перевикористовується (AUTOINCREMENT).
+-- Розмір обмежує `python manage_db.py compact-changes`.
+
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    op TEXT NOT NULL,                 -- 'upsert' або 'delete'
+    changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_id, seq);
+
+-- Межа, до якої журнал обрізано: клієнту з since < pruned_through
+-- потрібна повна ресинхронізація
+CREATE TABLE IF NOT EXISTS change_log_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO change_log_state (key, value) VALUES ('pruned_through', 0);
+
+-- products ------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS chg_products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('products', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_products_au AFTER UPDATE ON products BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('products', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('products', old.id, 'delete');
+END;
+
+-- orders --------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS chg_orders_ai AFTER INSERT ON orders BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('orders', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_orders_au AFTER UPDATE ON orders BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('orders', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_orders_ad AFTER DELETE ON orders BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('orders', old.id, 'delete');
+END;
+
+-- order_items ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS chg_order_items_ai AFTER INSERT ON order_items BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('order_items', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_order_items_au AFTER UPDATE ON order_items BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('order_items', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_order_items_ad AFTER DELETE ON order_items BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('order_items', old.id, 'delete');
+END;
+
+-- feedback ------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS chg_feedback_ai AFTER INSERT ON feedback BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('feedback', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_feedback_au AFTER UPDATE ON feedback BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('feedback', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_feedback_ad AFTER DELETE ON feedback BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('feedback', old.id, 'delete');
+END;
+
+-- promo_codes ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS chg_promo_codes_ai AFTER INSERT ON promo_codes BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('promo_codes', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_promo_codes_au AFTER UPDATE ON promo_codes BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('promo_codes', new.id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS chg_promo_codes_ad AFTER DELETE ON promo_codes BEGIN
+    INSERT INTO change_log (table_name, row_id, op) VALUES ('promo_codes', old.id, 'delete');
+END;
@@ -0,0 +1,19 @@
+-- Ключі ідемпотентності для POST /api/orders, /api/orders/batch, /api/feedback.
+-- status IS NULL — запит ще виконується (інші дублікати чекають на нього);
+-- після завершення тут зберігається відповідь, яку отримають повтори.
+-- Старі записи видаляються за expires_at (idempotency.py).
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    endpoint TEXT NOT NULL,
+    key TEXT NOT NULL,
+    request_hash TEXT NOT NULL,
+    status INTEGER,
+    content_type TEXT,
+    body BLOB,
+    created_at REAL NOT NULL,
+    locked_until REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (endpoint, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
@@ -0,0 +1,83 @@
+-- Тригери 0003 враховували лише вставку, видалення і зміну статусу.
+-- Тут — зміни інших полів, від яких залежать зведені таблиці продажів:
+-- orders.created_at / discount_amount / promo_code та будь-яка зміна рядка
+-- order_items (order_id, product_id, quantity, price). Кожен тригер спершу
+-- віднімає старий внесок рядка, потім додає новий.
+
+-- orders --------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS agg_orders_au AFTER UPDATE OF created_at, discount_amount, promo_code ON orders
+WHEN old.created_at IS NOT new.created_at
+  OR old.discount_amount IS NOT new.discount_amount
+  OR old.promo_code IS NOT new.promo_code BEGIN
+    UPDATE daily_sales
+    SET orders = orders - 1,
+        discount = discount - COALESCE(old.discount_amount, 0),
+        units = units - (SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE order_id = old.id),
+        revenue = revenue - (SELECT COALESCE(SUM(price * quantity), 0) FROM order_items WHERE order_id = old.id)
+    WHERE day = substr(old.created_at, 1, 10);
+
+    INSERT INTO daily_sales (day, orders, units, revenue, discount)
+    SELECT substr(new.created_at, 1, 10), 1,
+           (SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE order_id = new.id),
+           (SELECT COALESCE(SUM(price * quantity), 0) FROM order_items WHERE order_id = new.id),
+           COALESCE(new.discount_amount, 0)
+    WHERE new.created_at IS NOT NULL
+    ON CONFLICT(day) DO UPDATE SET orders = orders + 1, units = units + excluded.units,
+                                   revenue = revenue + excluded.revenue,
+                                   discount = discount + excluded.discount;
+
+    UPDATE promo_usage SET redemptions = redemptions - 1,
+                           discount_total = discount_total - COALESCE(old.discount_amount, 0)
+    WHERE code = old.promo_code;
+
+    INSERT INTO promo_usage (code, redemptions, discount_total)
+    SELECT new.promo_code, 1, COALESCE(new.discount_amount, 0)
+    WHERE new.promo_code IS NOT NULL
+    ON CONFLICT(code) DO UPDATE SET redemptions = redemptions + 1,
+                                    discount_total = discount_total + excluded.discount_total;
+END;
+
+-- Зміна дня замовлення переносить продажі його товарів
+CREATE TRIGGER IF NOT EXISTS agg_orders_au_day AFTER UPDATE OF created_at ON orders
+WHEN substr(old.created_at, 1, 10) IS NOT substr(new.created_at, 1, 10) BEGIN
+    UPDATE product_daily_sales
+    SET units = units - (SELECT SUM(quantity) FROM order_items
+                         WHERE order_id = old.id AND product_id = product_daily_sales.product_id),
+        revenue = revenue - (SELECT SUM(price * quantity) FROM order_items
+                             WHERE order_id = old.id AND product_id = product_daily_sales.product_id)
+    WHERE day = substr(old.created_at, 1, 10)
+      AND product_id IN (SELECT product_id FROM order_items WHERE order_id = old.id);
+
+    INSERT INTO product_daily_sales (product_id, day, units, revenue)
+    SELECT product_id, substr(new.created_at, 1, 10), SUM(quantity), SUM(price * quantity)
+    FROM order_items WHERE order_id = new.id AND new.created_at IS NOT NULL
+    GROUP BY product_id
+    ON CONFLICT(product_id, day) DO UPDATE SET units = units + excluded.units,
+                                               revenue = revenue + excluded.revenue;
+END;
+
+-- order_items ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS agg_order_items_au AFTER UPDATE OF order_id, product_id, quantity, price ON order_items
+WHEN old.order_id IS NOT new.order_id
+  OR old.product_id IS NOT new.product_id
+  OR old.quantity IS NOT new.quantity
+  OR old.price IS NOT new.price BEGIN
+    UPDATE daily_sales SET units = units - old.quantity, revenue = revenue - old.price * old.quantity
+    WHERE day = (SELECT substr(created_at, 1, 10) FROM orders WHERE id = old.order_id);
+    UPDATE product_daily_sales SET units = units - old.quantity, revenue = revenue - old.price * old.quantity
+    WHERE product_id = old.product_id
+      AND day = (SELECT substr(created_at, 1, 10) FROM orders WHERE id = old.order_id);
+
+    INSERT INTO daily_sales (day, units, revenue)
+    SELECT substr(o.created_at, 1, 10), new.quantity, new.price * new.quantity
+    FROM orders o WHERE o.id = new.order_id AND o.created_at IS NOT NULL
+    ON CONFLICT(day) DO UPDATE SET units = units + excluded.units, revenue = revenue + excluded.revenue;
+
+    INSERT INTO product_daily_sales (product_id, day, units, revenue)
+    SELECT new.product_id, substr(o.created_at, 1, 10), new.quantity, new.price * new.quantity
+    FROM orders o WHERE o.id = new.order_id AND o.created_at IS NOT NULL
+    ON CONFLICT(product_id, day) DO UPDATE SET units = units + excluded.units,
+                                               revenue = revenue + excluded.revenue;
+END;
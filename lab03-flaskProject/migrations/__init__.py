@@ -0,0 +1,158 @@
+"""Versioned schema migrations.
+
+Migrations are plain SQL files named ``NNNN_description.sql`` in this
+directory. They are applied in order, each inside its own transaction, and
+recorded in the ``schema_version`` table so a live database can be upgraded
+without touching ``models.initialize_db``.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+_FILENAME_RE = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+# Гарячі запити для `manage_db.py migrate --plan` (SQL, приклад параметрів)
+HOT_QUERIES = [
+    ('cart: product by id',
+     'SELECT * FROM products WHERE id = ?', (1,)),
+    ('checkout: customer by email',
+     'SELECT * FROM customers WHERE email = ?', ('user@example.com',)),
+    ('promo lookup',
+     'SELECT discount_percent FROM promo_codes WHERE code = ? AND active = 1', ('1234',)),
+    ('market: price range',
+     'SELECT * FROM products WHERE price >= ? AND price <= ?', (100, 1000)),
+    ('orders list',
+     '''SELECT o.*, c.name as customer_name, c.email as customer_email
+        FROM orders o LEFT JOIN customers c ON o.customer_id = c.id
+        ORDER BY o.created_at DESC''', ()),
+    ('orders by status',
+     'SELECT * FROM orders WHERE status = ? ORDER BY created_at DESC', ('new',)),
+    ('order items',
+     '''SELECT oi.*, p.name as product_name
+        FROM order_items oi LEFT JOIN products p ON oi.product_id = p.id
+        WHERE oi.order_id = ?''', (1,)),
+]
+
+
+def discover():
+    """Return ``[(version, name, path), ...]`` sorted by version."""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _FILENAME_RE.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2),
+                          os.path.join(MIGRATIONS_DIR, filename)))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError('Duplicate migration version numbers')
+    return found
+
+
+def split_statements(sql):
+    """Split a script into complete statements (trigger bodies stay intact)."""
+    statements, buf = [], ''
+    for line in sql.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip():
+                statements.append(buf.strip())
+            buf = ''
+    if buf.strip() and not all(l.strip().startswith('--') or not l.strip()
+                               for l in buf.splitlines()):
+        raise ValueError(f'Incomplete SQL statement: {buf.strip()[:80]}')
+    return statements
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def current_version(conn):
+    ensure_version_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def pending(conn):
+    """Migrations not yet recorded in ``schema_version``."""
+    ensure_version_table(conn)
+    applied = {r[0] for r in conn.execute('SELECT version FROM schema_version')}
+    return [m for m in discover() if m[0] not in applied]
+
+
+def _apply_one(conn, version, name, path):
+    with open(path, encoding='utf-8') as fh:
+        statements = split_statements(fh.read())
+    for statement in statements:
+        conn.execute(statement)
+    conn.execute('INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)',
+                 (version, name, datetime.utcnow().isoformat()))
+
+
+def apply_migrations(conn, log=None):
+    """Apply pending migrations in order; return the list applied.
+
+    Each migration runs in its own ``BEGIN IMMEDIATE`` transaction, so a
+    failing file leaves the database at the previous version. The version
+    is checked again under the write lock: another process starting at the
+    same time may already have applied it.
+    """
+    applied = []
+    for version, name, path in pending(conn):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Інший процес міг застосувати міграцію, поки ми чекали на блокування
+            if conn.execute('SELECT 1 FROM schema_version WHERE version = ?',
+                            (version,)).fetchone():
+                conn.rollback()
+                continue
+            _apply_one(conn, version, name, path)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append((version, name))
+        if log:
+            log(version, name)
+    if applied:
+        conn.execute('PRAGMA optimize')
+    return applied
+
+
+def plan_migrations(conn):
+    """Return ``(pending, before, after)`` query plans without changing the DB.
+
+    Pending migrations are applied inside one transaction which is rolled
+    back once the "after" plans are collected (SQLite DDL is transactional).
+    """
+    todo = pending(conn)
+    before = explain_hot_queries(conn)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for version, name, path in todo:
+            _apply_one(conn, version, name, path)
+        after = explain_hot_queries(conn)
+    finally:
+        conn.rollback()
+    return todo, before, after
+
+
+def explain(conn, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN rows for ``sql`` as text lines."""
+    rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    return [row[3] for row in rows]
+
+
+def explain_hot_queries(conn):
+    return [(label, explain(conn, sql, params)) for label, sql, params in HOT_QUERIES]
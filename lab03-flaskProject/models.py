@@ -1,16 +1,18 @@
+from contextlib import closing
 from datetime import datetime
-import sqlite3
-import os
+import json
+import re
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.environ.get('DATABASE_PATH', os.path.join(BASE_DIR, 'site.db'))
+from cache import cached, invalidate
+from db import get_connection
+from jsonout import row_dicts
+from pagination import Page, clamp_limit, fetch_page
+from checkout import place_order
 
 
 def get_db_connection():
-    """Create a new database connection for API requests."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Acquire a pooled database connection; ``close()`` releases it."""
+    return get_connection()
 
 
 def initialize_db(conn):
@@ -89,111 +91,235 @@ def initialize_db(conn):
 
 # API Helper Functions
 
-def get_products():
-    """Get all products from database."""
-    conn = get_db_connection()
-    products = conn.execute('SELECT * FROM products').fetchall()
-    conn.close()
-    return products
+# Read helpers below are served from the query cache (see cache.py): results
+# are plain dicts / Pages so they can be stored, and every write path calls
+# invalidate() with the tables it touched.
 
+# bm25() weights for products_fts columns: name, description, category
+_FTS_WEIGHTS = (10.0, 1.0, 4.0)
+_FTS_TERM_RE = re.compile(r'\w+', re.UNICODE)
 
-def get_orders():
-    """Get all orders with customer info."""
-    conn = get_db_connection()
-    orders = conn.execute('''
-        SELECT o.*, c.name as customer_name, c.email as customer_email 
-        FROM orders o 
-        LEFT JOIN customers c ON o.customer_id = c.id
-        ORDER BY o.created_at DESC
-    ''').fetchall()
-    conn.close()
-    return orders
 
+def fts_query(q):
+    """Turn free-form user input into a safe FTS5 MATCH expression.
 
+    Every word becomes a quoted prefix term (``"ноут"*``), so FTS5 syntax
+    characters typed by users can't break the query. Returns None if the
+    input contains no searchable words.
+    """
+    terms = _FTS_TERM_RE.findall(q or '')
+    if not terms:
+        return None
+    return ' '.join('"%s"*' % term for term in terms)
+
+
+@cached('search_products', ('products',))
+def search_products(q=None, min_price=None, max_price=None, cursor=None, limit=None):
+    """Full-text product search with optional price range, one page at a time.
+
+    With ``q`` results are ordered by bm25 relevance (best first), otherwise
+    by id; either way paging is keyset-based. Returns a ``pagination.Page``.
+    """
+    params = []
+    match = fts_query(q)
+    if match:
+        rank = 'bm25(products_fts, %s, %s, %s)' % _FTS_WEIGHTS
+        sql = ('SELECT p.*, %s AS search_rank FROM products_fts '
+               'JOIN products p ON p.id = products_fts.rowid '
+               'WHERE products_fts MATCH ?' % rank)
+        params.append(match)
+        keys = [(rank, 'search_rank'), ('p.id', 'id')]
+    elif q and q.strip():
+        # Лише розділові знаки — нічого шукати
+        return Page([], None, None, clamp_limit(limit))
+    else:
+        sql = 'SELECT p.* FROM products p WHERE 1=1'
+        keys = [('p.id', 'id')]
+    if min_price is not None:
+        sql += ' AND p.price >= ?'
+        params.append(min_price)
+    if max_price is not None:
+        sql += ' AND p.price <= ?'
+        params.append(max_price)
+    with closing(get_db_connection()) as conn:
+        return fetch_page(conn, sql, params, keys, cursor, limit)
+
+
+def rebuild_search_index(conn):
+    """Repopulate products_fts from products in one bulk pass."""
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('optimize')")
+    conn.commit()
+
+
+# Order graph: orders + customers + line items in a fixed number of queries.
+# Subtotals are summed in SQL over the covering idx_order_items_order index.
+_ORDER_SELECT = '''
+    SELECT o.*,
+           c.name AS customer_name, c.email AS customer_email, c.phone AS customer_phone,
+           (SELECT COALESCE(SUM(oi.price * oi.quantity), 0)
+              FROM order_items oi WHERE oi.order_id = o.id) AS subtotal
+    FROM orders o
+    LEFT JOIN customers c ON o.customer_id = c.id
+    WHERE 1=1
+'''
+_ORDER_KEYS = [('o.created_at', 'created_at'), ('o.id', 'id')]
+# Поля замовлення у відповідях API (для ?fields=)
+ORDER_FIELDS = ('id', 'customer_id', 'status', 'created_at', 'promo_code', 'discount_amount',
+                'customer_name', 'customer_email', 'customer_phone', 'subtotal', 'total')
+# Ліміт параметрів SQLite для IN (...)
+_IN_CHUNK = 500
+
+
+def _order_dict(row):
+    order = row if isinstance(row, dict) else dict(row)
+    order['total'] = order['subtotal'] - (order.get('discount_amount') or 0.0)
+    return order
+
+
+def load_order_items(conn, order_ids):
+    """Return ``{order_id: [item, ...]}`` for many orders in batched queries."""
+    ids = list(order_ids)
+    items = {order_id: [] for order_id in ids}
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute('''
+            SELECT oi.*, p.name AS product_name
+            FROM order_items oi
+            LEFT JOIN products p ON oi.product_id = p.id
+            WHERE oi.order_id IN (%s)
+            ORDER BY oi.order_id, oi.id
+        ''' % ','.join('?' * len(chunk)), chunk)
+        for item in row_dicts(cur):
+            items[item['order_id']].append(item)
+    return items
+
+
+def load_orders(conn, status=None, date_from=None, date_to=None,
+                cursor=None, limit=None, include_items=True, max_limit=None):
+    """Load one keyset page of orders, newest first, as plain dicts.
+
+    Each order carries customer_name/email/phone, ``subtotal`` and ``total``
+    (after discount), plus ``items`` when ``include_items`` is set. Dates
+    are ISO ``YYYY-MM-DD`` and both ends are inclusive. Costs two queries
+    per page regardless of how many orders or items it holds (items are
+    fetched in IN-batches of 500 ids). ``max_limit`` raises the page cap.
+    """
+    sql, params = _ORDER_SELECT, []
+    if status:
+        sql += ' AND o.status = ?'
+        params.append(status)
+    if date_from:
+        sql += ' AND o.created_at >= ?'
+        params.append(date_from)
+    if date_to:
+        sql += " AND o.created_at < date(?, '+1 day')"
+        params.append(date_to)
+    page = fetch_page(conn, sql, params, _ORDER_KEYS, cursor, limit, descending=True,
+                      max_limit=max_limit)
+    orders = [_order_dict(row) for row in page.items]
+    if include_items and orders:
+        items = load_order_items(conn, [o['id'] for o in orders])
+        for order in orders:
+            order['items'] = items[order['id']]
+    return page._replace(items=orders)
+
+
+@cached('orders', ('orders', 'customers', 'products'))
+def get_orders(status=None, date_from=None, date_to=None, cursor=None, limit=None,
+               include_items=False, max_limit=None):
+    """One page of orders with customer info and totals (see load_orders)."""
+    with closing(get_db_connection()) as conn:
+        return load_orders(conn, status, date_from, date_to, cursor, limit, include_items, max_limit)
+
+
+@cached('feedback_page', ('feedback',))
+def get_feedback_page(cursor=None, limit=None):
+    """One keyset page of feedback, newest first."""
+    with closing(get_db_connection()) as conn:
+        return fetch_page(conn, 'SELECT * FROM feedback WHERE 1=1', [],
+                          [('id', 'id')], cursor, limit, descending=True)
+
+
+@cached('reviews', ('feedback',))
+def get_reviews():
+    """All feedback for the public reviews page, newest first."""
+    with closing(get_db_connection()) as conn:
+        return [dict(row) for row in conn.execute(
+            'SELECT id, name, email, message, created_at FROM feedback ORDER BY created_at DESC')]
+
+
+@cached('customers_page', ('customers',))
+def get_customers_page(cursor=None, limit=None):
+    """One keyset page of customers by id."""
+    with closing(get_db_connection()) as conn:
+        return fetch_page(conn, 'SELECT * FROM customers WHERE 1=1', [],
+                          [('id', 'id')], cursor, limit)
+
+
+@cached('order_details', ('orders', 'customers', 'products'))
 def get_order_details(order_id):
     """Get order with items details."""
-    conn = get_db_connection()
-    
-    # Get order info
-    order = conn.execute('''
-        SELECT o.*, c.name as customer_name, c.email as customer_email, c.phone
-        FROM orders o
-        LEFT JOIN customers c ON o.customer_id = c.id
-        WHERE o.id = ?
-    ''', (order_id,)).fetchone()
-    
-    # Get order items
-    items = conn.execute('''
-        SELECT oi.*, p.name as product_name
-        FROM order_items oi
-        LEFT JOIN products p ON oi.product_id = p.id
-        WHERE oi.order_id = ?
-    ''', (order_id,)).fetchall()
-    
-    conn.close()
+    with closing(get_db_connection()) as conn:
+        row = conn.execute(_ORDER_SELECT + ' AND o.id = ?', (order_id,)).fetchone()
+        if row is None:
+            return None, []
+        order = _order_dict(row)
+        # Для сумісності API: телефон клієнта віддається як "phone"
+        order['phone'] = order['customer_phone']
+        items = load_order_items(conn, [order_id])[order_id]
     return order, items
 
 
 def add_order(customer_name, customer_email, customer_phone, cart, promo_code=None):
-    """Create new order from cart data."""
-    conn = get_db_connection()
-    
-    # Create or find customer
-    customer = conn.execute('SELECT * FROM customers WHERE email = ?', (customer_email,)).fetchone()
-    if customer:
-        customer_id = customer['id']
-    else:
-        cursor = conn.execute(
-            'INSERT INTO customers (name, email, phone) VALUES (?, ?, ?)',
-            (customer_name, customer_email, customer_phone)
-        )
-        customer_id = cursor.lastrowid
-    
-    # Calculate total and discount
-    total = sum(item['price'] * item['quantity'] for item in cart.values())
-    discount = 0.0
-    
-    if promo_code:
-        promo = conn.execute(
-            'SELECT discount_percent FROM promo_codes WHERE code = ? AND active = 1',
-            (promo_code,)
-        ).fetchone()
-        if promo:
-            discount = total * (promo['discount_percent'] / 100.0)
-    
-    # Create order
-    cursor = conn.execute(
-        'INSERT INTO orders (customer_id, status, created_at, promo_code, discount_amount) VALUES (?, ?, ?, ?, ?)',
-        (customer_id, 'new', datetime.utcnow().isoformat(), promo_code, discount)
-    )
-    order_id = cursor.lastrowid
-    
-    # Add order items
-    for item in cart.values():
-        conn.execute(
-            'INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)',
-            (order_id, item['id'], item['quantity'], item['price'])
-        )
-    
-    conn.commit()
-    conn.close()
-    return order_id
+    """Create new order from cart data.
+
+    Prices come from the database and stock is reserved atomically (see
+    ``checkout.place_order``); prices sent by the client are ignored.
+    Raises ``PricingError`` for unknown products and ``OutOfStock``.
+    """
+    with closing(get_db_connection()) as conn:
+        return place_order(conn, customer_name, customer_email, customer_phone, cart, promo_code)
+
+
+ORDER_STATUSES = ['new', 'processing', 'shipped', 'completed', 'cancelled']
 
 
 def update_order_status(order_id, status):
     """Update order status. Returns True if updated, False if not found."""
-    conn = get_db_connection()
-    cur = conn.execute('UPDATE orders SET status = ? WHERE id = ?', (status, order_id))
-    conn.commit()
-    updated = cur.rowcount > 0
-    conn.close()
+    with closing(get_db_connection()) as conn:
+        cur = conn.execute('UPDATE orders SET status = ? WHERE id = ?', (status, order_id))
+        conn.commit()
+    invalidate('orders')
+    return cur.rowcount > 0
+
+
+def update_orders_status(order_ids, status):
+    """Set ``status`` on many orders with one set-based UPDATE.
+
+    Returns the ids that were actually found and updated.
+    """
+    ids = sorted({int(order_id) for order_id in order_ids})
+    if not ids:
+        return []
+    with closing(get_db_connection()) as conn:
+        # Один параметр-масив через json_each — без ліміту на кількість id
+        cur = conn.execute(
+            'UPDATE orders SET status = ? WHERE id IN (SELECT value FROM json_each(?)) RETURNING id',
+            (status, json.dumps(ids)))
+        updated = sorted(row[0] for row in cur.fetchall())
+        conn.commit()
+    if updated:
+        invalidate('orders')
     return updated
 
 
 def delete_order(order_id):
     """Delete order and its items."""
-    conn = get_db_connection()
-    conn.execute('DELETE FROM order_items WHERE order_id = ?', (order_id,))
-    conn.execute('DELETE FROM orders WHERE id = ?', (order_id,))
-    conn.commit()
-    conn.close()
+    with closing(get_db_connection()) as conn:
+        conn.execute('DELETE FROM order_items WHERE order_id = ?', (order_id,))
+        conn.execute('DELETE FROM orders WHERE id = ?', (order_id,))
+        conn.commit()
+    invalidate('orders')
@@ -0,0 +1,75 @@
+"""Rendered-page cache for anonymous visitors of the public pages.
+
+``@cache_page('products')`` stores the final HTML of a GET response keyed
+on path + normalized query string, in the same tag-invalidated store as the
+query cache. Tags act as surrogate keys: ``invalidate('products')`` after an
+admin write purges every page rendered from products, nothing else.
+
+Requests whose session carries a cart, promo code, pending flash messages or
+an admin login are always rendered fresh and marked ``private``.
+"""
+
+import functools
+
+from flask import current_app, make_response, request, session
+
+from cache import query_cache
+from config import setting
+
+
+# Ключі сесії, з якими сторінка стає персональною
+PERSONAL_SESSION_KEYS = ('cart', 'promo_code', '_flashes', 'admin_logged_in')
+
+_STORED_HEADERS = ('Content-Type', 'Content-Language')
+
+
+def is_anonymous():
+    return not any(key in session for key in PERSONAL_SESSION_KEYS)
+
+
+def normalized_query():
+    """Query string with sorted parameters and empty values dropped."""
+    pairs = sorted((k, v) for k, v in request.args.items(multi=True) if v != '')
+    return '&'.join('%s=%s' % pair for pair in pairs)
+
+
+def _shared_headers(response, tags):
+    response.headers['Cache-Control'] = 'public, max-age=0, s-maxage=%d' % setting('PAGE_CACHE_SHARED_MAX_AGE')
+    response.vary.add('Cookie')
+    if tags:
+        response.headers['Surrogate-Key'] = ' '.join(tags)
+    return response
+
+
+def cache_page(*tags, timeout=None):
+    """Cache a public view's 200 responses for anonymous visitors."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cacheable = (query_cache.enabled and request.method in ('GET', 'HEAD')
+                         and is_anonymous())
+            if not cacheable:
+                response = make_response(view(*args, **kwargs))
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            key = query_cache.key('page', (request.path, normalized_query()), tags)
+            cached = query_cache.get(key)
+            if cached is not None:
+                body, headers = cached
+                response = current_app.response_class(body, headers=headers)
+                response.headers['X-Cache'] = 'HIT'
+                return _shared_headers(response, tags)
+
+            response = make_response(view(*args, **kwargs))
+            # Сторінка, що сама поставила flash або змінила сесію, — не для всіх
+            if (response.status_code == 200 and not response.direct_passthrough
+                    and not session.modified and is_anonymous()):
+                headers = [(h, response.headers[h]) for h in _STORED_HEADERS if h in response.headers]
+                query_cache.set(key, (response.get_data(), headers), timeout or setting('PAGE_CACHE_TIMEOUT'))
+                response.headers['X-Cache'] = 'MISS'
+                return _shared_headers(response, tags)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
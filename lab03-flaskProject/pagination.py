@@ -0,0 +1,105 @@
+"""Keyset (cursor) pagination for listing queries.
+
+Instead of ``OFFSET`` every page continues from the sort key of the last row
+seen (``WHERE (created_at, id) < (?, ?)``), so with an index on the sort
+columns page 1000 costs the same as page 1. Cursors are opaque base64 tokens
+holding that key and the paging direction.
+"""
+
+import base64
+import json
+from collections import namedtuple
+
+from config import setting
+from jsonout import row_dicts
+
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor', 'limit'])
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token can't be decoded."""
+
+
+def encode_cursor(key, direction='next'):
+    payload = json.dumps({'k': list(key), 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(key, direction)`` for a token produced by encode_cursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key, direction = data['k'], data['d']
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise InvalidCursor('Invalid cursor') from None
+    if direction not in ('next', 'prev') or not isinstance(key, list):
+        raise InvalidCursor('Invalid cursor')
+    return key, direction
+
+
+def clamp_limit(value, default=None, cap=None):
+    """Parse a requested page size and keep it within ``1..cap``."""
+    default = default or setting('PAGE_SIZE')
+    cap = cap or setting('MAX_PAGE_SIZE')
+    try:
+        limit = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, cap))
+
+
+def fetch_page(conn, sql, params, keys, cursor=None, limit=None, descending=False, max_limit=None):
+    """Run a keyset-paginated query and return a :class:`Page`.
+
+    ``sql`` is a SELECT ending in a WHERE clause (use ``WHERE 1=1`` if there
+    is nothing to filter); the key condition, ORDER BY and LIMIT are appended
+    here. ``keys`` is a list of ``(sql_expression, result_column)`` pairs
+    forming a unique sort key, e.g. ``[('o.created_at', 'created_at'),
+    ('o.id', 'id')]``. ``max_limit`` overrides ``MAX_PAGE_SIZE``.
+
+    Items are plain dicts, ready to be cached and serialized.
+    """
+    limit = clamp_limit(limit, cap=max_limit)
+    exprs = [expr for expr, _ in keys]
+    direction = 'next'
+    params = list(params)
+    if cursor:
+        key, direction = decode_cursor(cursor)
+        if len(key) != len(keys):
+            raise InvalidCursor('Invalid cursor')
+        # Для попередньої сторінки йдемо в зворотному напрямку
+        forward = (direction == 'next') != descending
+        op = '>' if forward else '<'
+        sql += ' AND (%s) %s (%s)' % (', '.join(exprs), op, ', '.join('?' * len(key)))
+        params.extend(key)
+    reverse = (direction == 'prev') != descending
+    order = 'DESC' if reverse else 'ASC'
+    sql += ' ORDER BY ' + ', '.join('%s %s' % (expr, order) for expr in exprs)
+    sql += ' LIMIT ?'
+    params.append(limit + 1)
+
+    cur = conn.cursor()
+    cur.row_factory = None  # кортежі + імена колонок один раз, без sqlite3.Row
+    rows = list(row_dicts(cur.execute(sql, params)))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    def key_of(row):
+        return [row[column] for _, column in keys]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            if has_more:
+                next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            if cursor:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+        else:
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            if has_more:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+    return Page(rows, next_cursor, prev_cursor, limit)
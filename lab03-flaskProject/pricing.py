@@ -0,0 +1,105 @@
+"""Server-side cart pricing shared by the cart pages and the API.
+
+A quote is computed from current product prices in one ``IN (...)`` query
+plus one promo lookup, whatever the size of the cart, and is immutable so
+the same numbers can be rendered, stored with the order and returned by
+``POST /api/cart/quote``.
+"""
+
+from collections import namedtuple
+
+from cache import query_cache
+
+# SQLite має ліміт на кількість параметрів у запиті
+_IN_CHUNK = 500
+
+QuoteLine = namedtuple('QuoteLine', ['id', 'name', 'price', 'quantity', 'subtotal', 'stock'])
+Quote = namedtuple('Quote', ['lines', 'subtotal', 'discount', 'total',
+                             'promo_code', 'discount_percent', 'missing'])
+
+
+class PricingError(ValueError):
+    """The cart can't be priced (bad product id or quantity)."""
+
+
+def normalize_cart(cart):
+    """Return ``{product_id: quantity}`` from a session or API cart.
+
+    Accepts both the session format ``{"1": 2}`` and the API format
+    ``{"1": {"id": 1, "quantity": 2, ...}}``; client-side prices are ignored.
+    """
+    items = {}
+    for key, value in (cart or {}).items():
+        if isinstance(value, dict):
+            pid, qty = value.get('id', key), value.get('quantity', 1)
+        else:
+            pid, qty = key, value
+        try:
+            pid, qty = int(pid), int(qty)
+        except (TypeError, ValueError):
+            raise PricingError(f'Invalid cart item: {key!r}') from None
+        if qty <= 0:
+            raise PricingError(f'Quantity must be positive for product {pid}')
+        items[pid] = items.get(pid, 0) + qty
+    return items
+
+
+def load_products(conn, product_ids):
+    """Fetch ``{id: row}`` for the given ids with as few queries as possible."""
+    ids = list(product_ids)
+    found = {}
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        placeholders = ','.join('?' * len(chunk))
+        cur = conn.execute(
+            f'SELECT id, name, price, stock FROM products WHERE id IN ({placeholders})', chunk)
+        for row in cur:
+            found[row['id']] = row
+    return found
+
+
+def promo_percent(conn, promo_code):
+    """Discount percent of an active promo code, or 0.0.
+
+    Outside a transaction the lookup is served from the query cache; inside
+    checkout's write transaction it always reads the current row.
+    """
+    if not promo_code:
+        return 0.0
+
+    def lookup():
+        row = conn.execute('SELECT discount_percent FROM promo_codes WHERE code = ? AND active = 1',
+                           (promo_code,)).fetchone()
+        return row['discount_percent'] if row else 0.0
+
+    if conn.in_transaction:
+        return lookup()
+    return query_cache.get_or_load('promo_percent', promo_code, ('promo_codes',), lookup)
+
+
+def quote_cart(conn, cart, promo_code=None):
+    """Price ``cart`` against current DB prices and return a :class:`Quote`.
+
+    Unknown product ids are left out of the lines and listed in ``missing``.
+    """
+    items = normalize_cart(cart)
+    products = load_products(conn, items) if items else {}
+    lines = []
+    for pid, qty in items.items():
+        row = products.get(pid)
+        if row is not None:
+            lines.append(QuoteLine(pid, row['name'], row['price'], qty, row['price'] * qty, row['stock']))
+    subtotal = sum(line.subtotal for line in lines)
+    percent = promo_percent(conn, promo_code) if lines else 0.0
+    discount = subtotal * (percent / 100.0)
+    missing = tuple(pid for pid in items if pid not in products)
+    return Quote(tuple(lines), subtotal, discount, subtotal - discount,
+                 promo_code if percent else None, percent, missing)
+
+
+def quote_to_dict(quote):
+    """JSON-friendly representation of a quote."""
+    data = quote._asdict()
+    data['lines'] = [line._asdict() for line in quote.lines]
+    data['missing'] = list(quote.missing)
+    return data
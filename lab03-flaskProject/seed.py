@@ -1,8 +1,100 @@
-import sqlite3
+#!/usr/bin/env python3
+"""
+Демо-дані та генератор великого синтетичного набору для бенчмарків.
+
+    python seed.py                    # 3 демо-товари, якщо таблиця порожня
+    python seed.py --reset --products 1e6 --customers 2e5 --orders 5e6 --feedback 2e5
+    python seed.py --reset --products 5e4 --orders 3e5 --seed 7 --until 2026-01-01
+
+Набір детермінований: той самий --seed і --until (і --reset) дають той самий
+набір рядків. Популярність товарів розподілена за Ціпфом (кілька
+хітів, довгий хвіст), замовлення розкидані на --years років з ростом,
+тижневою та сезонною динамікою, частина з них — з промокодами.
+
+Завантаження йде одним великим транзакційним executemany-потоком з
+послабленими PRAGMA (journal_mode=MEMORY, synchronous=OFF), тригери та
+вторинні індекси на час вставки знімаються, а потім відновлюються;
+пошуковий індекс, агрегати продажів і версії таблиць перераховуються в
+кінці одним проходом. Не запускайте генератор на базі, з якою працює сервер.
+"""
+
+import argparse
+import itertools
 import os
+import random
+import sqlite3
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, 'site.db')
+DB_PATH = os.environ.get('DATABASE_PATH', os.path.join(BASE_DIR, 'site.db'))
+
+# Таблиці, які заповнює генератор (тригери та індекси на них знімаються на час вставки)
+LOADED_TABLES = ('products', 'customers', 'orders', 'order_items', 'feedback', 'promo_codes')
+
+# --- словники ------------------------------------------------------------
+
+# Категорія -> (іменник, рід, базова ціна в грн)
+CATALOG = {
+    'Аудіо': [('навушники', 'pl', 1800), ('колонка', 'f', 2500), ('саундбар', 'm', 6500),
+              ('мікрофон', 'm', 2200), ('підсилювач', 'm', 7000)],
+    'Периферія': [('миша', 'f', 600), ('клавіатура', 'f', 1500), ('веб-камера', 'f', 1600),
+                  ('геймпад', 'm', 1400), ('килимок', 'm', 350)],
+    'Ноутбуки': [('ноутбук', 'm', 32000), ('ультрабук', 'm', 45000), ('хромбук', 'm', 14000)],
+    'Смартфони': [('смартфон', 'm', 14000), ('чохол', 'm', 400), ('павербанк', 'm', 1200),
+                  ('зарядний пристрій', 'm', 700)],
+    'Побутова техніка': [('чайник', 'm', 1300), ('пилосос', 'm', 6000), ('кавоварка', 'f', 9000),
+                         ('блендер', 'm', 2300), ('мультиварка', 'f', 3500)],
+    'Телевізори': [('телевізор', 'm', 19000), ('проєктор', 'm', 15000), ('медіаплеєр', 'm', 2600)],
+    'Мережеве обладнання': [('роутер', 'm', 2400), ('комутатор', 'm', 1900), ('точка доступу', 'f', 3100)],
+}
+# Основа прикметника + закінчення за родом
+ADJECTIVES = ['Бездротов', 'Компактн', 'Ігров', 'Професійн', 'Портативн', 'Тих', 'Потужн',
+              'Розумн', 'Легк', 'Преміальн', 'Надійн', 'Міцн']
+ENDINGS = {'m': 'ий', 'f': 'а', 'n': 'е', 'pl': 'і'}
+BRANDS = ['Сокіл', 'Карпати', 'Дніпро', 'Полісся', 'Ватра', 'Зоря', 'Оберіг', 'Ясен',
+          'Говерла', 'Світязь', 'Буковель', 'Черемош']
+FEATURES = ['з гарантією 24 міс.', 'українською мовою меню', 'у подарунковій упаковці',
+            'з USB-C', 'з режимом енергозбереження', 'з металевим корпусом',
+            'сумісний з Android та iOS', 'з підсвіткою', 'з офіційною гарантією виробника']
+
+MALE_NAMES = ['Олександр', 'Андрій', 'Дмитро', 'Максим', 'Іван', 'Богдан', 'Тарас', 'Остап',
+              'Сергій', 'Володимир', 'Микола', 'Юрій', 'Назар', 'Данило', 'Ярослав', 'Олег']
+FEMALE_NAMES = ['Олена', 'Наталія', 'Ірина', 'Оксана', 'Марія', 'Софія', 'Анна', 'Катерина',
+                'Юлія', 'Тетяна', 'Дарина', 'Соломія', 'Христина', 'Вікторія', 'Ганна', 'Людмила']
+# (чоловіча форма, жіноча форма)
+SURNAMES = [('Шевченко', 'Шевченко'), ('Коваленко', 'Коваленко'), ('Бондаренко', 'Бондаренко'),
+            ('Мельник', 'Мельник'), ('Ткаченко', 'Ткаченко'), ('Кравченко', 'Кравченко'),
+            ('Олійник', 'Олійник'), ('Шевчук', 'Шевчук'), ('Поліщук', 'Поліщук'),
+            ('Лисенко', 'Лисенко'), ('Марченко', 'Марченко'), ('Гнатюк', 'Гнатюк'),
+            ('Левицький', 'Левицька'), ('Яворський', 'Яворська'), ('Ковалевський', 'Ковалевська'),
+            ('Заїка', 'Заїка'), ('Савчук', 'Савчук'), ('Романюк', 'Романюк')]
+EMAIL_DOMAINS = ['gmail.com', 'ukr.net', 'i.ua', 'meta.ua', 'outlook.com']
+PHONE_CODES = ['50', '63', '66', '67', '68', '73', '93', '95', '96', '97', '98', '99']
+
+FEEDBACK_MESSAGES = ['Дякую, замовлення прийшло швидко!', 'Чи буде знову в наявності {item}?',
+                     'Товар відповідає опису, рекомендую.', 'Коли відправите моє замовлення?',
+                     'Підкажіть, чи є гарантія на {item}?', 'Хочу повернути товар, що робити?',
+                     'Чудовий сервіс, замовлятиму ще.', 'Промокод не спрацював при оформленні.']
+PROMO_WORDS = ['WELCOME', 'SPRING', 'SUMMER', 'AUTUMN', 'WINTER', 'KYIV', 'LVIV', 'STUDENT',
+               'BLACKFRIDAY', 'NEWYEAR', 'BONUS', 'FRIEND']
+
+# Кирилиця -> латиниця для email (спрощена офіційна транслітерація)
+_TRANSLIT = dict(zip('абвгґдеєжзиіїйклмнопрстуфхцчшщьюя',
+                     ['a', 'b', 'v', 'h', 'g', 'd', 'e', 'ie', 'zh', 'z', 'y', 'i', 'i', 'i', 'k',
+                      'l', 'm', 'n', 'o', 'p', 'r', 's', 't', 'u', 'f', 'kh', 'ts', 'ch', 'sh',
+                      'shch', '', 'iu', 'ia']))
+
+# Частка замовлень за годиною доби (пік увечері)
+HOUR_WEIGHTS = [2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 9, 10, 11, 11, 10, 10, 11, 12, 14, 16, 17, 15, 10, 5]
+# Пн..Нд та місяці (листопад-грудень — розпродажі і свята)
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.05, 1.1, 1.2, 1.15]
+MONTH_WEIGHTS = [0.8, 0.85, 0.95, 1.0, 1.0, 0.95, 0.9, 0.95, 1.05, 1.1, 1.45, 1.6]
+
+DEFAULT_BATCH = 50000
+
 
 def seed():
     conn = sqlite3.connect(DB_PATH)
@@ -23,5 +115,404 @@ def seed():
     conn.close()
 
 
+# --- розподіли ------------------------------------------------------------
+
+def rng_for(seed_value, part):
+    """Independent generator per table: changing --orders keeps products identical."""
+    return random.Random(f'{seed_value}:{part}')
+
+
+def zipf_cum_weights(n, s):
+    """Cumulative weights of ranks 1..n with P(k) ~ 1 / k**s."""
+    return list(itertools.accumulate(1.0 / k ** s for k in range(1, n + 1)))
+
+
+def zipf_stream(rng, population, cum_weights, chunk=100000):
+    """Endless iterator of Zipf-distributed picks from ``population``."""
+    while True:
+        yield from rng.choices(population, cum_weights=cum_weights, k=chunk)
+
+
+def day_counts(total, start, days, growth):
+    """Split ``total`` events over ``days`` days: linear growth x weekday x season.
+
+    Rounding the cumulative share keeps the sum exactly ``total``.
+    """
+    weights = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        trend = 1.0 + growth * i / max(days - 1, 1)
+        weights.append(trend * WEEKDAY_WEIGHTS[day.weekday()] * MONTH_WEIGHTS[day.month - 1])
+    scale = total / sum(weights)
+    counts, running, assigned = [], 0.0, 0
+    for weight in weights:
+        running += weight * scale
+        upto = round(running)
+        counts.append(upto - assigned)
+        assigned = upto
+    return counts
+
+
+_HOUR_CUM = list(itertools.accumulate(HOUR_WEIGHTS))
+_HOURS = range(24)
+
+
+def timestamps(rng, start, counts):
+    """Yield sorted ``(day_index, iso_timestamp)``, ``counts[i]`` on day ``start + i``."""
+    for i, count in enumerate(counts):
+        if not count:
+            continue
+        midnight = datetime.combine(start + timedelta(days=i), datetime.min.time())
+        hours = rng.choices(_HOURS, cum_weights=_HOUR_CUM, k=count)
+        for second in sorted(h * 3600 + int(rng.random() * 3600) for h in hours):
+            yield i, (midnight + timedelta(seconds=second)).isoformat()
+
+
+def translit(text):
+    return ''.join(_TRANSLIT.get(ch, ch) for ch in text.lower() if ch.isalnum())
+
+
+def person(rng):
+    if rng.random() < 0.5:
+        first, surname = rng.choice(MALE_NAMES), rng.choice(SURNAMES)[0]
+    else:
+        first, surname = rng.choice(FEMALE_NAMES), rng.choice(SURNAMES)[1]
+    return first, surname
+
+
+def phone(rng):
+    return f'+380{rng.choice(PHONE_CODES)}{rng.randrange(10 ** 7):07d}'
+
+
+def batched(rows, size):
+    it = iter(rows)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- генератори рядків -------------------------------------------------------
+
+def product_rows(rng, count, first_id):
+    categories = list(CATALOG)
+    for product_id in range(first_id, first_id + count):
+        category = rng.choice(categories)
+        noun, gender, base_price = rng.choice(CATALOG[category])
+        adjective = rng.choice(ADJECTIVES) + ENDINGS[gender]
+        brand = rng.choice(BRANDS)
+        model = f'{rng.choice("AXSMKPT")}{rng.randrange(10, 1000)}'
+        name = f'{adjective} {noun} {brand} {model}'
+        description = f'{noun.capitalize()} {brand} {model} {rng.choice(FEATURES)}'
+        # Логнормальний розкид навколо базової ціни категорії, ціни «на 9»
+        price = max(round(base_price * rng.lognormvariate(0, 0.45), -1) - 1, 19)
+        stock = 0 if rng.random() < 0.08 else int(rng.paretovariate(1.3) * 5)
+        yield (product_id, name, description, float(price), min(stock, 5000), category,
+               f'GEN-{product_id:08d}')
+
+
+def customer_rows(rng, count, first_id):
+    for customer_id in range(first_id, first_id + count):
+        first, surname = person(rng)
+        email = f'{translit(first)}.{translit(surname)}{customer_id}@{rng.choice(EMAIL_DOMAINS)}'
+        yield (customer_id, f'{first} {surname}', email, phone(rng))
+
+
+def promo_rows(rng, count, until):
+    used = set()
+    for i in range(count):
+        percent = rng.choice([5, 10, 10, 15, 15, 20, 25, 30])
+        code = f'{PROMO_WORDS[i % len(PROMO_WORDS)]}{percent}'
+        if code in used:
+            code = f'{code}-{i}'
+        used.add(code)
+        created = until - timedelta(days=rng.randrange(30, 1000))
+        # Старі акції здебільшого вже вимкнені, але в історії замовлень лишаються
+        active = 1 if rng.random() < 0.4 else 0
+        yield (code, float(percent), active, datetime.combine(created, datetime.min.time()).isoformat())
+
+
+def order_rows(rng, count, first_id, start, days, until, products, customers, promos, opts):
+    """Yield ``(order_row, [item_rows])`` in chronological (= id) order."""
+    product_ids, prices, popularity = products
+    picks = zipf_stream(rng, range(len(product_ids)), popularity)
+    buyers = zipf_stream(rng, customers[0], customers[1]) if customers[0] else itertools.repeat(None)
+    promo_codes = zipf_stream(rng, promos[0], promos[1]) if promos[0] else None
+    today_index = (until - start).days
+    counts = day_counts(count, start, days, opts.growth)
+
+    order_id = first_id
+    for day_index, created_at in timestamps(rng, start, counts):
+        status = _status(rng, today_index - day_index)
+        n_items = min(opts.max_items, 1 + int(rng.expovariate(0.9)))
+        seen, items, subtotal = set(), [], 0.0
+        for _ in range(n_items):
+            index = next(picks)
+            if index in seen:
+                continue
+            seen.add(index)
+            quantity = 1 if rng.random() < 0.8 else rng.choice((2, 2, 3, 4))
+            price = prices[index]
+            subtotal += price * quantity
+            items.append((order_id, product_ids[index], quantity, price))
+        promo_code, discount = None, 0.0
+        if promo_codes is not None and rng.random() < opts.promo_rate:
+            promo_code, percent = next(promo_codes)
+            discount = round(subtotal * percent / 100.0, 2)
+        yield (order_id, next(buyers), status, created_at, promo_code, discount), items
+        order_id += 1
+
+
+def _status(rng, age_days):
+    roll = rng.random()
+    if age_days > 14:
+        return 'completed' if roll < 0.88 else 'cancelled' if roll < 0.95 else 'shipped'
+    if age_days > 3:
+        return 'shipped' if roll < 0.6 else 'completed' if roll < 0.85 else 'processing' if roll < 0.95 else 'cancelled'
+    return 'new' if roll < 0.5 else 'processing' if roll < 0.85 else 'shipped'
+
+
+def feedback_rows(rng, count, start, days, item_names):
+    for _, created_at in timestamps(rng, start, day_counts(count, start, days, 0.5)):
+        first, surname = person(rng)
+        email = f'{translit(first)}.{translit(surname)}@{rng.choice(EMAIL_DOMAINS)}'
+        message = rng.choice(FEEDBACK_MESSAGES).format(item=rng.choice(item_names))
+        yield (f'{first} {surname}', email, message, created_at)
+
+
+# --- завантаження ------------------------------------------------------------
+
+class Loader:
+    """Bulk-load session: relaxed PRAGMAs, triggers/indexes off, one transaction."""
+
+    def __init__(self, conn, batch):
+        self.conn = conn
+        self.batch = batch
+        self.saved_sql = []
+
+    def __enter__(self):
+        conn = self.conn
+        conn.execute('PRAGMA journal_mode=MEMORY')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA cache_size=-262144')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA locking_mode=EXCLUSIVE')
+        conn.execute('BEGIN')
+        # Тригери (FTS, агрегати, версії, журнал змін) і вторинні індекси
+        # дешевше перебудувати один раз, ніж підтримувати на кожен рядок
+        placeholders = ','.join('?' * len(LOADED_TABLES))
+        rows = conn.execute(
+            f"SELECT type, name, sql FROM sqlite_master WHERE type IN ('trigger', 'index') "
+            f"AND sql IS NOT NULL AND tbl_name IN ({placeholders}) ORDER BY type, name",
+            LOADED_TABLES).fetchall()
+        for kind, name, sql in rows:
+            self.saved_sql.append(sql)
+            conn.execute(f'DROP {kind.upper()} "{name}"')
+        return self
+
+    def insert(self, sql, rows):
+        count = 0
+        for chunk in batched(rows, self.batch):
+            self.conn.executemany(sql, chunk)
+            count += len(chunk)
+        return count
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self.conn
+        try:
+            if exc_type is not None:
+                conn.rollback()
+                return False
+            # Спершу індекси (збережені першими), потім тригери
+            for sql in self.saved_sql:
+                conn.execute(sql)
+            _bump_versions(conn)
+            conn.commit()
+        finally:
+            conn.execute('PRAGMA locking_mode=NORMAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return False
+
+
+def _bump_versions(conn):
+    """Invalidate ETags and force /api/changes clients to resync.
+
+    Generated rows bypass the change_log triggers, so the log horizon is
+    raised past the last seq: every client cursor becomes "expired".
+    """
+    conn.execute(f"UPDATE table_versions SET version = version + 1, "
+                 f"updated_at = CAST(strftime('%s', 'now') AS INTEGER) "
+                 f"WHERE name IN ({','.join('?' * len(LOADED_TABLES))})", LOADED_TABLES)
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    seq = (row[0] if row else 0) + 1
+    if row:
+        conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'change_log'", (seq,))
+    else:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', ?)", (seq,))
+    conn.execute("UPDATE change_log_state SET value = ? WHERE key = 'pruned_through'", (seq,))
+
+
+def _reset(conn):
+    for table in ('order_items', 'orders', 'feedback', 'customers', 'products'):
+        conn.execute(f'DELETE FROM {table}')
+    # Демо-код 1234 з initialize_db лишається
+    conn.execute("DELETE FROM promo_codes WHERE code != '1234'")
+    conn.execute(f"DELETE FROM sqlite_sequence WHERE name IN ({','.join('?' * len(LOADED_TABLES))})",
+                 LOADED_TABLES)
+    conn.execute('DELETE FROM change_log')
+
+
+def _next_id(conn, table):
+    return conn.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}').fetchone()[0]
+
+
+def _report(label, count, started):
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f'  ✓ {label}: {count:,} за {elapsed:.1f} с ({rate:,.0f} рядків/с)'.replace(',', ' '))
+
+
+def generate(db_path, opts):
+    """Build the synthetic dataset described by ``opts``; return row counts."""
+    from migrations import apply_migrations
+    from models import initialize_db, rebuild_search_index
+    from stats import rebuild_aggregates
+
+    conn = sqlite3.connect(db_path)
+    initialize_db(conn)
+    apply_migrations(conn)
+    until = opts.until
+    days = max(1, int(opts.years * 365))
+    start = until - timedelta(days=days - 1)
+    counts = {}
+    started_all = time.perf_counter()
+
+    with Loader(conn, opts.batch) as loader:
+        if opts.reset:
+            _reset(conn)
+
+        started = time.perf_counter()
+        counts['products'] = loader.insert(
+            'INSERT INTO products (id, name, description, price, stock, category, sku) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            product_rows(rng_for(opts.seed, 'products'), opts.products, _next_id(conn, 'products')))
+        _report('products', counts['products'], started)
+
+        started = time.perf_counter()
+        counts['customers'] = loader.insert(
+            'INSERT INTO customers (id, name, email, phone) VALUES (?, ?, ?, ?)',
+            customer_rows(rng_for(opts.seed, 'customers'), opts.customers, _next_id(conn, 'customers')))
+        _report('customers', counts['customers'], started)
+
+        counts['promo_codes'] = loader.insert(
+            'INSERT OR IGNORE INTO promo_codes (code, discount_percent, active, created_at) '
+            'VALUES (?, ?, ?, ?)',
+            promo_rows(rng_for(opts.seed, 'promo_codes'), opts.promos, until))
+
+        if opts.orders:
+            product_ids, prices = array('q'), array('d')
+            for product_id, price in conn.execute('SELECT id, price FROM products ORDER BY id'):
+                product_ids.append(product_id)
+                prices.append(price)
+            if not product_ids:
+                raise SystemExit('❌ Немає товарів для замовлень: задайте --products')
+            rng = rng_for(opts.seed, 'orders')
+            # Хіти — випадкові товари, а не перші за id
+            ranked = list(range(len(product_ids)))
+            rng.shuffle(ranked)
+            product_ids = array('q', (product_ids[i] for i in ranked))
+            prices = array('d', (prices[i] for i in ranked))
+            popularity = zipf_cum_weights(len(product_ids), opts.zipf)
+
+            customer_ids = [row[0] for row in conn.execute('SELECT id FROM customers ORDER BY id')]
+            rng.shuffle(customer_ids)
+            # Постійні покупці: слабший Ціпф, ніж у товарів
+            loyalty = zipf_cum_weights(len(customer_ids), 0.6) if customer_ids else None
+            promos = conn.execute('SELECT code, discount_percent FROM promo_codes ORDER BY code').fetchall()
+            rng.shuffle(promos)
+            promo_weights = zipf_cum_weights(len(promos), 1.0) if promos else None
+
+            started = time.perf_counter()
+            orders = order_rows(rng, opts.orders, _next_id(conn, 'orders'), start, days, until,
+                                (product_ids, prices, popularity), (customer_ids, loyalty),
+                                (promos, promo_weights), opts)
+            counts['orders'] = counts['order_items'] = 0
+            for chunk in batched(orders, opts.batch):
+                conn.executemany('INSERT INTO orders (id, customer_id, status, created_at, promo_code, '
+                                 'discount_amount) VALUES (?, ?, ?, ?, ?, ?)', [order for order, _ in chunk])
+                conn.executemany('INSERT INTO order_items (order_id, product_id, quantity, price) '
+                                 'VALUES (?, ?, ?, ?)', [item for _, items in chunk for item in items])
+                counts['orders'] += len(chunk)
+                counts['order_items'] += sum(len(items) for _, items in chunk)
+            _report(f"orders ({counts['order_items']:,} позицій)".replace(',', ' '), counts['orders'], started)
+
+        started = time.perf_counter()
+        item_names = [noun for nouns in CATALOG.values() for noun, _, _ in nouns]
+        counts['feedback'] = loader.insert(
+            'INSERT INTO feedback (name, email, message, created_at) VALUES (?, ?, ?, ?)',
+            feedback_rows(rng_for(opts.seed, 'feedback'), opts.feedback, start, days, item_names))
+        if opts.feedback:
+            _report('feedback', counts['feedback'], started)
+        print('  … індекси та тригери')
+
+    started = time.perf_counter()
+    rebuild_search_index(conn)
+    rebuild_aggregates(conn)
+    conn.execute('PRAGMA analysis_limit=1000')
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    print(f'  ✓ пошуковий індекс, агрегати, ANALYZE: {time.perf_counter() - started:.1f} с')
+    print(f'✓ Готово за {time.perf_counter() - started_all:.1f} с, '
+          f'розмір {db_path}: {os.path.getsize(db_path) / 1024 / 1024:.1f} МБ')
+    return counts
+
+
+def _count(value):
+    """Row count that also accepts 1e6 / 2.5e5."""
+    try:
+        number = int(float(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'не число: {value}')
+    if number < 0:
+        raise argparse.ArgumentTypeError('кількість не може бути відʼємною')
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Демо-дані та синтетичний набір для бенчмарків')
+    parser.add_argument('--db', default=DB_PATH, help='шлях до SQLite (типово DATABASE_PATH / site.db)')
+    parser.add_argument('--products', type=_count, default=0)
+    parser.add_argument('--customers', type=_count, default=0)
+    parser.add_argument('--orders', type=_count, default=0)
+    parser.add_argument('--feedback', type=_count, default=0)
+    parser.add_argument('--promos', type=_count, default=None,
+                        help='скільки промокодів створити (типово 24, якщо є замовлення)')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора')
+    parser.add_argument('--years', type=float, default=3.0, help='на скільки років розкидати замовлення')
+    parser.add_argument('--until', type=date.fromisoformat, default=date.today(),
+                        help='дата останнього замовлення, YYYY-MM-DD (типово сьогодні)')
+    parser.add_argument('--growth', type=float, default=2.0,
+                        help='ріст замовлень за період: 2.0 — наприкінці втричі більше на день, ніж на початку')
+    parser.add_argument('--zipf', type=float, default=1.0, help='показник Ціпфа для популярності товарів')
+    parser.add_argument('--promo-rate', type=float, default=0.12, help='частка замовлень з промокодом')
+    parser.add_argument('--max-items', type=int, default=6, help='максимум позицій у замовленні')
+    parser.add_argument('--batch', type=_count, default=DEFAULT_BATCH, help='рядків на один executemany')
+    parser.add_argument('--reset', action='store_true',
+                        help='спершу очистити товари, клієнтів, замовлення, відгуки та промокоди')
+    opts = parser.parse_args(argv)
+
+    if not (opts.products or opts.customers or opts.orders or opts.feedback or opts.reset):
+        seed()
+        return 0
+    if opts.promos is None:
+        opts.promos = 24 if opts.orders else 0
+    print(f'Генерація (seed={opts.seed}, до {opts.until}, {opts.years:g} р.) у {opts.db}')
+    generate(opts.db, opts)
+    return 0
+
+
 if __name__ == '__main__':
-    seed()
+    sys.exit(main())
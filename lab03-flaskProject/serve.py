@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Production-запуск Flask Market: preforking gunicorn з потоками.
+
+    python serve.py              # сервер (налаштування — змінні оточення нижче)
+    python serve.py healthcheck  # код виходу 0, якщо /health відповідає 200
+
+Майстер-процес один раз імпортує застосунок і застосовує схему/міграції,
+після чого форкає WEB_WORKERS воркерів по WEB_THREADS потоків. Кожен потік
+воркера одразу отримує відкрите з'єднання з пулу, воркер перезапускається
+після WEB_MAX_REQUESTS запитів (з розкидом, щоб не всі разом), SIGTERM
+дочікується завершення поточних запитів (до WEB_GRACEFUL_TIMEOUT секунд).
+
+Без gunicorn (напр. Windows) запускається багатопотоковий сервер Werkzeug
+в одному процесі — лише для локальної перевірки.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from contextlib import closing
+
+try:
+    import gunicorn
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.workers.gthread import ThreadWorker
+except ImportError:  # gunicorn не працює на Windows — див. run_fallback
+    gunicorn = BaseApplication = ThreadWorker = None
+
+from config import env_int
+
+# RecyclingThreadWorker спирається на внутрішні атрибути gthread (nr, nr_conns,
+# poller, sockets): перевірено лише з цією версією, вона ж закріплена в
+# requirements.txt. З іншою версією — штатний gthread з max_requests.
+TESTED_GUNICORN = (23, 0, 0)
+
+HOST = os.environ.get('FLASK_RUN_HOST', '0.0.0.0')
+PORT = env_int('FLASK_RUN_PORT', env_int('PORT', 5000))
+WEB_WORKERS = env_int('WEB_WORKERS', min(2 * (os.cpu_count() or 1) + 1, 8))
+WEB_THREADS = env_int('WEB_THREADS', 4)
+WEB_MAX_REQUESTS = env_int('WEB_MAX_REQUESTS', 5000)
+WEB_MAX_REQUESTS_JITTER = env_int('WEB_MAX_REQUESTS_JITTER', 500)
+WEB_TIMEOUT = env_int('WEB_TIMEOUT', 60)
+WEB_GRACEFUL_TIMEOUT = env_int('WEB_GRACEFUL_TIMEOUT', 30)
+WEB_KEEPALIVE = env_int('WEB_KEEPALIVE', 5)
+# Скільки чекати, поки всі потоки воркера відкриють з'єднання
+WARMUP_TIMEOUT = 5
+
+
+def load_app():
+    """Build the app and prepare the schema once, in the master process."""
+    # Метрики воркерів зводяться через спільний каталог
+    os.environ.setdefault('METRICS_MULTIPROC_DIR',
+                          os.path.join(tempfile.gettempdir(), f'flask_market_metrics_{PORT}'))
+    from app import create_app, init_db
+    from db import get_pool
+    from metrics import registry
+
+    # Кількість воркерів визначає типовий бекенд кешу (спільний, якщо їх кілька)
+    app = create_app({'WEB_WORKERS': WEB_WORKERS})
+    registry.clear_multiproc_dir()
+    init_db()
+    # Воркери не повинні успадкувати відкрите з'єднання майстра
+    get_pool().close_all()
+    return app
+
+
+def warm_connection(barrier):
+    from models import get_db_connection
+
+    try:
+        # Бар'єр гарантує, що кожне завдання виконується в окремому потоці
+        barrier.wait(WARMUP_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    with closing(get_db_connection()) as conn:
+        conn.execute('SELECT 1 FROM products LIMIT 1').fetchall()
+
+
+def post_worker_init(worker):
+    tpool = getattr(worker, 'tpool', None)
+    if tpool is None:
+        warm_connection(threading.Barrier(1))
+        return
+    threads = worker.cfg.threads
+    barrier = threading.Barrier(threads)
+    futures = [tpool.submit(warm_connection, barrier) for _ in range(threads)]
+    for future in futures:
+        try:
+            future.result(WARMUP_TIMEOUT * 2)
+        except Exception as exc:  # прогрів не повинен валити воркер
+            worker.log.warning('Прогрів з\'єднання не вдався: %s', exc)
+    worker.log.info('Воркер %s: прогріто %s з\'єднань з БД', worker.pid, threads)
+
+
+def worker_exit(server, worker):
+    from db import get_pool
+    from metrics import registry
+
+    registry.mark_process_dead()
+    get_pool().close_all()
+
+
+if ThreadWorker is not None:
+    class RecyclingThreadWorker(ThreadWorker):
+        """gthread worker that drains its connections before recycling.
+
+        Stock gthread stops right after the request that reaches
+        ``max_requests`` and drops connections it has already accepted but
+        not read yet (clients see an empty reply). This worker stops
+        accepting first, finishes what it holds, disables keep-alive, and
+        only then exits.
+        """
+
+        def init_process(self):
+            self.recycle_after = self.max_requests
+            self.max_requests = sys.maxsize  # перезапуск робимо самі в notify()
+            self.draining_since = None
+            super().init_process()
+
+        def notify(self):
+            super().notify()
+            if self.draining_since is None and self.nr >= self.recycle_after:
+                self.log.info('Воркер %s обробив %s запитів — перезапуск', self.pid, self.nr)
+                self.draining_since = time.monotonic()
+                self.cfg.set('keepalive', 0)
+                for sock in self.sockets:
+                    self.poller.unregister(sock)
+            if self.draining_since is not None and (
+                    self.nr_conns == 0
+                    or time.monotonic() - self.draining_since > self.cfg.graceful_timeout):
+                self.alive = False
+
+    class MarketApplication(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app()
+
+
+def worker_class():
+    """RecyclingThreadWorker on the tested gunicorn, stock gthread otherwise."""
+    if tuple(gunicorn.version_info) == TESTED_GUNICORN:
+        return RecyclingThreadWorker
+    print(f'⚠ gunicorn {gunicorn.__version__} не перевірявся з RecyclingThreadWorker '
+          f'(очікується {".".join(map(str, TESTED_GUNICORN))}) — використовується gthread',
+          file=sys.stderr)
+    return 'gthread'
+
+
+def gunicorn_options():
+    return {
+        'bind': f'{HOST}:{PORT}',
+        'workers': WEB_WORKERS,
+        'threads': WEB_THREADS,
+        'worker_class': worker_class(),
+        'preload_app': True,
+        'max_requests': WEB_MAX_REQUESTS,
+        'max_requests_jitter': WEB_MAX_REQUESTS_JITTER,
+        'timeout': WEB_TIMEOUT,
+        'graceful_timeout': WEB_GRACEFUL_TIMEOUT,
+        'keepalive': WEB_KEEPALIVE,
+        'accesslog': '-',
+        'errorlog': '-',
+        'loglevel': os.environ.get('LOG_LEVEL', 'info').lower(),
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+    }
+
+
+def run_fallback():
+    app = load_app()
+    print('⚠ gunicorn недоступний — запуск Werkzeug в одному процесі (не для production)')
+    app.run(host=HOST, port=PORT, threaded=True, debug=False, use_reloader=False)
+
+
+def healthcheck():
+    url = f'http://127.0.0.1:{PORT}/health'
+    try:
+        with urllib.request.urlopen(url, timeout=4) as response:
+            return 0 if response.status == 200 else 1
+    except Exception as exc:
+        print(f'❌ {url}: {exc}', file=sys.stderr)
+        return 1
+
+
+def main():
+    if sys.argv[1:] == ['healthcheck']:
+        return healthcheck()
+    if len(sys.argv) > 1:
+        print('Використання: python serve.py [healthcheck]')
+        return 2
+    if BaseApplication is None:
+        run_fallback()
+    else:
+        MarketApplication().run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""Opt-in per-request SQL profiler (``SQL_PROFILE=1``).
+
+``init_profiler(app)`` makes the pool hand out connections whose cursors
+time every statement run inside a request: normalized text, duration
+(execute plus fetching) and row count. At the end of the request:
+
+* statement shapes repeated ``SQL_N_PLUS_ONE`` times or more are logged
+  as probable N+1 queries;
+* statements slower than ``SQL_SLOW_MS`` go to the slow-query log
+  (``SQL_SLOW_LOG``, one JSON object per line) with ``EXPLAIN QUERY PLAN``;
+* the response gets a ``Server-Timing`` header with db / template /
+  serialize / total time, visible in the browser's network panel.
+
+Profiling costs a Python call per statement and per fetched row, so it is
+meant for development and short diagnostic runs, not for every worker.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter, namedtuple
+from contextlib import closing
+
+from flask import before_render_template, g, has_app_context, request, template_rendered
+
+import db
+
+logger = logging.getLogger('flask_market.sql')
+slow_logger = logging.getLogger('flask_market.sql.slow')
+
+Statement = namedtuple('Statement', ['shape', 'sql', 'params', 'duration', 'rows'])
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def normalize(sql):
+    """Statement shape: literals -> ``?``, ``IN (?, ?, ...)`` -> ``(?+)``."""
+    shape = _STRING.sub('?', sql)
+    shape = _NUMBER.sub('?', shape)
+    shape = _SPACE.sub(' ', shape).strip()
+    return _PLACEHOLDER_LIST.sub('(?+)', shape)
+
+
+class RequestProfile:
+    """Statements and timings collected during one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = []
+        self.timings = {'template': 0.0, 'serialize': 0.0}
+
+    @property
+    def db_time(self):
+        return sum(s.duration for s in self.statements)
+
+    def add(self, sql, params, duration, rows):
+        self.statements.append(Statement(normalize(sql), sql, params, duration, rows))
+        return len(self.statements) - 1
+
+    def extend(self, index, duration, rows):
+        stmt = self.statements[index]
+        self.statements[index] = stmt._replace(duration=stmt.duration + duration, rows=stmt.rows + rows)
+
+    def repeated(self, threshold):
+        counts = Counter(s.shape for s in self.statements if s.shape.upper().startswith(('SELECT', 'WITH')))
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+def current_profile():
+    if not has_app_context():
+        return None
+    return g.get('_sql_profile')
+
+
+class ProfilingCursor:
+    """Cursor mixin that reports statement time and rows to the request profile."""
+
+    _profile = None
+    _index = None
+
+    def _run(self, method, sql, params, keep_params=True):
+        profile = current_profile()
+        # refs == 0 — PRAGMA та перевірки самого пулу, поки з'єднання ще не видане
+        if profile is None or not self.connection.refs:
+            return method(sql, params)
+        started = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            rows = self.rowcount if self.rowcount > 0 else 0
+            self._profile = profile
+            self._index = profile.add(sql, params if keep_params else None, elapsed, rows)
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, keep_params=False)
+
+    def _fetched(self, started, rows):
+        if self._profile is not None:
+            self._profile.extend(self._index, time.perf_counter() - started, rows)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        row = super().__next__()
+        self._fetched(started, 1)
+        return row
+
+
+def explain(sql, params):
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE) or ';' in sql.strip().rstrip(';'):
+        return None
+    try:
+        with closing(db.get_connection()) as conn:
+            rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params or ()).fetchall()
+    except db.sqlite3.Error as exc:
+        return [f'(EXPLAIN не вдався: {exc})']
+    return [row[3] for row in rows]
+
+
+def server_timing(profile, total):
+    ms = lambda seconds: f'{seconds * 1000:.1f}'  # noqa: E731
+    return ', '.join([
+        f'db;dur={ms(profile.db_time)};desc="{len(profile.statements)} queries"',
+        f'template;dur={ms(profile.timings["template"])}',
+        f'serialize;dur={ms(profile.timings["serialize"])}',
+        f'total;dur={ms(total)}',
+    ])
+
+
+def _jsonable(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: v if isinstance(v, (int, float, str, type(None))) else repr(v) for k, v in params.items()}
+    return [v if isinstance(v, (int, float, str, type(None))) else repr(v) for v in params]
+
+
+def _start_profile():
+    g._sql_profile = RequestProfile()
+
+
+def _add_server_timing(response):
+    profile = g.get('_sql_profile')
+    if profile is not None:
+        response.headers['Server-Timing'] = server_timing(profile, time.perf_counter() - profile.started)
+    return response
+
+
+def _finish_profile(app, error=None):
+    profile = g.pop('_sql_profile', None)
+    if profile is None:
+        return
+    where = f'{request.method} {request.path}'
+    for shape, count in profile.repeated(app.config['SQL_N_PLUS_ONE']):
+        logger.warning('Ймовірний N+1 у %s: %d однакових запитів: %s', where, count, shape)
+
+    slow_ms = app.config['SQL_SLOW_MS']
+    for stmt in profile.statements:
+        if stmt.duration * 1000 < slow_ms:
+            continue
+        slow_logger.warning(json.dumps({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'request': where,
+            'duration_ms': round(stmt.duration * 1000, 2),
+            'rows': stmt.rows,
+            'sql': stmt.sql.strip(),
+            'params': _jsonable(stmt.params),
+            'plan': explain(stmt.sql, stmt.params),
+        }, ensure_ascii=False))
+
+
+def _time_template_start(sender, template, context, **extra):
+    profile = g.get('_sql_profile')
+    if profile is not None:
+        profile.template_started = time.perf_counter()
+
+
+def _time_template_end(sender, template, context, **extra):
+    profile = g.get('_sql_profile')
+    if profile is not None and hasattr(profile, 'template_started'):
+        profile.timings['template'] += time.perf_counter() - profile.template_started
+
+
+def _timed_json_response(response):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return response(*args, **kwargs)
+        finally:
+            profile = current_profile()
+            if profile is not None:
+                profile.timings['serialize'] += time.perf_counter() - started
+    return wrapper
+
+
+def init_profiler(app):
+    """Install the profiler on ``app`` and on connections opened from now on."""
+    app.config.setdefault('SQL_SLOW_MS', 100)
+    app.config.setdefault('SQL_N_PLUS_ONE', 5)
+    app.config.setdefault('SQL_SLOW_LOG', 'slow_queries.log')
+
+    db.instrument(ProfilingCursor)
+    # З'єднання поточного потоку могло відкритися ще без профілювання
+    db.get_pool().close_all()
+
+    if not any(getattr(h, '_sql_profile', False) for h in slow_logger.handlers):
+        handler = logging.FileHandler(app.config['SQL_SLOW_LOG'], encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._sql_profile = True
+        slow_logger.addHandler(handler)
+        slow_logger.propagate = False
+
+    app.before_request(_start_profile)
+    app.after_request(_add_server_timing)
+    app.teardown_request(lambda error=None: _finish_profile(app, error))
+    before_render_template.connect(_time_template_start, app)
+    template_rendered.connect(_time_template_end, app)
+    app.json.response = _timed_json_response(app.json.response)
+    return app
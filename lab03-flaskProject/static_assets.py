@@ -0,0 +1,172 @@
+"""Build step and serving for fingerprinted, precompressed static files.
+
+``python static_assets.py build`` copies every file in ``static/`` to
+``static/dist/`` under a content-hashed name (``photo.3f2a9c1d0b7e.jpg``),
+writes a ``.gz`` sibling next to compressible ones (level 9, done once
+instead of per request) and records the mapping in ``dist/manifest.json``.
+
+``init_static(app)`` reads the manifest: ``url_for('static', ...)`` then
+points at the hashed name, which is served with a one-year ``immutable``
+``Cache-Control`` and, when the client accepts gzip, straight from the
+``.gz`` file. A changed file gets a new hash and thus a new URL, so the long
+cache lifetime is safe. Without a manifest (development) nothing changes.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+from flask import request, send_from_directory
+
+import config
+from compression import accepts_gzip, is_compressible
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# .gz зберігаємо, лише якщо він хоча б на 10% менший за оригінал
+MIN_GZIP_SAVING = 0.9
+
+DEFAULT_STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in sorted(files):
+            if name.startswith('.'):
+                continue
+            yield os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/')
+
+
+def build(static_folder=DEFAULT_STATIC_FOLDER, level=9):
+    """Fingerprint and precompress ``static_folder``; return the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    written = set()
+    for name in _source_files(static_folder):
+        source = os.path.join(static_folder, name)
+        stem, ext = os.path.splitext(name)
+        hashed = f'{DIST_DIR}/{stem}.{_file_hash(source)}{ext}'
+        target = os.path.join(static_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+        written.add(hashed)
+
+        size = os.path.getsize(source)
+        gz_size = None
+        if is_compressible(mimetypes.guess_type(name)[0]) and size >= config.GZIP_MIN_SIZE:
+            with open(source, 'rb') as fh:
+                # mtime=0 — однаковий вміст дає однаковий .gz при кожній збірці
+                data = gzip.compress(fh.read(), compresslevel=level, mtime=0)
+            if len(data) < size * MIN_GZIP_SAVING:
+                with open(target + '.gz', 'wb') as fh:
+                    fh.write(data)
+                written.add(hashed + '.gz')
+                gz_size = len(data)
+        manifest[name] = {'path': hashed, 'size': size, 'gzip_size': gz_size}
+
+    # Прибираємо файли попередніх збірок
+    for name in _source_files(dist) if os.path.isdir(dist) else ():
+        if f'{DIST_DIR}/{name}' not in written and name != MANIFEST_NAME:
+            os.remove(os.path.join(dist, name))
+    os.makedirs(dist, exist_ok=True)
+    tmp_path = os.path.join(dist, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(dist, MANIFEST_NAME))
+    return manifest
+
+
+def clean(static_folder=DEFAULT_STATIC_FOLDER):
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+        return True
+    return False
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_static(app):
+    """Serve built static files with hashed URLs and precompressed bodies."""
+    manifest = load_manifest(app.static_folder)
+    app.extensions['static_manifest'] = manifest
+    if not manifest:
+        return
+    hashed = {entry['path']: entry for entry in manifest.values()}
+
+    @app.url_defaults
+    def fingerprinted_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]['path']
+
+    def send_static(filename):
+        entry = hashed.get(filename)
+        if entry is None:
+            return app.send_static_file(filename)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if entry['gzip_size'] and accepts_gzip(request.environ):
+            response = send_from_directory(app.static_folder, filename + '.gz',
+                                           mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_from_directory(app.static_folder, filename,
+                                           mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if entry['gzip_size']:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = send_static
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Збірка статичних файлів з хешами та .gz')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_parser = sub.add_parser('build', help='зібрати static/dist')
+    build_parser.add_argument('--level', type=int, default=9, help='рівень gzip (1-9)')
+    sub.add_parser('clean', help='видалити static/dist')
+    args = parser.parse_args()
+
+    if args.command == 'clean':
+        print('✓ static/dist видалено' if clean() else 'static/dist не існує')
+        return 0
+    manifest = build(level=args.level)
+    total = gz_total = 0
+    for name, entry in sorted(manifest.items()):
+        served = entry['gzip_size'] or entry['size']
+        total += entry['size']
+        gz_total += served
+        gz_note = f", gzip {entry['gzip_size']} Б" if entry['gzip_size'] else ''
+        print(f"  {name} -> {entry['path']} ({entry['size']} Б{gz_note})")
+    print(f'✓ Зібрано {len(manifest)} файлів: {total} Б -> {gz_total} Б з урахуванням gzip')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Sales analytics read from the incrementally maintained rollup tables.
+
+``daily_sales``, ``product_daily_sales``, ``promo_usage`` and
+``order_status_counts`` are kept up to date by triggers (migration 0003), so
+a dashboard load costs O(days in the window), not O(orders).
+"""
+
+from datetime import date, timedelta
+
+AGGREGATE_TABLES = ('daily_sales', 'product_daily_sales', 'promo_usage', 'order_status_counts')
+
+# Те саме початкове заповнення, що й у migrations/0003_sales_aggregates.sql
+_BACKFILL = (
+    '''INSERT INTO daily_sales (day, orders, units, revenue, discount)
+       SELECT substr(o.created_at, 1, 10), COUNT(*), COALESCE(SUM(i.units), 0),
+              COALESCE(SUM(i.revenue), 0), SUM(COALESCE(o.discount_amount, 0))
+       FROM orders o
+       LEFT JOIN (SELECT order_id, SUM(quantity) AS units, SUM(price * quantity) AS revenue
+                  FROM order_items GROUP BY order_id) i ON i.order_id = o.id
+       WHERE o.created_at IS NOT NULL
+       GROUP BY 1''',
+    '''INSERT INTO product_daily_sales (product_id, day, units, revenue)
+       SELECT oi.product_id, substr(o.created_at, 1, 10), SUM(oi.quantity), SUM(oi.price * oi.quantity)
+       FROM order_items oi JOIN orders o ON o.id = oi.order_id
+       WHERE o.created_at IS NOT NULL
+       GROUP BY 1, 2''',
+    '''INSERT INTO promo_usage (code, redemptions, discount_total)
+       SELECT promo_code, COUNT(*), SUM(COALESCE(discount_amount, 0))
+       FROM orders WHERE promo_code IS NOT NULL
+       GROUP BY 1''',
+    '''INSERT INTO order_status_counts (status, orders)
+       SELECT COALESCE(status, 'new'), COUNT(*) FROM orders GROUP BY 1''',
+)
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366 * 3
+
+
+def rebuild_aggregates(conn):
+    """Recompute every rollup table from orders/order_items in one transaction."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for table in AGGREGATE_TABLES:
+            conn.execute(f'DELETE FROM {table}')
+        for statement in _BACKFILL:
+            conn.execute(statement)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in AGGREGATE_TABLES}
+
+
+def sales_summary(conn, days=DEFAULT_DAYS, top=10):
+    """Revenue, top products, promo usage and status counts for the last ``days``."""
+    days = max(1, min(int(days), MAX_DAYS))
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+
+    daily = [dict(row) for row in conn.execute('''
+        SELECT day, orders, units, revenue, discount, revenue - discount AS net_revenue
+        FROM daily_sales WHERE day >= ? ORDER BY day
+    ''', (since,))]
+    totals = {
+        key: sum(d[key] for d in daily)
+        for key in ('orders', 'units', 'revenue', 'discount', 'net_revenue')
+    }
+    totals['average_order'] = totals['net_revenue'] / totals['orders'] if totals['orders'] else 0.0
+
+    top_products = [dict(row) for row in conn.execute('''
+        SELECT s.product_id, p.name, SUM(s.units) AS units, SUM(s.revenue) AS revenue
+        FROM product_daily_sales s
+        LEFT JOIN products p ON p.id = s.product_id
+        WHERE s.day >= ?
+        GROUP BY s.product_id
+        ORDER BY revenue DESC
+        LIMIT ?
+    ''', (since, top))]
+    promos = [dict(row) for row in conn.execute(
+        'SELECT code, redemptions, discount_total FROM promo_usage '
+        'WHERE redemptions > 0 ORDER BY redemptions DESC')]
+    statuses = {row['status']: row['orders'] for row in conn.execute(
+        'SELECT status, orders FROM order_status_counts WHERE orders > 0 ORDER BY status')}
+
+    return {
+        'days': days,
+        'since': since,
+        'totals': totals,
+        'daily': daily,
+        'top_products': top_products,
+        'promo_codes': promos,
+        'orders_by_status': statuses,
+    }
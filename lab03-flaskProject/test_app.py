@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Модульні тести без запущеного сервера (Flask test client, тимчасова БД):
+
+* кеш запитів: після запису через адмінку, API, масовий імпорт або навіть
+  повз застосунок search_products / get_orders / get_customers_page
+  віддають свіжі дані;
+* keyset-пагінація: курсори next / prev повертають ті самі сторінки;
+* pricing.quote_cart: промокоди, відсутні товари, копійки.
+
+    python -m unittest test_app.py
+"""
+
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+
+from app import create_app, init_db
+from cache import query_cache
+from models import get_customers_page, get_db_connection, get_orders, search_products
+from pagination import InvalidCursor, decode_cursor, encode_cursor, fetch_page
+from pricing import PricingError, quote_cart
+
+_tmp = None
+app = None
+
+
+def setUpModule():
+    global _tmp, app
+    _tmp = tempfile.mkdtemp(prefix='flask_market_test_')
+    app = create_app({
+        'TESTING': True,
+        'DATABASE_PATH': os.path.join(_tmp, 'site.db'),
+        'CACHE_TYPE': 'simple',
+        'API_DOCS': 'off',
+        'METRICS': 'off',
+    })
+    init_db()
+
+
+def tearDownModule():
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+
+def add_product(name, price, stock=10, category='Тест', sku=None):
+    with closing(get_db_connection()) as conn:
+        cur = conn.execute('INSERT INTO products (name, price, stock, category, sku) VALUES (?, ?, ?, ?, ?)',
+                           (name, price, stock, category, sku))
+        conn.commit()
+    return cur.lastrowid
+
+
+def csv_upload(text):
+    return {'file': (io.BytesIO(text.encode('utf-8')), 'products.csv')}
+
+
+class CacheInvalidationTestCase(unittest.TestCase):
+    """Cached read helpers return fresh data after every kind of write."""
+
+    def setUp(self):
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+
+    def names(self, q):
+        return [p['name'] for p in search_products(q=q, limit=100).items]
+
+    def assertCached(self, read):
+        hits = query_cache.stats.hits
+        read()
+        read()
+        self.assertGreater(query_cache.stats.hits, hits, 'повторне читання мало йти з кешу')
+
+    def test_admin_new_product_in_search(self):
+        self.assertCached(lambda: self.names('Вентилятор'))
+        response = self.client.post('/admin/products/new', data={'name': 'Вентилятор Breeze', 'price': '799'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('Вентилятор Breeze', self.names('Вентилятор'))
+
+    def test_bulk_import_in_search(self):
+        self.assertCached(lambda: self.names('Рюкзак'))
+        response = self.client.post('/admin/products/import', data=csv_upload(
+            'sku,name,price,stock\nBAG-1,Рюкзак Trail,1500,3\nBAG-2,Рюкзак City,900,8\n'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sorted(self.names('Рюкзак')), ['Рюкзак City', 'Рюкзак Trail'])
+
+        self.client.post('/admin/products/bulk_update', data=csv_upload('sku,price\nBAG-1,1399\n'))
+        prices = {p['sku']: p['price'] for p in search_products(q='Рюкзак').items}
+        self.assertEqual(prices['BAG-1'], 1399)
+
+    def test_write_outside_app_in_search(self):
+        # Інший воркер або ручний SQL: invalidate() не викликається, спрацьовують
+        # лише тригери table_versions
+        product_id = add_product('Лампа Halo', 350)
+        self.assertCached(lambda: self.names('Лампа'))
+        with closing(sqlite3.connect(app.config['DATABASE_PATH'])) as conn:
+            conn.execute("UPDATE products SET name = 'Лампа Halo 2' WHERE id = ?", (product_id,))
+            conn.commit()
+        self.assertEqual(self.names('Лампа'), ['Лампа Halo 2'])
+
+    def test_api_order_in_orders_and_customers(self):
+        product_id = add_product('Чайник Steam', 640)
+        self.assertCached(lambda: get_orders(limit=100))
+        self.assertCached(lambda: get_customers_page(limit=100))
+        response = self.client.post('/api/orders', json={
+            'customer_name': 'Олена', 'customer_email': 'olena@example.com', 'customer_phone': '0501234567',
+            'cart': {str(product_id): {'id': product_id, 'quantity': 2}},
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        order_id = response.json['order_id']
+
+        orders = {o['id']: o for o in get_orders(limit=100).items}
+        self.assertEqual(orders[order_id]['total'], 1280)
+        emails = [c['email'] for c in get_customers_page(limit=100).items]
+        self.assertIn('olena@example.com', emails)
+        stock = {p['id']: p['stock'] for p in search_products(q='Чайник').items}
+        self.assertEqual(stock[product_id], 8)
+
+    def test_admin_status_in_orders(self):
+        product_id = add_product('Термос Hike', 420)
+        response = self.client.post('/api/orders', json={
+            'customer_name': 'Іван', 'customer_email': 'ivan@example.com', 'customer_phone': '0671234567',
+            'cart': {str(product_id): {'id': product_id, 'quantity': 1}},
+        })
+        order_id = response.json['order_id']
+        self.assertCached(lambda: get_orders(status='shipped', limit=100))
+
+        self.client.post(f'/admin/orders/update_status/{order_id}', data={'status': 'shipped'})
+        self.assertIn(order_id, [o['id'] for o in get_orders(status='shipped', limit=100).items])
+
+        self.client.post('/admin/orders/bulk_status', data={'status': 'completed', 'order_ids': [order_id]})
+        self.assertNotIn(order_id, [o['id'] for o in get_orders(status='shipped', limit=100).items])
+        self.assertIn(order_id, [o['id'] for o in get_orders(status='completed', limit=100).items])
+
+    def test_admin_customer_delete(self):
+        with closing(get_db_connection()) as conn:
+            customer_id = conn.execute("INSERT INTO customers (name, email) VALUES ('Тарас', 'taras@example.com')"
+                                       ).lastrowid
+            conn.commit()
+        self.assertCached(lambda: get_customers_page(limit=100))
+        self.client.post(f'/admin/customers/delete/{customer_id}')
+        self.assertNotIn(customer_id, [c['id'] for c in get_customers_page(limit=100).items])
+
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    """Cursors walk forward and back over the same pages."""
+
+    @classmethod
+    def setUpClass(cls):
+        with closing(get_db_connection()) as conn:
+            conn.executemany('INSERT INTO customers (name, email) VALUES (?, ?)',
+                             [(f'Клієнт {i}', f'page{i}@example.com') for i in range(7)])
+            conn.commit()
+        # Однакові ціни — сортування має триматися на id
+        for i in range(5):
+            add_product(f'Блокнот A{i}', 99)
+
+    def walk(self, fetch):
+        """All pages forward, then all the way back via prev cursors."""
+        pages = [fetch(None)]
+        while pages[-1].next_cursor:
+            pages.append(fetch(pages[-1].next_cursor))
+        back = [pages[-1]]
+        while back[-1].prev_cursor:
+            back.append(fetch(back[-1].prev_cursor))
+        return pages, back[::-1]
+
+    def test_cursor_encoding(self):
+        token = encode_cursor(['2024-01-02T10:00:00', 42], 'prev')
+        self.assertEqual(decode_cursor(token), (['2024-01-02T10:00:00', 42], 'prev'))
+        for bad in ('', 'not-a-cursor', encode_cursor([1], 'sideways')):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(bad)
+
+    def test_customers_round_trip(self):
+        with closing(get_db_connection()) as conn:
+            expected = [row['id'] for row in conn.execute('SELECT id FROM customers ORDER BY id')]
+
+            def fetch(cursor):
+                return fetch_page(conn, 'SELECT * FROM customers WHERE 1=1', [], [('id', 'id')], cursor, 3)
+
+            pages, back = self.walk(fetch)
+        self.assertEqual([c['id'] for page in pages for c in page.items], expected)
+        self.assertEqual([[c['id'] for c in p.items] for p in back],
+                         [[c['id'] for c in p.items] for p in pages])
+        self.assertIsNone(pages[0].prev_cursor)
+
+    def test_orders_descending_round_trip(self):
+        with closing(get_db_connection()) as conn:
+            expected = [row['id'] for row in conn.execute('SELECT id FROM orders ORDER BY created_at DESC, id DESC')]
+        pages, back = self.walk(lambda cursor: get_orders(cursor=cursor, limit=2))
+        self.assertEqual([o['id'] for page in pages for o in page.items], expected)
+        self.assertEqual([[o['id'] for o in p.items] for p in back],
+                         [[o['id'] for o in p.items] for p in pages])
+
+    def test_search_ties_round_trip(self):
+        expected = [p['id'] for p in search_products(q='Блокнот', limit=100).items]
+        self.assertEqual(len(expected), 5)
+        pages, back = self.walk(lambda cursor: search_products(q='Блокнот', cursor=cursor, limit=2))
+        self.assertEqual([p['id'] for page in pages for p in page.items], expected)
+        self.assertEqual(len(back), len(pages))
+
+    def test_api_links(self):
+        client = app.test_client()
+        seen, url = [], '/api/customers?limit=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(c['id'] for c in response.json['data'])
+            url = response.json['links']['next']
+        self.assertEqual(seen, sorted(set(seen)))
+        self.assertEqual(len(seen), len(get_customers_page.uncached(limit=100).items))
+        self.assertEqual(client.get('/api/customers?cursor=broken').status_code, 400)
+
+
+class QuoteCartTestCase(unittest.TestCase):
+    """Cart pricing uses DB prices and active promo codes only."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cable = add_product('Кабель USB-C', 0.1)
+        cls.mouse = add_product('Миша Quote', 33.33)
+        with closing(get_db_connection()) as conn:
+            conn.executemany('INSERT INTO promo_codes (code, discount_percent, active) VALUES (?, ?, ?)',
+                             [('QUOTE15', 15.0, 1), ('OFF50', 50.0, 0)])
+            conn.commit()
+
+    def quote(self, cart, promo_code=None):
+        with closing(get_db_connection()) as conn:
+            return quote_cart(conn, cart, promo_code)
+
+    def test_without_promo(self):
+        quote = self.quote({str(self.mouse): 2})
+        self.assertAlmostEqual(quote.subtotal, 66.66)
+        self.assertEqual(quote.discount, 0)
+        self.assertEqual(quote.total, quote.subtotal)
+        self.assertIsNone(quote.promo_code)
+
+    def test_active_promo(self):
+        quote = self.quote({str(self.mouse): 3}, 'QUOTE15')
+        self.assertEqual((quote.promo_code, quote.discount_percent), ('QUOTE15', 15.0))
+        self.assertAlmostEqual(quote.subtotal, 99.99)
+        self.assertAlmostEqual(quote.discount, 14.9985)
+        self.assertAlmostEqual(quote.total, 84.9915)
+        # Для показу — копійки: знижка й до сплати разом дають суму кошика
+        self.assertEqual(['%.2f' % v for v in (quote.subtotal, quote.discount, quote.total)],
+                         ['99.99', '15.00', '84.99'])
+
+    def test_inactive_or_unknown_promo(self):
+        for code in ('OFF50', 'NOPE', ''):
+            quote = self.quote({str(self.mouse): 1}, code)
+            self.assertEqual(quote.discount, 0, code)
+            self.assertIsNone(quote.promo_code, code)
+
+    def test_promo_on_empty_cart(self):
+        quote = self.quote({}, 'QUOTE15')
+        self.assertEqual((quote.total, quote.discount_percent), (0, 0.0))
+
+    def test_float_cents(self):
+        # 0.1 * 3 у float — 0.30000000000000004
+        quote = self.quote({str(self.cable): 3}, '1234')
+        self.assertAlmostEqual(quote.subtotal, 0.3)
+        self.assertAlmostEqual(quote.discount, 0.03)
+        self.assertAlmostEqual(quote.total, 0.27)
+        self.assertAlmostEqual(quote.discount + quote.total, quote.subtotal)
+        self.assertEqual('%.2f' % quote.total, '0.27')
+
+    def test_cart_formats_and_missing(self):
+        quote = self.quote({
+            str(self.cable): 2,
+            'x': {'id': self.cable, 'quantity': 1, 'price': 0.0},  # ціна клієнта ігнорується
+            '999999': 1,
+        })
+        self.assertEqual([(line.id, line.quantity) for line in quote.lines], [(self.cable, 3)])
+        self.assertAlmostEqual(quote.total, 0.3)
+        self.assertEqual(quote.missing, (999999,))
+
+    def test_invalid_items(self):
+        for cart in ({str(self.cable): 0}, {str(self.cable): 'two'}, {'abc': 1}):
+            with self.assertRaises(PricingError):
+                self.quote(cart)
+
+    def test_api_quote(self):
+        response = app.test_client().post('/api/cart/quote',
+                                          json={'cart': {str(self.mouse): 3}, 'promo_code': 'QUOTE15'})
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.json['total'], 84.9915)
+        self.assertEqual(app.test_client().post('/api/cart/quote', json={'cart': {'1': -1}}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -83,7 +83,7 @@ def main():
             response = requests.get(f"{API_URL}/products")
             response.raise_for_status()
             data = response.json()
-            assert isinstance(data, list), "Products мають бути у форматі list"
+            assert isinstance(data.get("data"), list), "Products мають бути у форматі {data: [...]}"
         
         runner.test("GET /api/products", test_products)
         
@@ -93,7 +93,7 @@ def main():
             response = requests.get(f"{API_URL}/feedback")
             response.raise_for_status()
             data = response.json()
-            assert isinstance(data, list), "Feedback мають бути у форматі list"
+            assert isinstance(data.get("data"), list), "Feedback мають бути у форматі {data: [...]}"
         
         runner.test("GET /api/feedback", test_feedback_get)
         
@@ -114,10 +114,32 @@ def main():
             response = requests.get(f"{API_URL}/orders")
             response.raise_for_status()
             data = response.json()
-            assert isinstance(data, list), "Orders мають бути у форматі list"
+            assert isinstance(data.get("data"), list), "Orders мають бути у форматі {data: [...]}"
         
         runner.test("GET /api/orders", test_orders_get)
         
+        # === Admin: імпорт CSV ===
+        print("\n📥 Тестування імпорту товарів з CSV...")
+        def test_import_conflict():
+            session = requests.Session()
+            session.post(f"{BASE_URL}/admin/login", data={"password": "123"}).raise_for_status()
+            
+            def upload(csv_text):
+                files = {"file": ("products.csv", csv_text.encode("utf-8"), "text/csv")}
+                response = session.post(f"{BASE_URL}/admin/products/import", files=files)
+                response.raise_for_status()
+                return response.text
+            
+            upload("id,sku,name,price\n990001,TEST-CONFLICT-A,Test A,10\n"
+                   "990002,TEST-CONFLICT-B,Test B,20\n")
+            # id товару A разом з sku товару B — рядок має бути відхилений, а не 500
+            page = upload("id,sku,name,price\n990001,TEST-CONFLICT-B,Test A2,11\n"
+                          "990002,TEST-CONFLICT-B,Test B2,21\n")
+            assert "Рядок 2: конфлікт з наявним товаром" in page, "Конфлікт id / sku не відображено"
+            assert "записано 1" in page, "Коректний рядок файлу має бути записаний"
+        
+        runner.test("POST /admin/products/import (конфлікт id / sku)", test_import_conflict)
+        
         # === Swagger/API Docs ===
         print("\n📚 Тестування API документації...")
         runner.test("GET /apidocs/", lambda: requests.get(f"{BASE_URL}/apidocs/").raise_for_status())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Тест production-запуску (serve.py): воркери gunicorn перезапускаються
+після WEB_MAX_REQUESTS запитів, і жоден запит при цьому не губиться.
+
+    python test_serve.py
+
+Потрібен gunicorn (Linux / macOS). Сервер працює на копії site.db.
+"""
+
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PORT = 5099
+BASE_URL = f"http://127.0.0.1:{PORT}"
+WORKERS = 2
+MAX_REQUESTS = 20
+REQUESTS = 300
+
+
+def get_status(path):
+    try:
+        with urllib.request.urlopen(BASE_URL + path, timeout=10) as response:
+            response.read()
+            return response.status
+    except Exception as e:
+        return repr(e)
+
+
+def wait_until_up(timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if get_status("/health") == 200:
+            return True
+        time.sleep(0.3)
+    return False
+
+
+def main():
+    base_dir = Path(__file__).parent
+    tmp = tempfile.mkdtemp(prefix="flask_market_serve_")
+    db_path = os.path.join(tmp, "site.db")
+    if (base_dir / "site.db").exists():
+        shutil.copy(base_dir / "site.db", db_path)
+    log_path = os.path.join(tmp, "serve.log")
+    env = dict(os.environ,
+               DATABASE_PATH=db_path,
+               CACHE_PATH=os.path.join(tmp, "cache.db"),
+               FLASK_RUN_HOST="127.0.0.1",
+               FLASK_RUN_PORT=str(PORT),
+               WEB_WORKERS=str(WORKERS),
+               WEB_THREADS="4",
+               WEB_MAX_REQUESTS=str(MAX_REQUESTS),
+               WEB_MAX_REQUESTS_JITTER="0",
+               LOG_LEVEL="info")
+
+    print(f"🚀 Запуск serve.py ({WORKERS} воркери, перезапуск після {MAX_REQUESTS} запитів)...")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen([sys.executable, "serve.py"], cwd=base_dir, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+    failed = []
+    try:
+        if not wait_until_up():
+            failed.append("сервер не запустився")
+        else:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                statuses = list(pool.map(get_status, ["/api/products?limit=5"] * REQUESTS))
+            errors = [s for s in statuses if s != 200]
+            if errors:
+                failed.append(f"{len(errors)} з {REQUESTS} запитів не вдалися: {errors[:3]}")
+            else:
+                print(f"✓ {REQUESTS} запитів — усі 200")
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+    log_text = Path(log_path).read_text(encoding="utf-8", errors="replace")
+    boots = len(re.findall(r"Booting worker with pid", log_text))
+    # Початкові воркери + принаймні по одному перезапуску на кожен
+    if boots < WORKERS * 2:
+        failed.append(f"воркерів запущено {boots}, очікувалося ≥ {WORKERS * 2} (перезапуску не було)")
+    else:
+        print(f"✓ Воркери перезапускалися: запусків {boots}")
+    worker = re.search(r"Using worker: (\S+)", log_text)
+    if worker:
+        print(f"  └─ клас воркера: {worker.group(1)}")
+
+    for message in failed:
+        print(f"✗ {message}")
+    if failed:
+        print(f"❌ Журнал сервера: {log_path}")
+        return 1
+    shutil.rmtree(tmp, ignore_errors=True)
+    print("✅ Перезапуск воркерів працює")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())